@@ -0,0 +1,487 @@
+import argparse
+import email.parser
+import email.policy
+import io
+import json
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+from PIL import Image, UnidentifiedImageError
+
+MAX_BATCH = 256
+MAX_DAYS = 31
+MAX_DAILY_CALORIES = 10000
+MAX_ALTERNATIVES = 50
+
+
+class APIError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_multipart(content_type: str, body: bytes) -> List[Tuple[Optional[str], Optional[str], bytes]]:
+    """
+    Split a multipart/form-data body into its parts
+
+    Args:
+        content_type (str): The request's Content-Type header, with the boundary
+        body (bytes): The request body
+
+    Returns:
+        List[Tuple]: (field name, file name, content) for each part
+
+    Raises:
+        APIError: If the body is not valid multipart data
+    """
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + body
+    )
+    if not message.is_multipart():
+        raise APIError(400, "Malformed multipart body")
+    return [
+        (part.get_param('name', header='content-disposition'), part.get_filename(), part.get_payload(decode=True) or b'')
+        for part in message.iter_parts()
+    ]
+
+
+def _int_field(request: Dict, name: str, default: int) -> int:
+    """An integer field of a JSON request, or a 400 if it isn't one"""
+    value = request.get(name, default)
+    try:
+        if isinstance(value, bool):
+            raise TypeError
+        return int(value)
+    except (TypeError, ValueError, OverflowError):
+        raise APIError(400, f"{name} must be an integer")
+
+
+def _to_json(value: Any) -> Any:
+    """json.dumps fallback for numpy values"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _records(df: pd.DataFrame) -> List[Dict]:
+    """DataFrame rows as dicts, with missing values as None"""
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+class EatelligenceService:
+    def __init__(self, recognizer: bool = True):
+        """
+        The app's components, without the Streamlit UI
+
+        Args:
+            recognizer (bool): Load the food recognition model; it is the
+                slowest component to start and can be left out
+        """
+        from nutrition_utils import load_nutrition_data
+        from recipe_generator import RecipeGenerator
+        from disease_recommender import DiseaseRecommender
+        from healthy_alternatives import HealthyAlternatives
+        from ingredient_search import IngredientIndex
+        from recipe_templates import CUISINE_TEMPLATES
+
+        catalog = load_nutrition_data()
+        # Lower-case dish name -> nutrition, so lookups don't re-read the catalog
+        self.catalog = {
+            row['Food'].strip().lower(): {
+                'name': row['Food'].strip(),
+                **{column.lower(): float(row[column])
+                   for column in ['Calories', 'Protein', 'Fat', 'Carbs', 'Sugar', 'Fibre', 'Sodium']}
+            }
+            for row in catalog.to_dict('records')
+        }
+        self.recipe_generator = RecipeGenerator()
+        self.ingredient_index = IngredientIndex(self.recipe_generator.get_ingredient_categories(), catalog['Food'])
+        # Lower-case cuisine name -> the name the templates use
+        self.cuisines = {cuisine.lower(): cuisine for cuisine in CUISINE_TEMPLATES}
+        self.disease_recommender = DiseaseRecommender()
+        self.healthy_alternatives = HealthyAlternatives()
+
+        self.food_recognizer = None
+        if recognizer:
+            from food_recognition import FoodRecognizer
+            self.food_recognizer = FoodRecognizer(
+                num_workers=int(os.getenv('EATELLIGENCE_MODEL_WORKERS', '0')),
+                threads_per_worker=int(os.getenv('EATELLIGENCE_THREADS_PER_WORKER', '0')) or None
+            )
+        # An in-process model runs one batch at a time; model-server processes queue their own work
+        self._model_lock = threading.Lock()
+
+    @property
+    def can_recognize(self) -> bool:
+        return self.food_recognizer is not None and self.food_recognizer.model is not None
+
+    def health(self) -> Dict:
+        return {
+            'status': 'ok',
+            'recognition': self.can_recognize,
+            'ai_recipes': self.recipe_generator.is_api_available,
+            'foods': len(self.catalog)
+        }
+
+    def nutrition(self, request: Dict) -> Dict:
+        """Nutrition per 100 g of a catalog dish: {"food": name}"""
+        food = str(request.get('food') or '').strip()
+        if not food:
+            raise APIError(400, "food is required")
+        info = self.catalog.get(food.lower())
+        if info is None:
+            raise APIError(404, f"No nutrition information for {food}")
+        return info
+
+    def recognize(self, images: List[bytes]) -> Dict:
+        """Recognize the food in each image with one forward pass, adding its nutrition"""
+        if not self.can_recognize:
+            raise APIError(503, "Food recognition is unavailable")
+        if len(images) > MAX_BATCH:
+            raise APIError(413, f"At most {MAX_BATCH} images per request")
+        decoded = []
+        for data in images:
+            try:
+                decoded.append(Image.open(io.BytesIO(data)).convert('RGB'))
+            except (UnidentifiedImageError, OSError):
+                raise APIError(400, f"Image {len(decoded) + 1} could not be decoded")
+
+        if self.food_recognizer.model_pool is None:
+            with self._model_lock:
+                predictions = self.food_recognizer.recognize_batch(decoded)
+        else:
+            predictions = self.food_recognizer.recognize_batch(decoded)
+        return {'results': [
+            {
+                'food': food,
+                'confidence': round(float(confidence), 4),
+                'nutrition': self.catalog.get(food.strip().lower()) if food else None
+            }
+            for food, confidence in predictions
+        ]}
+
+    def alternatives(self, request: Dict) -> Dict:
+        """Healthier alternatives side by side with the original: {"food": name, "k": 5}"""
+        food = str(request.get('food') or '').strip()
+        if not food:
+            raise APIError(400, "food is required")
+        k = _int_field(request, 'k', 5)
+        if not 1 <= k <= MAX_ALTERNATIVES:
+            raise APIError(400, f"k must be between 1 and {MAX_ALTERNATIVES}")
+        comparison = self.healthy_alternatives.get_comparison(food, k=k)
+        if (comparison['role'] == 'alternative').sum() == 0:
+            raise APIError(404, f"No healthier alternatives found for {food}")
+        return {'food': food, 'comparison': _records(comparison)}
+
+    def diet_plan(self, request: Dict) -> Dict:
+        """Diet plan: {"conditions": [...], "daily_calories": 2000, "days": 1, "seed": null}"""
+        conditions = request.get('conditions') or request.get('condition') or []
+        if isinstance(conditions, str):
+            conditions = conditions.split(',')
+        if not isinstance(conditions, list) or not all(isinstance(condition, str) for condition in conditions):
+            raise APIError(400, "conditions must be a list of condition names")
+        conditions = [condition.strip().lower() for condition in conditions if condition.strip()]
+        unknown = [condition for condition in conditions if condition not in self.disease_recommender.criteria]
+        if unknown or not conditions:
+            raise APIError(400, f"Unsupported conditions: {unknown or conditions}; "
+                                f"choose from {sorted(self.disease_recommender.criteria)}")
+        daily_calories = _int_field(request, 'daily_calories', 2000)
+        if not 1 <= daily_calories <= MAX_DAILY_CALORIES:
+            raise APIError(400, f"daily_calories must be between 1 and {MAX_DAILY_CALORIES}")
+        days = _int_field(request, 'days', 1)
+        if not 1 <= days <= MAX_DAYS:
+            raise APIError(400, f"days must be between 1 and {MAX_DAYS}")
+        seed = request.get('seed')
+        if seed is not None:
+            seed = _int_field(request, 'seed', None)
+            if seed < 0:
+                raise APIError(400, "seed must not be negative")
+
+        if days > 1:
+            plan = self.disease_recommender.get_weekly_plan(conditions, daily_calories, days=days, seed=seed)
+        else:
+            day_plan = self.disease_recommender.get_diet_plan(conditions, daily_calories, seed=seed)
+            if not day_plan['meals']:
+                raise APIError(422, day_plan['description'])
+            plan = {
+                'description': day_plan['description'],
+                'days': [{key: value for key, value in day_plan.items() if key != 'description'}],
+                'nutritional_summary': day_plan['nutritional_summary'],
+                'within_tolerance': day_plan['within_tolerance'],
+                'calorie_deviation': day_plan['calorie_deviation']
+            }
+        if not plan['days'] or not plan['days'][0]['meals']:
+            raise APIError(422, plan['description'])
+        return {'conditions': conditions, 'daily_calories': daily_calories, **plan}
+
+    def recipe(self, request: Dict) -> Dict:
+        """Recipe: {"ingredients": [...], "cuisine": "Indian", "surprise": false, "variant": 0}"""
+        ingredients = request.get('ingredients') or []
+        if not isinstance(ingredients, (str, list)) or \
+                isinstance(ingredients, list) and not all(isinstance(ingredient, str) for ingredient in ingredients):
+            raise APIError(400, "ingredients must be a list of ingredient names")
+        ingredients, _ = self.ingredient_index.normalize(ingredients)
+        if not ingredients:
+            raise APIError(400, "ingredients are required")
+        cuisine = request.get('cuisine') or 'Indian'
+        if not isinstance(cuisine, str) or cuisine.strip().lower() not in self.cuisines:
+            raise APIError(400, f"Unsupported cuisine: {cuisine!r}; choose from {list(self.cuisines.values())}")
+        cuisine = self.cuisines[cuisine.strip().lower()]
+        if request.get('surprise'):
+            if not self.recipe_generator.is_api_available:
+                raise APIError(503, "AI recipes need an OpenAI API key")
+            try:
+                recipe = self.recipe_generator.request_recipe(ingredients, cuisine)
+            except (TimeoutError, ConnectionError) as e:
+                raise APIError(503, f"Recipe service is unavailable: {e}")
+        else:
+            recipe = self.recipe_generator.template_recipe(ingredients, cuisine, _int_field(request, 'variant', 0))
+        return {'ingredients': ingredients, 'cuisine': cuisine, 'recipe': recipe}
+
+
+class APIHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep connections alive between requests
+    protocol_version = 'HTTP/1.1'
+    server_version = 'EATelligenceAPI/1.0'
+    # Headers and body go out as separate writes; don't let Nagle hold the body for the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        # Idle keep-alive connections and stalled uploads time out
+        self.timeout = self.server.idle_timeout
+        super().setup()
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, body: Dict):
+        payload = json.dumps(body, default=_to_json).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_error(self, status: int, message: str):
+        self._send_json(status, {'error': {'status': status, 'message': message}})
+
+    def _read_body(self) -> Optional[bytes]:
+        """The request body, or None if the client stalled or went away while sending it"""
+        length = self.headers.get('Content-Length')
+        # Unless the whole body is read, the next request on the connection can't be found
+        if length is None:
+            self.close_connection = True
+            raise APIError(411, "Content-Length is required")
+        if not (length.isascii() and length.isdigit()):
+            self.close_connection = True
+            raise APIError(400, "Content-Length must be a non-negative integer")
+        length = int(length)
+        if length > self.server.max_body:
+            self.close_connection = True
+            raise APIError(413, f"Request body is larger than {self.server.max_body} bytes")
+        try:
+            body = self.rfile.read(length)
+        except TimeoutError:
+            body = b''
+        if len(body) < length:
+            self.close_connection = True
+            return None
+        return body
+
+    def _json_body(self, body: bytes) -> Any:
+        try:
+            return json.loads(body or b'{}')
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            raise APIError(400, "Invalid JSON body")
+
+    def _images(self, body: bytes) -> List[bytes]:
+        """Images from a multipart upload (every file part) or a raw image body"""
+        content_type = self.headers.get('Content-Type', '')
+        if content_type.startswith('multipart/form-data'):
+            images = [content for _, filename, content in parse_multipart(content_type, body) if filename]
+        elif content_type.startswith(('image/', 'application/octet-stream')):
+            images = [body]
+        else:
+            raise APIError(415, "Send images as multipart/form-data or with an image/* Content-Type")
+        if not images or not all(images):
+            raise APIError(400, "No image received")
+        return images
+
+    def _run(self, call: Callable, *args) -> Dict:
+        """Run a handler on the service's worker pool, giving up after the request timeout"""
+        future = self.server.executor.submit(call, *args)
+        try:
+            return future.result(timeout=self.server.request_timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise APIError(504, f"Request took longer than {self.server.request_timeout:g}s")
+
+    def _batch(self, call: Callable, requests: Any) -> Dict:
+        """Apply a JSON handler to every request of a batch, reporting errors per item"""
+        if not isinstance(requests, list):
+            raise APIError(400, "Batch body must be {\"requests\": [...]}")
+        if len(requests) > MAX_BATCH:
+            raise APIError(413, f"At most {MAX_BATCH} requests per batch")
+        results = []
+        for request in requests:
+            try:
+                results.append(call(request if isinstance(request, dict) else {}))
+            except APIError as e:
+                results.append({'error': {'status': e.status, 'message': str(e)}})
+            except (ValueError, TypeError) as e:
+                results.append({'error': {'status': 400, 'message': str(e)}})
+        return {'results': results}
+
+    def _handle(self, method: str):
+        url = urlsplit(self.path)
+        path = url.path.rstrip('/') or '/'
+        service = self.server.service
+        try:
+            body = self._read_body() if method == 'POST' else b''
+            if body is None:
+                # Nobody is left waiting for a response
+                return
+            if method == 'GET' and path == '/health':
+                result = service.health()
+            elif method == 'GET' and path == '/v1/nutrition':
+                query = parse_qs(url.query)
+                result = self._run(service.nutrition, {'food': query.get('food', [''])[0]})
+            elif method == 'POST' and path == '/v1/recognize':
+                result = self._run(service.recognize, self._images(body))
+            elif method == 'POST' and path in self.server.json_routes:
+                payload = self._json_body(body)
+                if not isinstance(payload, dict):
+                    raise APIError(400, "JSON body must be an object")
+                result = self._run(self.server.json_routes[path], payload)
+            elif method == 'POST' and path.endswith('/batch') and path[:-len('/batch')] in self.server.json_routes:
+                payload = self._json_body(body)
+                requests = payload.get('requests') if isinstance(payload, dict) else payload
+                result = self._run(self._batch, self.server.json_routes[path[:-len('/batch')]], requests)
+            else:
+                raise APIError(404, f"No route for {method} {url.path}")
+            self._send_json(200, result)
+        except APIError as e:
+            self._send_error(e.status, str(e))
+        except (ValueError, TypeError) as e:
+            self._send_error(400, str(e))
+        except Exception as e:
+            logging.getLogger(__name__).exception("Error handling %s %s", method, self.path)
+            self._send_error(500, f"Internal error: {type(e).__name__}")
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+
+class APIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, service: EatelligenceService, host: str = '127.0.0.1', port: int = 8000,
+                 workers: int = 8, request_timeout: float = 30.0, idle_timeout: float = 15.0,
+                 max_body_mb: float = 20.0, verbose: bool = False):
+        """
+        HTTP/JSON API for food recognition, nutrition, alternatives, diet plans and recipes
+
+        Each connection is served on its own thread and kept alive between
+        requests; the work itself runs on a bounded pool of worker threads,
+        and a request that takes longer than request_timeout gets a 504.
+
+        Routes:
+            GET  /health
+            GET  /v1/nutrition?food=<name>
+            POST /v1/recognize            multipart files (one forward pass for all) or an image/* body
+            POST /v1/nutrition            {"food": ...}
+            POST /v1/alternatives         {"food": ..., "k": 5}
+            POST /v1/diet-plan            {"conditions": [...], "daily_calories": 2000, "days": 1, "seed": null}
+            POST /v1/recipe               {"ingredients": [...], "cuisine": "Indian", "surprise": false}
+            POST /v1/<route>/batch        {"requests": [...]} for each JSON route above
+
+        Args:
+            service (EatelligenceService): Loaded components
+            host (str): Address to listen on
+            port (int): Port to listen on; 0 picks a free port
+            workers (int): Requests processed at once
+            request_timeout (float): Seconds a request may take before a 504
+            idle_timeout (float): Seconds an idle or stalled connection is kept open
+            max_body_mb (float): Largest accepted request body in megabytes
+            verbose (bool): Log every request
+        """
+        self.service = service
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='api-worker')
+        self.request_timeout = request_timeout
+        self.idle_timeout = idle_timeout
+        self.max_body = int(max_body_mb * 1024 * 1024)
+        self.verbose = verbose
+        self.json_routes = {
+            '/v1/nutrition': service.nutrition,
+            '/v1/alternatives': service.alternatives,
+            '/v1/diet-plan': service.diet_plan,
+            '/v1/recipe': service.recipe
+        }
+        super().__init__((host, port), APIHandler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handle_error(self, request, client_address):
+        # Clients dropping keep-alive connections is routine, not worth a traceback
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def start(self) -> threading.Thread:
+        """Serve on a daemon thread, e.g. from a test or benchmark script"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve EATelligence over HTTP without the Streamlit UI")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=8, help="Requests processed at once")
+    parser.add_argument('--timeout', type=float, default=30.0, help="Seconds before a request gets a 504")
+    parser.add_argument('--idle-timeout', type=float, default=15.0, help="Seconds an idle connection is kept open")
+    parser.add_argument('--max-body-mb', type=float, default=20.0, help="Largest accepted request body")
+    parser.add_argument('--no-recognizer', action='store_true', help="Don't load the food recognition model")
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    # Outside an app, the components' Streamlit messages only turn into log noise
+    logging.disable(logging.WARNING)
+
+    service = EatelligenceService(recognizer=not args.no_recognizer)
+    server = APIServer(service, args.host, args.port, args.workers, args.timeout, args.idle_timeout,
+                       args.max_body_mb, args.verbose)
+    print(f"Serving on {server.url}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,378 @@
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+import timeit
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+NUMERIC_COLUMNS = ['Calories', 'Protein', 'Fat', 'Carbs', 'Sugar', 'Fibre', 'Sodium']
+
+# First calls timed in a fresh interpreter, after imports, by --cold-probe
+COLD_PROBES = {
+    'load_nutrition_data': "load_nutrition_data()",
+    'get_nutrition_info': "get_nutrition_info('Iced tea')",
+}
+
+
+def synthetic_catalog(size: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Nutrition catalog of any size that looks like the real one
+
+    Rows are drawn from the real catalog with each nutrient scaled by up to
+    about 10% either way, and numbered so names stay unique while keeping
+    the words that meal-type and dish-category rules look for.
+
+    Args:
+        size (int): Number of dishes
+        seed (int): Random seed; the same seed gives the same catalog
+
+    Returns:
+        pd.DataFrame: Catalog with the columns of load_nutrition_data()
+    """
+    from nutrition_utils import load_nutrition_data
+
+    base = load_nutrition_data()
+    rng = np.random.default_rng(seed)
+    rows = base.iloc[rng.integers(0, len(base), size)].reset_index(drop=True)
+    rows[NUMERIC_COLUMNS] = rows[NUMERIC_COLUMNS].to_numpy() * rng.lognormal(0.0, 0.05, (size, len(NUMERIC_COLUMNS)))
+    rows['Food'] = [f"{name.strip()} #{i}" for i, name in enumerate(rows['Food'])]
+    return rows
+
+
+def synthetic_gallery(size: int, dim: int = 1000, seed: int = 0) -> Dict[str, Dict]:
+    """
+    Preset gallery of any size for FoodRecognizer._compare_with_preset
+
+    Args:
+        size (int): Number of preset dishes
+        dim (int): Feature length; the ResNet outputs used as features have 1000
+        seed (int): Random seed
+
+    Returns:
+        Dict[str, Dict]: Dish name -> {'features': tensor of shape (1, dim)}
+    """
+    import torch
+
+    generator = torch.Generator().manual_seed(seed)
+    features = torch.randn(size, dim, generator=generator)
+    return {f"dish {i}": {'features': features[i:i + 1].clone()} for i in range(size)}
+
+
+def synthetic_image(size: int, seed: int = 0) -> Image.Image:
+    """
+    Photo-like test image: smooth colour gradients with some noise, JPEG round-tripped
+
+    Args:
+        size (int): Longer side in pixels; the image is 4:3
+        seed (int): Random seed
+    """
+    rng = np.random.default_rng(seed)
+    height, width = size * 3 // 4, size
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    channels = [np.sin(x / width * rng.uniform(2, 6) + y / height * rng.uniform(2, 6) + phase)
+                for phase in rng.uniform(0, np.pi, 3)]
+    pixels = (np.stack(channels, axis=-1) * 90 + 128 + rng.normal(0, 12, (height, width, 3))).clip(0, 255)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels.astype(np.uint8)).save(buffer, 'JPEG', quality=90)
+    buffer.seek(0)
+    image = Image.open(buffer)
+    image.load()
+    return image
+
+
+def measure(func: Callable[[], object], repeat: int = 5, min_time: float = 0.2) -> Dict[str, float]:
+    """
+    Time a call the way timeit does, with garbage collection off
+
+    The number of calls per round grows until a round takes min_time, and
+    the median and fastest of repeat rounds are reported per call.
+
+    Returns:
+        Dict[str, float]: median and min seconds per call, and calls per round
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9) * 1.2))
+    rounds = [elapsed / number] + [seconds / number for seconds in timer.repeat(repeat - 1, number)]
+    return {'median': float(np.median(rounds)), 'min': min(rounds), 'number': number}
+
+
+def measure_cold(probe: str, repeat: int = 3) -> Dict[str, float]:
+    """Time the first call of a cold probe, each time in a fresh interpreter"""
+    rounds = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--cold-probe', probe],
+                                capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+        rounds.append(float(output.strip().splitlines()[-1]))
+    return {'median': float(np.median(rounds)), 'min': min(rounds), 'number': 1}
+
+
+def _cold_probe(probe: str):
+    from nutrition_utils import load_nutrition_data, get_nutrition_info
+
+    start = time.perf_counter()
+    eval(COLD_PROBES[probe])
+    print(time.perf_counter() - start)
+
+
+def _load_recognizer(weights: str):
+    """
+    FoodRecognizer with pretrained weights, or random ones when those can't be loaded
+
+    Random weights cost the same to run, so timings stay comparable on
+    machines without network access to torch.hub and the ImageNet labels.
+
+    Returns:
+        Tuple[FoodRecognizer, str]: The recognizer and which weights it has
+    """
+    import torch
+    import torchvision
+    from food_recognition import FoodRecognizer
+
+    if weights == 'pretrained':
+        recognizer = FoodRecognizer()
+        if recognizer.model is not None and recognizer.labels:
+            return recognizer, 'pretrained'
+
+    load, labels = torch.hub.load, FoodRecognizer._load_imagenet_labels
+    torch.hub.load = lambda *args, **kwargs: torchvision.models.resnet50(weights=None)
+    FoodRecognizer._load_imagenet_labels = lambda self: [f"class {i}" for i in range(1000)]
+    try:
+        torch.manual_seed(0)
+        return FoodRecognizer(), 'random'
+    finally:
+        torch.hub.load, FoodRecognizer._load_imagenet_labels = load, labels
+
+
+def nutrition_cases(args) -> Iterator[Tuple[str, Callable]]:
+    from nutrition_utils import load_nutrition_data, get_nutrition_info, assess_health_impact
+
+    yield 'nutrition/load_nutrition_data/cold', None
+    yield 'nutrition/load_nutrition_data/warm', load_nutrition_data
+    yield 'nutrition/get_nutrition_info/cold', None
+    yield 'nutrition/get_nutrition_info/warm', lambda: get_nutrition_info('Iced tea')
+    yield 'nutrition/get_nutrition_info/miss', lambda: get_nutrition_info('No such dish')
+    info = get_nutrition_info('Iced tea')
+    yield 'nutrition/assess_health_impact', lambda: assess_health_impact(info)
+
+
+def recognition_cases(args) -> Iterator[Tuple[str, Callable]]:
+    recognizer, weights = _load_recognizer(args.weights)
+    args.meta['weights'] = weights
+    if recognizer.model is None:
+        print("Skipping recognition benchmarks: the model could not be loaded", file=sys.stderr)
+        return
+
+    for size in args.image_sizes:
+        image = synthetic_image(size, seed=size)
+        yield f'recognition/recognize_food/{size}px', lambda image=image: recognizer.recognize_food(image)
+        yield f'recognition/process_image/{size}px', lambda image=image: recognizer.process_image(image)
+
+    features = recognizer._infer([synthetic_image(224)])[0]
+    for size in args.gallery_sizes:
+        # The gallery is built only while its own case runs, so just one is in memory at a time
+        yield f'recognition/compare_with_preset/{size}', GalleryCase(
+            recognizer, size, lambda: recognizer._compare_with_preset(features)
+        )
+
+
+class GalleryCase:
+    """Case that installs a synthetic preset gallery for as long as it is being timed"""
+
+    def __init__(self, recognizer, size: int, func: Callable):
+        self.recognizer = recognizer
+        self.size = size
+        self.func = func
+
+    def __enter__(self):
+        self.presets = self.recognizer.preset_images
+        self.recognizer.preset_images = synthetic_gallery(self.size)
+        return self.func
+
+    def __exit__(self, *exc):
+        self.recognizer.preset_images = self.presets
+
+
+def disease_cases(args) -> Iterator[Tuple[str, Callable]]:
+    from disease_recommender import DiseaseRecommender
+
+    recommender = DiseaseRecommender()
+    real_catalog = recommender.df
+    for size in [None] + args.catalog_sizes:
+        label = 'catalog' if size is None else str(size)
+        if size is not None:
+            recommender.df = synthetic_catalog(size)
+            recommender._compile_filters()
+
+        def suitable_cold():
+            recommender.suitable_foods.clear()
+            return recommender.get_suitable_foods(['diabetes', 'hypertension'])
+
+        yield f'disease/get_suitable_foods/cold/{label}', suitable_cold
+        yield f'disease/get_suitable_foods/warm/{label}', lambda: recommender.get_suitable_foods(['diabetes', 'hypertension'])
+        yield f'disease/get_diet_plan/{label}', lambda: recommender.get_diet_plan(['diabetes'], 2000, seed=0)
+
+    recommender.df = real_catalog
+    recommender._compile_filters()
+
+
+def recipe_cases(args) -> Iterator[Tuple[str, Callable]]:
+    from llm_stub_server import StubServer
+
+    server = StubServer(port=0, latency=args.stub_latency)
+    server.start()
+    os.environ['OPENAI_BASE_URL'] = server.base_url
+    os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+
+    from recipe_generator import RecipeGenerator
+
+    generator = RecipeGenerator()
+    # Time generation itself, and keep benchmark recipes out of the app's cache
+    generator.cache = None
+    try:
+        yield 'recipes/generate_recipe/template', lambda: generator.generate_recipe(['palak', 'paneer'], 'Indian')
+        yield 'recipes/generate_recipe/stub', lambda: generator.generate_recipe(['palak', 'paneer'], 'Indian', surprise=True)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+SUITES = {
+    'nutrition': nutrition_cases,
+    'recognition': recognition_cases,
+    'disease': disease_cases,
+    'recipes': recipe_cases,
+}
+
+
+def run_suite(args) -> Dict[str, Dict[str, float]]:
+    """Run every selected case, printing each result as it completes"""
+    pattern = re.compile(args.only) if args.only else None
+    results = {}
+    for suite in args.suites:
+        for name, case in SUITES[suite](args):
+            if pattern and not pattern.search(name):
+                continue
+            if case is None:
+                result = measure_cold(name.split('/')[1], repeat=args.repeat)
+            elif isinstance(case, GalleryCase):
+                with case as func:
+                    result = measure(func, args.repeat, args.min_time)
+            else:
+                result = measure(case, args.repeat, args.min_time)
+            results[name] = result
+            print(f"{name:<52} {_format_seconds(result['median']):>10} median "
+                  f"{_format_seconds(result['min']):>10} min", file=sys.stderr)
+    return results
+
+
+def _format_seconds(seconds: float) -> str:
+    for unit, scale in [('s', 1), ('ms', 1e-3), ('us', 1e-6)]:
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """
+    Compare median timings with a baseline
+
+    Args:
+        results (Dict): This run's results by case name
+        baseline (Dict): Stored results by case name
+        threshold (float): Percentage slowdown that counts as a regression
+
+    Returns:
+        List[str]: Names of the cases that regressed
+    """
+    regressions = []
+    print(f"\n{'case':<52} {'baseline':>10} {'now':>10} {'change':>8}")
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:<52} {'-':>10} {_format_seconds(result['median']):>10} {'new':>8}")
+            continue
+        change = (result['median'] / baseline[name]['median'] - 1) * 100
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<52} {_format_seconds(baseline[name]['median']):>10} "
+              f"{_format_seconds(result['median']):>10} {change:>+7.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the app's hot paths and compare them with a baseline")
+    parser.add_argument('--suite', dest='suites', action='append', choices=list(SUITES),
+                        help="Suite to run; repeat for several. Defaults to all")
+    parser.add_argument('--only', help="Only run cases whose name matches this regular expression")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed rounds per case")
+    parser.add_argument('--min-time', type=float, default=0.2, help="Seconds each round runs for at least")
+    parser.add_argument('--image-sizes', type=int, nargs='+', default=[224, 640, 1280, 2560])
+    parser.add_argument('--gallery-sizes', type=int, nargs='+', default=[10, 100, 1000, 10000, 100000])
+    parser.add_argument('--catalog-sizes', type=int, nargs='+', default=[10000, 100000],
+                        help="Synthetic catalog sizes, in addition to the real catalog")
+    parser.add_argument('--weights', choices=['pretrained', 'random'], default='pretrained',
+                        help="Recognition model weights; random needs no network access")
+    parser.add_argument('--threads', type=int, help="torch intra-op threads, for comparable runs")
+    parser.add_argument('--stub-latency', type=float, default=0.0, help="Seconds the stub OpenAI server waits")
+    parser.add_argument('-o', '--output', help="Write this run's results to a JSON file")
+    parser.add_argument('--save-baseline', metavar='PATH', help="Store this run's results as the baseline")
+    parser.add_argument('--baseline', metavar='PATH', help="Compare with a stored baseline")
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help="Percentage slowdown against the baseline that fails the run")
+    parser.add_argument('--cold-probe', choices=list(COLD_PROBES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Outside an app, the components' Streamlit messages only turn into log noise
+    logging.disable(logging.WARNING)
+
+    if args.cold_probe:
+        _cold_probe(args.cold_probe)
+        return
+
+    args.suites = args.suites or list(SUITES)
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+    args.meta = {
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'threads': args.threads,
+    }
+
+    results = run_suite(args)
+    report = {'meta': args.meta, 'results': results}
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline['results'], args.threshold)
+        if regressions:
+            sys.exit(f"\n{len(regressions)} cases are more than {args.threshold:g}% slower than the baseline")
+        print(f"\nNo case is more than {args.threshold:g}% slower than the baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+import argparse
+import csv
+import json
+import logging
+import multiprocessing as mp
+import os
+import sys
+import time
+import zlib
+from typing import Dict, Iterator, List, Tuple, Union
+
+# Worker-process recommender; inherited from the parent when workers are forked
+_recommender = None
+
+
+def _jsonl_rows(f) -> Iterator[Tuple[int, Union[Dict, str]]]:
+    """Line number and object of each non-blank JSONL line, or an error for a line that isn't an object"""
+    for line_number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, f"line {line_number} is not valid JSON ({e.msg})"
+            continue
+        yield line_number, row if isinstance(row, dict) else f"line {line_number} is not a JSON object"
+
+
+def read_patients(path: str) -> Iterator[Dict]:
+    """
+    Read a patient roster from a CSV or JSONL file
+
+    Each patient needs a condition (or several, separated by ';' or '|' in CSV
+    files, or given as a list in JSONL files) and a daily calorie target. The
+    columns patient_id, days and seed are optional.
+
+    Rows with values that can't be used, and JSONL lines that aren't JSON
+    objects, are still yielded, with an error saying what is wrong, so they
+    end up as error rows in the output.
+
+    Args:
+        path (str): Path to a .csv or .jsonl file
+
+    Yields:
+        Dict: Patient with patient_id, conditions, daily_calories, days and
+        seed, plus error for an invalid row
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith(('.jsonl', '.ndjson')):
+            rows = _jsonl_rows(f)
+        else:
+            rows = enumerate(csv.DictReader(f), 1)
+
+        for line_number, row in rows:
+            if isinstance(row, str):
+                yield {'patient_id': str(line_number), 'conditions': [], 'daily_calories': None,
+                       'days': None, 'seed': None, 'error': row}
+                continue
+            patient = {'patient_id': str(row.get('patient_id') or line_number)}
+            errors = []
+
+            conditions = row.get('conditions', row.get('condition', ''))
+            if isinstance(conditions, str):
+                conditions = conditions.replace('|', ';').split(';')
+            if not isinstance(conditions, list) or not all(isinstance(condition, str) for condition in conditions):
+                errors.append(f"conditions {conditions!r} is not a list of condition names")
+                conditions = []
+            patient['conditions'] = [condition.strip().lower() for condition in conditions if condition.strip()]
+
+            for field, default, parse in [('daily_calories', 2000, lambda value: int(float(value))),
+                                          ('days', 1, int), ('seed', None, int)]:
+                value = row.get(field)
+                try:
+                    patient[field] = default if value in (None, '') else parse(value)
+                except (TypeError, ValueError, OverflowError):
+                    errors.append(f"{field} {value!r} is not a whole number")
+                    patient[field] = None
+            if patient['daily_calories'] is not None and patient['daily_calories'] <= 0:
+                errors.append(f"daily_calories must be positive, got {patient['daily_calories']}")
+            if patient['days'] is not None and patient['days'] < 1:
+                errors.append(f"days must be at least 1, got {patient['days']}")
+
+            if errors:
+                patient['error'] = '; '.join(errors)
+            yield patient
+
+
+def patient_seed(patient: Dict, base_seed: int) -> int:
+    """Seed from the roster, or one derived from the patient id so reruns give the same plan"""
+    if patient['seed'] is not None:
+        return patient['seed']
+    return zlib.crc32(f"{base_seed}:{patient['patient_id']}".encode('utf-8'))
+
+
+def _init_worker():
+    """Build the recommender in workers that did not inherit it from the parent"""
+    global _recommender
+    if _recommender is None:
+        from disease_recommender import DiseaseRecommender
+
+        _recommender = DiseaseRecommender()
+
+
+def _plan_patient(patient: Dict) -> Dict:
+    """Generate the plan for one patient in a worker process"""
+    result = {
+        'patient_id': patient['patient_id'],
+        'conditions': patient['conditions'],
+        'daily_calories': patient['daily_calories'],
+        'seed': patient['seed']
+    }
+    if 'error' in patient:
+        result['error'] = patient['error']
+        return result
+    try:
+        unknown = [condition for condition in patient['conditions'] if condition not in _recommender.criteria]
+        if unknown or not patient['conditions']:
+            raise ValueError(f"Unsupported conditions: {unknown or patient['conditions']}")
+
+        if patient['days'] > 1:
+            plan = _recommender.get_weekly_plan(patient['conditions'], patient['daily_calories'],
+                                                days=patient['days'], seed=patient['seed'])
+        else:
+            day_plan = _recommender.get_diet_plan(patient['conditions'], patient['daily_calories'],
+                                                  seed=patient['seed'])
+            if not day_plan['meals']:
+                raise ValueError(day_plan['description'])
+            plan = {
+                'description': day_plan['description'],
+                'days': [{key: value for key, value in day_plan.items() if key != 'description'}],
+                'nutritional_summary': day_plan['nutritional_summary'],
+                'within_tolerance': day_plan['within_tolerance'],
+                'calorie_deviation': day_plan['calorie_deviation']
+            }
+        if not plan['days'] or not plan['days'][0]['meals']:
+            raise ValueError(plan['description'])
+        result.update(plan)
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+
+class PlanWriter:
+    CSV_COLUMNS = ['patient_id', 'conditions', 'daily_calories', 'seed', 'day', 'meal', 'foods',
+                   'servings', 'calories', 'protein', 'fat', 'carbs', 'within_tolerance', 'error']
+
+    def __init__(self, stream, output_format: str):
+        """
+        Write plans as they complete
+
+        JSONL output has one line per patient with the full plan. CSV output
+        has one row per patient, day and meal, or a single row with the error
+        for patients whose plan failed. Meals outside the calorie tolerance
+        have within_tolerance set to False in both.
+
+        Args:
+            stream: Text stream to write to
+            output_format (str): 'jsonl' or 'csv'
+        """
+        self.stream = stream
+        self.output_format = output_format
+        if output_format == 'csv':
+            self.writer = csv.DictWriter(stream, fieldnames=self.CSV_COLUMNS)
+            self.writer.writeheader()
+
+    def write(self, result: Dict):
+        """Write one patient's plan"""
+        if self.output_format == 'jsonl':
+            self.stream.write(json.dumps(result) + '\n')
+            return
+
+        patient = {
+            'patient_id': result['patient_id'],
+            'conditions': ';'.join(result['conditions']),
+            'daily_calories': result['daily_calories'],
+            'seed': result['seed']
+        }
+        if 'error' in result:
+            self.writer.writerow({**patient, 'error': result['error']})
+            return
+        for day, day_plan in enumerate(result['days'], 1):
+            for meal_type, meal_info in day_plan['meals'].items():
+                self.writer.writerow({
+                    **patient,
+                    'day': day,
+                    'meal': meal_type,
+                    'foods': ';'.join(meal_info['foods']),
+                    'servings': ';'.join(str(servings) for servings in meal_info['servings']),
+                    **{nutrient: round(value, 2) for nutrient, value in meal_info['nutrition'].items()},
+                    'within_tolerance': meal_info['within_tolerance']
+                })
+
+
+def generate_plans(patients: List[Dict], workers: int, chunksize: int = 16) -> Iterator[Dict]:
+    """
+    Generate plans for many patients across a pool of worker processes
+
+    The recommender (catalog, condition bitsets and meal combination tables)
+    is built once in this process. Where the platform supports fork, workers
+    inherit it copy-on-write instead of each loading the catalog again.
+
+    Args:
+        patients (List[Dict]): Patients as produced by read_patients, with seeds filled in
+        workers (int): Number of worker processes; 1 runs everything in this process
+        chunksize (int): Patients handed to a worker at a time
+
+    Yields:
+        Dict: Plan or error per patient, in completion order
+    """
+    _init_worker()
+    # Build the meal combination table before forking so workers share it too
+    _recommender._get_combinations(_recommender.candidate_pool_size)
+
+    if workers <= 1:
+        yield from map(_plan_patient, patients)
+        return
+
+    start_method = 'fork' if 'fork' in mp.get_all_start_methods() else 'spawn'
+    with mp.get_context(start_method).Pool(workers, initializer=_init_worker) as pool:
+        yield from pool.imap_unordered(_plan_patient, patients, chunksize=chunksize)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate diet plans for a roster of patients")
+    parser.add_argument('patients', help="Patient roster (.csv or .jsonl)")
+    parser.add_argument('-o', '--output', help="Output file (.jsonl or .csv); defaults to stdout")
+    parser.add_argument('--format', choices=['jsonl', 'csv'], help="Output format; inferred from --output")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunksize', type=int, default=16, help="Patients sent to a worker at a time")
+    parser.add_argument('--seed', type=int, default=0, help="Base seed for patients without their own")
+    args = parser.parse_args()
+
+    output_format = args.format or ('csv' if args.output and args.output.lower().endswith('.csv') else 'jsonl')
+
+    # Outside an app, the recommender's Streamlit messages only turn into log noise
+    logging.disable(logging.WARNING)
+
+    patients = list(read_patients(args.patients))
+    for patient in patients:
+        patient['seed'] = patient_seed(patient, args.seed)
+
+    output = open(args.output, 'w', newline='', encoding='utf-8') if args.output else sys.stdout
+    writer = PlanWriter(output, output_format)
+    failed = 0
+    start = time.monotonic()
+    try:
+        for result in generate_plans(patients, args.workers, args.chunksize):
+            failed += 'error' in result
+            writer.write(result)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed = max(time.monotonic() - start, 1e-9)
+    print(f"{len(patients)} patients ({failed} failed) in {elapsed:.1f}s "
+          f"at {len(patients) / elapsed:.1f} plans/s with {args.workers} workers", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,15 @@
 import pandas as pd
 import numpy as np
+import operator
+import itertools
+import functools
+import re
 from nutrition_utils import load_nutrition_data
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 import streamlit as st
 
+_OPERATORS = {'<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge}
+
 class DiseaseRecommender:
     def __init__(self):
         try:
@@ -17,63 +23,80 @@ class DiseaseRecommender:
     def _prepare_recommendations(self):
         """Prepare disease-specific food recommendations"""
         try:
-            # Define criteria for different conditions
+            # Define criteria for different conditions as (nutrient, operator, threshold)
+            # filters, plus weights over standardized nutrients that rank how well
+            # each dish suits the condition (negative weights favour less of a nutrient)
             self.criteria = {
                 'diabetes': {
                     'description': 'Low glycemic index foods with balanced macronutrients',
-                    'filters': {
-                        'Carbs': lambda x: x < 30,  # Lower carb content
-                        'Protein': lambda x: x > 10,  # Higher protein
-                        'Fat': lambda x: x < 15  # Moderate fat
-                    }
+                    'weights': {'Sugar': -1.0, 'Carbs': -0.8, 'Fibre': 0.6, 'Protein': 0.5, 'Fat': -0.3},
+                    'filters': [
+                        ('Carbs', '<', 30),  # Lower carb content
+                        ('Protein', '>', 10),  # Higher protein
+                        ('Fat', '<', 15),  # Moderate fat
+                        ('Sugar', '<', 5),  # Little free sugar
+                        ('Fibre', '>=', 1)  # Some fibre to slow absorption
+                    ]
                 },
                 'heart_disease': {
                     'description': 'Low sodium, low saturated fat foods with heart-healthy nutrients',
-                    'filters': {
-                        'Fat': lambda x: x < 10,  # Lower fat content
-                        'Protein': lambda x: x > 8,  # Moderate protein
-                        'Carbs': lambda x: x < 40  # Moderate carbs
-                    }
+                    'weights': {'Fat': -1.0, 'Sodium': -0.8, 'Fibre': 0.6, 'Protein': 0.4, 'Calories': -0.3},
+                    'filters': [
+                        ('Fat', '<', 10),  # Lower fat content
+                        ('Protein', '>', 8),  # Moderate protein
+                        ('Carbs', '<', 40),  # Moderate carbs
+                        ('Sodium', '<', 400)  # Lower sodium
+                    ]
                 },
                 'hypertension': {
                     'description': 'Low sodium, potassium-rich foods with balanced nutrients',
-                    'filters': {
-                        'Fat': lambda x: x < 12,  # Lower fat content
-                        'Protein': lambda x: x > 8,  # Moderate protein
-                        'Carbs': lambda x: x < 35  # Moderate carbs
-                    }
+                    'weights': {'Sodium': -1.0, 'Fat': -0.5, 'Fibre': 0.5, 'Protein': 0.4},
+                    'filters': [
+                        ('Fat', '<', 12),  # Lower fat content
+                        ('Protein', '>', 8),  # Moderate protein
+                        ('Carbs', '<', 35),  # Moderate carbs
+                        ('Sodium', '<', 300)  # Low sodium
+                    ]
                 },
                 'obesity': {
                     'description': 'Low calorie, high fiber foods with balanced macronutrients',
-                    'filters': {
-                        'Calories': lambda x: x < 200,  # Lower calorie content
-                        'Protein': lambda x: x > 8,  # Higher protein
-                        'Fat': lambda x: x < 10  # Lower fat
-                    }
+                    'weights': {'Calories': -1.0, 'Fat': -0.6, 'Sugar': -0.6, 'Fibre': 0.6, 'Protein': 0.6},
+                    'filters': [
+                        ('Calories', '<', 200),  # Lower calorie content
+                        ('Protein', '>', 8),  # Higher protein
+                        ('Fat', '<', 10),  # Lower fat
+                        ('Sugar', '<', 8),  # Limited free sugar
+                        ('Fibre', '>=', 1)  # Some fibre for satiety
+                    ]
                 },
                 'pcos': {
                     'description': 'Low glycemic index, high fiber foods with balanced hormones',
-                    'filters': {
-                        'Carbs': lambda x: x < 25,  # Lower carb content
-                        'Protein': lambda x: x > 12,  # Higher protein
-                        'Fat': lambda x: x < 12  # Moderate fat
-                    }
+                    'weights': {'Sugar': -0.8, 'Carbs': -0.8, 'Protein': 0.6, 'Fibre': 0.6, 'Fat': -0.3},
+                    'filters': [
+                        ('Carbs', '<', 25),  # Lower carb content
+                        ('Protein', '>', 12),  # Higher protein
+                        ('Fat', '<', 12),  # Moderate fat
+                        ('Sugar', '<', 5)  # Little free sugar
+                    ]
                 },
                 'thyroid': {
                     'description': 'Iodine-rich, selenium-containing foods with balanced nutrients',
-                    'filters': {
-                        'Protein': lambda x: x > 10,  # Higher protein
-                        'Fat': lambda x: x < 15,  # Moderate fat
-                        'Carbs': lambda x: x < 35  # Moderate carbs
-                    }
+                    'weights': {'Protein': 0.8, 'Fat': -0.4, 'Sugar': -0.3, 'Fibre': 0.3},
+                    'filters': [
+                        ('Protein', '>', 10),  # Higher protein
+                        ('Fat', '<', 15),  # Moderate fat
+                        ('Carbs', '<', 35)  # Moderate carbs
+                    ]
                 },
                 'arthritis': {
                     'description': 'Anti-inflammatory foods with balanced nutrients',
-                    'filters': {
-                        'Fat': lambda x: x < 12,  # Lower fat content
-                        'Protein': lambda x: x > 10,  # Higher protein
-                        'Carbs': lambda x: x < 30  # Lower carbs
-                    }
+                    'weights': {'Fat': -0.6, 'Sugar': -0.6, 'Fibre': 0.6, 'Protein': 0.5, 'Sodium': -0.3},
+                    'filters': [
+                        ('Fat', '<', 12),  # Lower fat content
+                        ('Protein', '>', 10),  # Higher protein
+                        ('Carbs', '<', 30),  # Lower carbs
+                        ('Sugar', '<', 8)  # Limited free sugar
+                    ]
                 }
             }
             
@@ -84,38 +107,312 @@ class DiseaseRecommender:
                 'dinner': 0.30,     # 30% of daily calories
                 'snacks': 0.10      # 10% of daily calories
             }
+            
+            # Target share of each meal's calories coming from each macronutrient
+            self.macro_split = {'protein': 0.25, 'fat': 0.25, 'carbs': 0.50}
+            
+            # Meal optimizer settings: dishes per meal, servings per dish, the number
+            # of candidate dishes searched per meal type, the number of best meals
+            # kept per meal type for a plan, and how much randomness goes into
+            # choosing among them
+            self.max_items_per_meal = 3
+            self.max_servings = 2
+            self.candidate_pool_size = 30
+            self.plan_candidates = 5000
+            self.plan_temperature = 0.05
+            
+            # Score penalties that rank a plan's meals by their recently eaten
+            # dishes first, then by their dishes that aren't suitable, then by
+            # whether they are within the calorie tolerance, then by score
+            self.repeat_penalty = 1e6
+            self.unsuitable_penalty = 1e4
+            self.out_of_tolerance_penalty = 1e3
+            
+            # When fewer foods than this meet every selected condition, the best
+            # ranked near-misses are added after them
+            self.min_suitable_foods = 20
+            
+            # Suitability lost per unit of relative distance past a filter threshold
+            self.violation_penalty = 2.0
+            
+            # Dishes are classified by the last word of their name, without any
+            # bracketed translation or "with ..." accompaniment
+            self.dish_categories = {
+                'condiment': ['masala', 'powder', 'chutney', 'pickle', 'achar', 'achaar', 'murabba',
+                              'marmalade', 'squash', 'syrup', 'sauce', 'dip', 'jam', 'candy'],
+                'beverage': ['tea', 'chai', 'coffee', 'espresso', 'espreso', 'juice', 'shake', 'milkshake',
+                             'lassi', 'smoothie', 'punch', 'sherbet', 'sharbat', 'drink', 'cooler',
+                             'lemonade', 'panna', 'milk', 'doodh', 'kanji'],
+                'sweet': ['halwa', 'kheer', 'ladoo', 'laddu', 'burfi', 'barfi', 'cake', 'gateau', 'cream',
+                          'cookies', 'cookie', 'biscuit', 'biscuits', 'pudding', 'custard', 'payasam',
+                          'jalebi', 'mousse', 'trifle', 'tart', 'kulfi', 'peda', 'jamun', 'rasgulla',
+                          'fudge', 'drops', 'alaska', 'brownie', 'brownies', 'muffin', 'muffins']
+            }
+            # Spice blends are condiments wherever the phrase appears in the name,
+            # e.g. "Bengal 5 Spice Blend (Panch Phoran)"
+            self.condiment_phrases = ['blend', 'masala powder', 'spice mix']
+            self.breakfast_keywords = [
+                'idli', 'dosa', 'uttapam', 'upma', 'poha', 'paratha', 'parantha', 'chilla', 'cheela',
+                'porridge', 'daliya', 'dalia', 'pancake', 'sandwich', 'toast', 'omelette', 'omlet', 'egg',
+                'cornflakes', 'muesli', 'oats', 'sprouts', 'dhokla', 'vada', 'thepla', 'appam', 'chiwda', 'aval'
+            ]
+            self.snack_keywords = [
+                'pakora', 'pakoda', 'chaat', 'samosa', 'tikki', 'soup', 'salad', 'raita', 'cutlet',
+                'kebab', 'kabab', 'tikka', 'sundal', 'chana', 'roll', 'bhel'
+            ]
+            
+            self._compile_filters()
         except Exception as e:
             st.error(f"Error preparing recommendations: {str(e)}")
             self.criteria = {}
             self.meal_types = {}
     
-    def get_diet_plan(self, condition: str, daily_calories: int = 2000) -> Dict:
+    def _compile_filters(self):
+        """
+        Evaluate every condition's filters once over the whole catalog
+        
+        Each condition gets a boolean mask over self.df, packed into a bitset so
+        that combining conditions is a handful of byte-wise ANDs, and a
+        suitability score per dish: its weighted standardized nutrients minus a
+        penalty for how far it misses the condition's thresholds. Scores of
+        several conditions add up, so ranking any combination is one pass.
+        """
+        columns = {column: self.df[column].to_numpy(dtype=np.float64) for column in self.df.columns if column != 'Food'}
+        
+        # Standardized nutrients, clipped so a few extreme dishes don't stretch the scale
+        score_columns = ['Calories', 'Protein', 'Fat', 'Carbs', 'Sugar', 'Fibre', 'Sodium']
+        values = self.df[score_columns].to_numpy(dtype=np.float64)
+        std = values.std(axis=0)
+        std[std == 0] = 1.0
+        zscores = np.clip((values - values.mean(axis=0)) / std, -3, 3)
+        
+        self.masks = {}
+        self.bitsets = {}
+        self.suitability = {}
+        for condition, criteria in self.criteria.items():
+            mask = np.ones(len(self.df), dtype=bool)
+            violation = np.zeros(len(self.df))
+            for nutrient, op, threshold in criteria['filters']:
+                values = columns[nutrient]
+                mask &= _OPERATORS[op](values, threshold)
+                # Relative distance past the threshold, 0 for foods that pass
+                miss = values - threshold if op in ('<', '<=') else threshold - values
+                violation += np.maximum(miss, 0) / threshold
+            weights = np.array([criteria['weights'].get(column, 0.0) for column in score_columns])
+            self.masks[condition] = mask
+            self.bitsets[condition] = np.packbits(mask)
+            self.suitability[condition] = zscores @ weights - self.violation_penalty * violation
+        
+        # Suitable foods per sorted tuple of conditions, filled on first request
+        self.suitable_foods = {}
+        
+        # Classify dishes once and derive which meal types each dish suits
+        base_names = (
+            self.df['Food'].str.lower()
+            .str.replace(r'\(.*?\)', ' ', regex=True)
+            .str.split(' with ').str[0]
+            .str.replace(r'[^a-z ]', ' ', regex=True)
+            .str.split()
+        )
+        last_words = base_names.str[-1].fillna('')
+        word_sets = base_names.apply(set)
+        is_category = {
+            category: last_words.isin(words).to_numpy()
+            for category, words in self.dish_categories.items()
+        }
+        phrases = r'\b(?:' + '|'.join(map(re.escape, self.condiment_phrases)) + r')\b'
+        is_category['condiment'] = is_category['condiment'] | \
+            self.df['Food'].str.lower().str.contains(phrases, regex=True).to_numpy()
+        mentions = lambda keywords: word_sets.apply(lambda words: not words.isdisjoint(keywords)).to_numpy()
+        
+        self.condiments = is_category['condiment']
+        main_dish = ~(is_category['condiment'] | is_category['beverage'] | is_category['sweet'])
+        breakfast = (mentions(self.breakfast_keywords) & ~self.condiments) | is_category['beverage']
+        self.meal_suitability = {
+            'breakfast': breakfast,
+            'lunch': main_dish,
+            'dinner': main_dish,
+            'snacks': (mentions(self.snack_keywords) & ~self.condiments) | breakfast | is_category['sweet']
+        }
+        
+        # Calories, protein, fat and carbs per dish, used by the meal optimizer
+        self.nutrients = self.df[['Calories', 'Protein', 'Fat', 'Carbs']].to_numpy(dtype=np.float64)
+        self._combination_cache = {}
+    
+    def _get_combinations(self, pool_size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         """
-        Generate a diet plan for a specific condition
+        Enumerate every meal that can be built from a pool of candidate dishes
+        
+        A meal is 1 to max_items_per_meal distinct dishes with 1 to max_servings
+        servings each. Unused positions point at index pool_size with 0 servings.
+        
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: Pool positions and servings, both of
+            shape (number of meals, max_items_per_meal), and the same meals as a dense
+            (number of meals, pool_size) matrix of servings per candidate dish
+        """
+        if pool_size not in self._combination_cache:
+            width = self.max_items_per_meal
+            positions, servings = [], []
+            for size in range(1, min(width, pool_size) + 1):
+                dishes = np.array(list(itertools.combinations(range(pool_size), size)))
+                portions = np.array(list(itertools.product(range(1, self.max_servings + 1), repeat=size)))
+                
+                padded_dishes = np.full((len(dishes), width), pool_size)
+                padded_dishes[:, :size] = dishes
+                padded_portions = np.zeros((len(portions), width), dtype=np.int64)
+                padded_portions[:, :size] = portions
+                
+                # Every dish combination paired with every serving pattern
+                positions.append(np.repeat(padded_dishes, len(portions), axis=0))
+                servings.append(np.tile(padded_portions, (len(dishes), 1)))
+            positions = np.vstack(positions)
+            servings = np.vstack(servings)
+            
+            # Scatter the servings into a matrix so meal totals are one matrix product
+            serving_matrix = np.zeros((len(positions), pool_size + 1), dtype=np.float32)
+            np.put_along_axis(serving_matrix, positions, servings, axis=1)
+            serving_matrix = np.ascontiguousarray(serving_matrix[:, :pool_size])
+            self._combination_cache[pool_size] = (positions, servings, serving_matrix)
+        return self._combination_cache[pool_size]
+    
+    def _score_meals(self, pool: np.ndarray, target_calories: float,
+                     tolerance: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Score the meals that can be built from the candidate dishes in pool
+        
+        Meals are first screened on calories alone; only those within `tolerance`
+        of the target get the full score, which adds the deviation of the meal's
+        macronutrient energy split from self.macro_split. When fewer than
+        self.plan_candidates meals are within tolerance, the meals closest to
+        the target make up the rest, with self.out_of_tolerance_penalty added
+        to their score, so that a plan only falls back on them when every meal
+        within tolerance repeats a recently eaten dish.
         
         Args:
-            condition (str): The condition (e.g., 'diabetes', 'heart_disease', etc.)
+            pool (np.ndarray): Row positions in self.df of the candidate dishes
+            target_calories (float): Calorie target for the meal
+            tolerance (float): Allowed relative deviation from the calorie target
+            
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: Meal numbers
+            (in _get_combinations order), their nutrient totals, their scores
+            and whether they are within tolerance
+        """
+        _, _, serving_matrix = self._get_combinations(len(pool))
+        pool_nutrients = self.nutrients[pool]
+        
+        calorie_error = np.abs(serving_matrix @ pool_nutrients[:, 0] - target_calories) / target_calories
+        meals = np.flatnonzero(calorie_error <= tolerance)
+        shortfall = min(self.plan_candidates - len(meals), 500)
+        if shortfall > 0:
+            outside = np.flatnonzero(calorie_error > tolerance)
+            if len(outside) > shortfall:
+                outside = outside[np.argpartition(calorie_error[outside], shortfall - 1)[:shortfall]]
+            meals = np.concatenate([meals, outside])
+        
+        totals = serving_matrix[meals] @ pool_nutrients
+        macro_energy = totals[:, 1:] * np.array([4.0, 9.0, 4.0])
+        macro_share = macro_energy / np.maximum(macro_energy.sum(axis=1, keepdims=True), 1e-9)
+        target_share = np.array([self.macro_split['protein'], self.macro_split['fat'], self.macro_split['carbs']])
+        macro_error = np.abs(macro_share - target_share).sum(axis=1)
+        
+        within = calorie_error[meals] <= tolerance
+        score = calorie_error[meals] + 0.5 * macro_error
+        score[~within] += self.out_of_tolerance_penalty
+        return meals, totals, score, within
+    
+    def _plan_days(self, conditions: Tuple[str, ...], daily_calories: int, days: int, rng: np.random.Generator,
+                   tolerance: float, repeat_window: int) -> List[Dict]:
+        """
+        Build meal plans for consecutive days in one vectorized pass
+        
+        For each meal type, a pool is drawn from the highest ranked suitable
+        dishes and its best scoring meals are kept as index matrices. The random
+        perturbations used to choose between them are drawn for all days up
+        front, so each day only masks out meals that reuse a dish eaten earlier
+        that day or within the repeat window and takes the best of the rest.
+        Meals with dishes added beyond the suitable ones, or outside the
+        calorie tolerance, are kept as fallbacks for when every better meal
+        would repeat a dish; only if none is left is the window relaxed.
+        Meals outside the tolerance, and days holding one, are marked with
+        within_tolerance set to False.
+        
+        Args:
+            conditions (Tuple[str, ...]): Normalized conditions to plan for
             daily_calories (int): Target daily calorie intake
+            days (int): Number of days to plan
+            rng (np.random.Generator): Source of randomness for the plan
+            tolerance (float): Allowed relative deviation from each meal's calorie target
+            repeat_window (int): A dish eaten on one day is avoided for this many following days
             
         Returns:
-            Dict containing:
-            - description: Description of the diet plan
-            - meals: Dictionary of meal recommendations
-            - nutritional_summary: Summary of daily nutritional values
+            List[Dict]: One dict with meals, nutritional_summary,
+            within_tolerance and calorie_deviation per day
         """
-        try:
-            if not self.criteria or not self.meal_types:
-                raise ValueError("Disease recommender not properly initialized")
-                
-            if condition not in self.criteria:
-                raise ValueError(f"Unsupported condition: {condition}. Choose from: {list(self.criteria.keys())}")
+        suitable_foods = self.get_suitable_foods(conditions)
+        
+        # If suitable_foods is still empty, fallback to full dataset
+        if suitable_foods.empty:
+            st.warning(f"No foods available for {self._describe_conditions(conditions)}. Showing random foods.")
+            suitable_foods = self.df
+        
+        # The index is positional, since load_nutrition_data resets it
+        suitable = np.zeros(len(self.df), dtype=bool)
+        suitable[suitable_foods.index.to_numpy()] = True
+        padding = len(self.df)
+        
+        suitability = self._combined_suitability(conditions)
+        ranked = lambda positions: positions[np.argsort(-suitability[positions], kind='stable')]
+        
+        # Best meals per meal type as padded (meals, dishes) row and serving matrices
+        options = {}
+        for meal_type, proportion in self.meal_types.items():
+            of_type = self.meal_suitability[meal_type]
+            candidates = ranked(np.flatnonzero(suitable & of_type))
+            # Enough dishes for every meal to avoid those eaten within the repeat window
+            wanted = min(self.max_items_per_meal * len(self.meal_types) * (repeat_window + 1),
+                         self.candidate_pool_size)
+            shortfall = max(wanted, 2 * self.max_items_per_meal) - len(candidates)
+            if shortfall > 0:
+                # Too few suitable dishes of this meal type; add its best ranked other dishes,
+                # which the scores below only let into a meal to avoid a repeat
+                candidates = np.concatenate([candidates, ranked(np.flatnonzero(~suitable & of_type))[:shortfall]])
+                if len(candidates) == 0:
+                    candidates = np.flatnonzero(suitable)
             
-            # Get the criteria for the condition
-            criteria = self.criteria[condition]
+            # Draw the pool from the best ranked dishes, leaving room for variety
+            candidates = candidates[:2 * self.candidate_pool_size]
+            if len(candidates) > self.candidate_pool_size:
+                candidates = rng.choice(candidates, self.candidate_pool_size, replace=False)
             
-            # Initialize the diet plan
-            diet_plan = {
-                'description': criteria['description'],
+            meals, totals, score, within = self._score_meals(candidates, daily_calories * proportion, tolerance)
+            positions, servings, _ = self._get_combinations(len(candidates))
+            added = ~suitable[candidates]
+            if added.any():
+                score = score + self.unsuitable_penalty * np.append(added, False)[positions[meals]].sum(axis=1)
+            keep = np.argsort(score, kind='stable')[:self.plan_candidates]
+            options[meal_type] = (
+                np.append(candidates, padding)[positions[meals[keep]]],
+                servings[meals[keep]],
+                totals[keep],
+                score[keep],
+                within[keep]
+            )
+        
+        # Gumbel noise turns "take the lowest score" into sampling that favours low scores
+        noise = {
+            meal_type: rng.gumbel(size=(days, len(option[3]))) * self.plan_temperature
+            for meal_type, option in options.items()
+        }
+        
+        # Day each dish was last eaten; the extra slot belongs to the padding
+        last_eaten = np.full(len(self.df) + 1, -np.inf)
+        food_names = self.df['Food'].to_numpy()
+        
+        plans = []
+        for day in range(days):
+            day_plan = {
                 'meals': {},
                 'nutritional_summary': {
                     'calories': 0,
@@ -124,40 +421,79 @@ class DiseaseRecommender:
                     'carbs': 0
                 }
             }
-            
-            # Get suitable foods for the condition
-            suitable_foods = self.get_suitable_foods(condition)
-            
-            # Generate meal recommendations
-            for meal_type, proportion in self.meal_types.items():
-                meal_calories = daily_calories * proportion
+            for meal_type, (rows, servings, totals, score, within) in options.items():
+                # Prefer meals with the fewest dishes eaten earlier today or within the window
+                repeats = (last_eaten[rows] >= day - repeat_window).sum(axis=1)
+                choice = int(np.argmin(repeats * self.repeat_penalty + score - noise[meal_type][day]))
                 
-                # If suitable_foods is still empty, fallback to full dataset
-                if suitable_foods.empty:
-                    st.warning(f"No foods available for {condition}. Showing random foods.")
-                    meal_foods = self.df.sample(3)
-                else:
-                    meal_foods = suitable_foods.sample(min(3, len(suitable_foods)))
+                used = servings[choice] > 0
+                last_eaten[rows[choice][used]] = day
                 
                 # Calculate nutritional values
                 meal_nutrition = {
-                    'calories': meal_foods['Calories'].sum(),
-                    'protein': meal_foods['Protein'].sum(),
-                    'fat': meal_foods['Fat'].sum(),
-                    'carbs': meal_foods['Carbs'].sum()
+                    'calories': float(totals[choice][0]),
+                    'protein': float(totals[choice][1]),
+                    'fat': float(totals[choice][2]),
+                    'carbs': float(totals[choice][3])
                 }
                 
-                # Update the diet plan
-                diet_plan['meals'][meal_type] = {
-                    'foods': meal_foods['Food'].tolist(),
-                    'nutrition': meal_nutrition
+                day_plan['meals'][meal_type] = {
+                    'foods': food_names[rows[choice][used]].tolist(),
+                    'servings': servings[choice][used].tolist(),
+                    'target_calories': daily_calories * self.meal_types[meal_type],
+                    'nutrition': meal_nutrition,
+                    'within_tolerance': bool(within[choice])
                 }
                 
                 # Update the nutritional summary
                 for nutrient in ['calories', 'protein', 'fat', 'carbs']:
-                    diet_plan['nutritional_summary'][nutrient] += meal_nutrition[nutrient]
+                    day_plan['nutritional_summary'][nutrient] += meal_nutrition[nutrient]
+            day_plan['within_tolerance'] = all(meal['within_tolerance'] for meal in day_plan['meals'].values())
+            day_plan['calorie_deviation'] = day_plan['nutritional_summary']['calories'] - daily_calories
+            plans.append(day_plan)
+        return plans
+    
+    def get_diet_plan(self, conditions: Union[str, Iterable[str]], daily_calories: int = 2000,
+                      seed: Optional[int] = None, tolerance: float = 0.1) -> Dict:
+        """
+        Generate a diet plan for one or more conditions
+        
+        Each meal is optimized to land within `tolerance` of its share of the
+        daily calories while keeping close to the target macronutrient split.
+        Where no meal is within tolerance, the closest ones are used and the
+        plan is marked with within_tolerance set to False.
+        
+        Args:
+            conditions (str | Iterable[str]): A condition (e.g., 'diabetes') or several
+                conditions whose criteria must all be met (e.g., ['diabetes', 'hypertension'])
+            daily_calories (int): Target daily calorie intake
+            seed (int, optional): Random seed; the same seed gives the same plan
+            tolerance (float): Allowed relative deviation from each meal's calorie target
+            
+        Returns:
+            Dict containing:
+            - description: Description of the diet plan
+            - meals: Dictionary of meal recommendations
+            - nutritional_summary: Summary of daily nutritional values
+            - within_tolerance: Whether every meal is within tolerance
+            - calorie_deviation: Planned minus target daily calories
+            
+            On errors, including a daily_calories that is not positive, the
+            description holds the error and meals is empty.
+        """
+        try:
+            if not self.criteria or not self.meal_types:
+                raise ValueError("Disease recommender not properly initialized")
+            if daily_calories <= 0:
+                raise ValueError(f"daily_calories must be positive, got {daily_calories}")
             
-            return diet_plan
+            key = self._normalize_conditions(conditions)
+            rng = np.random.default_rng(seed)
+            day_plan = self._plan_days(key, daily_calories, 1, rng, tolerance, repeat_window=0)[0]
+            return {
+                'description': '; '.join(self.criteria[condition]['description'] for condition in key),
+                **day_plan
+            }
         except Exception as e:
             st.error(f"Error generating diet plan: {str(e)}")
             return {
@@ -171,36 +507,227 @@ class DiseaseRecommender:
                 }
             }
     
-    def get_suitable_foods(self, condition: str) -> pd.DataFrame:
+    def get_weekly_plan(self, conditions: Union[str, Iterable[str]], daily_calories: int = 2000, days: int = 7,
+                        seed: Optional[int] = None, tolerance: float = 0.1, repeat_window: int = 2) -> Dict:
         """
-        Get foods suitable for a specific condition
+        Generate a multi-day diet plan for one or more conditions
+        
+        Every meal is kept within `tolerance` of its calorie share where the
+        suitable dishes allow it, so each day's totals are too; otherwise the
+        closest meals are used and within_tolerance is False. Dishes only come
+        from those suited to the meal type and are not repeated within
+        `repeat_window` days while alternatives remain.
         
         Args:
-            condition (str): The condition (e.g., 'diabetes', 'heart_disease', etc.)
+            conditions (str | Iterable[str]): A condition (e.g., 'diabetes') or several
+                conditions whose criteria must all be met (e.g., ['diabetes', 'hypertension'])
+            daily_calories (int): Target daily calorie intake
+            days (int): Number of days to plan
+            seed (int, optional): Random seed; the same seed gives the same plan
+            tolerance (float): Allowed relative deviation from each meal's calorie target
+            repeat_window (int): Days after eating a dish before it may be repeated
             
         Returns:
-            pd.DataFrame: DataFrame containing suitable foods
+            Dict containing:
+            - description: Description of the diet plan
+            - days: List of daily plans, each with meals and nutritional_summary
+            - nutritional_summary: Average daily nutritional values
+            - within_tolerance: Whether every meal of every day is within tolerance
+            - calorie_deviation: Average planned minus target daily calories
+            
+            On errors, including a daily_calories or days that is not
+            positive, the description holds the error and days is empty.
         """
         try:
-            if not self.criteria:
+            if not self.criteria or not self.meal_types:
                 raise ValueError("Disease recommender not properly initialized")
-                
-            if condition not in self.criteria:
-                raise ValueError(f"Unsupported condition: {condition}")
+            if daily_calories <= 0:
+                raise ValueError(f"daily_calories must be positive, got {daily_calories}")
+            if days < 1:
+                raise ValueError(f"days must be at least 1, got {days}")
             
-            # Get the criteria for the condition
-            criteria = self.criteria[condition]
+            key = self._normalize_conditions(conditions)
+            rng = np.random.default_rng(seed)
+            plans = self._plan_days(key, daily_calories, days, rng, tolerance, repeat_window)
+            summary = {
+                nutrient: sum(plan['nutritional_summary'][nutrient] for plan in plans) / days
+                for nutrient in ['calories', 'protein', 'fat', 'carbs']
+            }
+            return {
+                'description': '; '.join(self.criteria[condition]['description'] for condition in key),
+                'days': plans,
+                'nutritional_summary': summary,
+                'within_tolerance': all(plan['within_tolerance'] for plan in plans),
+                'calorie_deviation': summary['calories'] - daily_calories
+            }
+        except Exception as e:
+            st.error(f"Error generating weekly plan: {str(e)}")
+            return {
+                'description': f"Error: {str(e)}",
+                'days': [],
+                'nutritional_summary': {
+                    'calories': 0,
+                    'protein': 0,
+                    'fat': 0,
+                    'carbs': 0
+                }
+            }
+    
+    def get_suitable_foods(self, conditions: Union[str, Iterable[str]]) -> pd.DataFrame:
+        """
+        Get foods suitable for one or more conditions
+        
+        A food is suitable when it meets the criteria of every condition. Foods
+        are ordered by their combined suitability score, and if fewer than
+        min_suitable_foods meet every criterion, the best ranked of the rest
+        are added after them.
+        
+        Args:
+            conditions (str | Iterable[str]): A condition (e.g., 'diabetes') or
+                several conditions (e.g., ['diabetes', 'hypertension'])
             
-            # Apply filters to the dataset
-            filtered_df = self.df.copy()
-            for nutrient, filter_func in criteria['filters'].items():
-                filtered_df = filtered_df[filtered_df[nutrient].apply(filter_func)]
+        Returns:
+            pd.DataFrame: DataFrame containing suitable foods. The frame is cached
+            and shared between callers, so treat it as read-only.
+        """
+        try:
+            if not self.criteria:
+                raise ValueError("Disease recommender not properly initialized")
             
-            # Fallback: If no foods match, use the full dataset and show a warning
-            if filtered_df.empty:
-                st.warning(f"No foods matched the strict criteria for {condition}. Showing a general selection.")
-                return self.df.copy()
-            return filtered_df
+            key = self._normalize_conditions(conditions)
+            if key not in self.suitable_foods:
+                self.suitable_foods[key] = self._match_conditions(key)
+            suitable_foods, strict_count = self.suitable_foods[key]
+            
+            if strict_count < len(suitable_foods):
+                st.warning(
+                    f"Only {strict_count} foods meet every criterion for {self._describe_conditions(key)}. "
+                    f"Added {len(suitable_foods) - strict_count} close matches that slightly exceed the limits."
+                )
+            return suitable_foods
         except Exception as e:
             st.error(f"Error getting suitable foods: {str(e)}")
-            return self.df.copy()  # Fallback to full dataset 
+            return self.df  # Fallback to full dataset
+    
+    def _match_conditions(self, conditions: Tuple[str, ...]) -> Tuple[pd.DataFrame, int]:
+        """
+        Intersect the condition bitsets and top up the result with ranked near-misses
+        
+        Args:
+            conditions (Tuple[str, ...]): Normalized conditions
+            
+        Returns:
+            Tuple[pd.DataFrame, int]: Suitable foods, strict matches first, and the
+            number of strict matches
+        """
+        bits = functools.reduce(np.bitwise_and, (self.bitsets[condition] for condition in conditions))
+        strict = np.flatnonzero(np.unpackbits(bits, count=len(self.df)))
+        suitability = self._combined_suitability(conditions)
+        strict = strict[np.argsort(-suitability[strict], kind='stable')]
+        
+        shortfall = self.min_suitable_foods - len(strict)
+        if shortfall <= 0:
+            return self.df.iloc[strict], len(strict)
+        
+        # Condiments are left out, since they only pass on tiny serving values
+        suitability[strict] = -np.inf
+        suitability[self.condiments] = -np.inf
+        closest = self._top_k(suitability, shortfall)
+        
+        return self.df.iloc[np.concatenate([strict, closest])], len(strict)
+    
+    def _combined_suitability(self, conditions: Tuple[str, ...]) -> np.ndarray:
+        """Suitability of every dish for all the given conditions at once (a new array)"""
+        return sum(self.suitability[condition] for condition in conditions)
+    
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """
+        Positions of the k highest finite scores, best first
+        
+        argpartition finds them in linear time, so only the k winners get sorted.
+        """
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return np.array([], dtype=np.int64)
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top], kind='stable')]
+    
+    def rank_foods(self, conditions: Union[str, Iterable[str]], page: int = 1, page_size: int = 20,
+                   calorie_range: Tuple[float, float] = None, near_misses: bool = False) -> Tuple[pd.DataFrame, int]:
+        """
+        Rank foods by how well they suit one or more conditions
+        
+        Only foods that meet every criterion of every condition are ranked. With
+        near_misses, the other foods are ranked instead, each with the limits it
+        misses; their Suitability is already lowered by violation_penalty per
+        unit of relative distance past each limit.
+        
+        Args:
+            conditions (str | Iterable[str]): A condition (e.g., 'diabetes') or several conditions
+            page (int): 1-based page of results
+            page_size (int): Number of foods per page
+            calorie_range (Tuple[float, float], optional): Only rank foods whose
+                calories per 100 g fall within (min, max)
+            near_misses (bool): Rank the foods that miss at least one criterion
+            
+        Returns:
+            Tuple[pd.DataFrame, int]: The page of foods, best first, with their
+            Suitability score (and, for near misses, a Misses column), and the
+            total number of ranked foods
+        """
+        try:
+            if not self.criteria:
+                raise ValueError("Disease recommender not properly initialized")
+            
+            key = self._normalize_conditions(conditions)
+            bits = functools.reduce(np.bitwise_and, (self.bitsets[condition] for condition in key))
+            meets_all = np.unpackbits(bits, count=len(self.df)).astype(bool)
+            suitability = self._combined_suitability(key)
+            suitability[self.condiments | (meets_all if near_misses else ~meets_all)] = -np.inf
+            if calorie_range is not None:
+                calories = self.nutrients[:, 0]
+                suitability[(calories < calorie_range[0]) | (calories > calorie_range[1])] = -np.inf
+            
+            total = int(np.isfinite(suitability).sum())
+            start = (max(page, 1) - 1) * page_size
+            ranked = self._top_k(suitability, start + page_size)[start:]
+            
+            foods = self.df.iloc[ranked].copy()
+            foods['Suitability'] = suitability[ranked].round(2)
+            if near_misses:
+                foods['Misses'] = self._describe_misses(key, ranked)
+            return foods, total
+        except Exception as e:
+            st.error(f"Error ranking foods: {str(e)}")
+            empty = self.df.head(0).assign(Suitability=0.0)
+            return (empty.assign(Misses='') if near_misses else empty), 0
+    
+    def _describe_misses(self, conditions: Tuple[str, ...], positions: np.ndarray) -> List[str]:
+        """The criteria each food misses, e.g. "Sugar 12.4 (Diabetes: < 5)", joined per food"""
+        misses = [[] for _ in positions]
+        for condition in conditions:
+            for nutrient, op, threshold in self.criteria[condition]['filters']:
+                values = self.df[nutrient].to_numpy(dtype=np.float64)[positions]
+                for i in np.flatnonzero(~_OPERATORS[op](values, threshold)):
+                    misses[i].append(f"{nutrient} {values[i]:.1f} ({self._describe_conditions(condition)}: {op} {threshold})")
+        return ['; '.join(food_misses) for food_misses in misses]
+    
+    def _normalize_conditions(self, conditions: Union[str, Iterable[str]]) -> Tuple[str, ...]:
+        """Turn a condition or collection of conditions into a sorted, validated tuple"""
+        if isinstance(conditions, str):
+            conditions = [conditions]
+        key = tuple(sorted(set(conditions)))
+        if not key:
+            raise ValueError("Select at least one condition")
+        for condition in key:
+            if condition not in self.criteria:
+                raise ValueError(f"Unsupported condition: {condition}. Choose from: {list(self.criteria.keys())}")
+        return key
+    
+    def _describe_conditions(self, conditions: Union[str, Iterable[str]]) -> str:
+        """Readable name for a condition or set of conditions, e.g. 'Diabetes + Hypertension'"""
+        if isinstance(conditions, str):
+            conditions = [conditions]
+        names = {'heart_disease': 'Heart Disease', 'pcos': 'PCOS'}
+        return ' + '.join(names.get(condition, condition.replace('_', ' ').title()) for condition in sorted(set(conditions)))
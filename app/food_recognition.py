@@ -1,20 +1,38 @@
 import torch
-import torchvision.transforms as transforms
+import torchvision
 from PIL import Image
 import numpy as np
 from nutrition_utils import load_nutrition_data
+from image_preprocessing import ImagePreprocessor
 import streamlit as st
 import warnings
 import re
 from difflib import SequenceMatcher
 import os
 from pathlib import Path
+from typing import List, Optional, Tuple
 
 # Suppress PyTorch warnings
 warnings.filterwarnings('ignore', category=UserWarning)
 
+def _report(level: str, text: str, messages: Optional[List[Tuple[str, str]]] = None):
+    """Show a message in the Streamlit UI at level ('info', 'warning' or 'error'), or collect it"""
+    if messages is None:
+        getattr(st, level)(text)
+    else:
+        messages.append((level, text))
+
 class FoodRecognizer:
-    def __init__(self):
+    def __init__(self, num_workers: int = 0, threads_per_worker: Optional[int] = None):
+        """
+        Initialize the food recognizer
+        
+        Args:
+            num_workers (int): Number of model-server processes to run inference in.
+                0 runs the model in this process.
+            threads_per_worker (int, optional): torch thread budget per model-server process
+        """
+        self.model_pool = None
         try:
             # Load the nutrition data
             self.df = load_nutrition_data()
@@ -23,13 +41,19 @@ class FoodRecognizer:
             self.model = torch.hub.load('pytorch/vision:v0.10.0', 'resnet50', pretrained=True)
             self.model.eval()
             
-            # Define image transformations
-            self.transform = transforms.Compose([
-                transforms.Resize(256),
-                transforms.CenterCrop(224),
-                transforms.ToTensor(),
-                transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]),
-            ])
+            # Optionally move inference into a pool of model-server processes
+            if num_workers > 0:
+                from model_server import ModelServerPool
+                self.model_pool = ModelServerPool(
+                    self.model,
+                    torchvision.models.resnet50,
+                    num_workers=num_workers,
+                    threads_per_worker=threads_per_worker
+                )
+            
+            # Resize, crop and normalize images into a reusable batch buffer
+            self.preprocess = ImagePreprocessor(resize=256, crop=224)
+            self.batch_size = 32
             
             # Load ImageNet labels
             self.labels = self._load_imagenet_labels()
@@ -126,36 +150,48 @@ class FoodRecognizer:
         
         try:
             # Load each image in the preset directory
+            images = {}
             for image_path in preset_dir.glob('*.jpg'):
                 food_name = image_path.stem  # Get filename without extension
                 try:
                     image = Image.open(image_path)
-                    # Get image features
-                    features = self._get_image_features(image)
+                    image.load()
+                    images[food_name] = image
+                except Exception as e:
+                    st.warning(f"Error loading preset image {food_name}: {str(e)}")
+            
+            # Get image features for all presets in one forward pass
+            if images:
+                features = self._infer(list(images.values()))
+                for (food_name, image), image_features in zip(images.items(), features):
                     preset_images[food_name] = {
                         'image': image,
-                        'features': features
+                        'features': image_features.unsqueeze(0)
                     }
-                except Exception as e:
-                    st.warning(f"Error loading preset image {food_name}: {str(e)}")
             
             return preset_images
         except Exception as e:
             st.error(f"Error loading preset images: {str(e)}")
             return {}
     
-    def _get_image_features(self, image: Image.Image) -> torch.Tensor:
+    def _infer(self, images: List[Image.Image]) -> torch.Tensor:
+        """Run the model on a list of images, in the model-server pool if there is one"""
+        if self.model_pool is not None:
+            return self.model_pool.predict(images, self.preprocess)
+        
+        outputs = []
+        for start in range(0, len(images), self.batch_size):
+            with torch.no_grad():
+                outputs.append(self.model(self.preprocess(images[start:start + self.batch_size])))
+        return torch.cat(outputs)
+    
+    def _get_image_features(self, image: Image.Image,
+                            messages: Optional[List[Tuple[str, str]]] = None) -> torch.Tensor:
         """Extract features from an image using the model"""
         try:
-            # Preprocess the image
-            img_tensor = self.transform(image).unsqueeze(0)
-            
-            # Get features
-            with torch.no_grad():
-                features = self.model(img_tensor)
-                return features
+            return self._infer([image])
         except Exception as e:
-            st.error(f"Error extracting features: {str(e)}")
+            _report('error', f"Error extracting features: {str(e)}", messages)
             return None
     
     def _compare_with_preset(self, image_features):
@@ -212,12 +248,86 @@ class FoodRecognizer:
         
         return best_match
     
-    def recognize_food(self, image: Image.Image) -> str:
+    def _match_outputs(self, outputs: torch.Tensor, verbose: bool = True,
+                       messages: Optional[List[Tuple[str, str]]] = None) -> Tuple[Optional[str], float]:
+        """
+        Map the model outputs for a single image to a food name
+        
+        The ResNet outputs double as the image features, so a single forward
+        pass serves both the preset comparison and the label matching.
+        
+        Args:
+            outputs (torch.Tensor): Model outputs for one image
+            verbose (bool): Whether to report progress in the Streamlit UI
+            messages (list, optional): Collects the (level, text) reports instead of
+                showing them, e.g. to show them again when the result is reused
+            
+        Returns:
+            Tuple[Optional[str], float]: Recognized food name (or None) and its confidence
+        """
+        # First try to match with preset images
+        if self.preset_images:
+            preset_match, similarity = self._compare_with_preset(outputs)
+            if preset_match:
+                return preset_match, similarity
+        
+        # If no preset match, fall back to the original recognition method
+        probabilities = torch.nn.functional.softmax(outputs.flatten(), dim=0)
+        
+        # Get top 10 predictions
+        top10_prob, top10_catid = torch.topk(probabilities, 10)
+        
+        # Set confidence threshold
+        CONFIDENCE_THRESHOLD = 0.2  # Lowered threshold for better matching
+        
+        # Try to match each prediction
+        for prob, catid in zip(top10_prob, top10_catid):
+            predicted_label = self.labels[catid.item()]
+            cleaned_label = self._clean_text(predicted_label)
+            confidence = prob.item()
+            
+            # Skip if confidence is too low
+            if confidence < CONFIDENCE_THRESHOLD:
+                continue
+            
+            # First, try to match with our specific food items
+            for food_name, variations in self.food_mapping.items():
+                for variation in variations:
+                    if variation in cleaned_label:
+                        if verbose:
+                            _report('info', f"Recognized as {food_name} (confidence: {confidence:.2f})", messages)
+                        return food_name, confidence
+            
+            # If no direct match, try similarity matching with higher threshold
+            best_match = self._find_best_match(cleaned_label, threshold=0.6)  # Lowered threshold
+            if best_match:
+                food_name = self.reverse_mapping[best_match]
+                if verbose:
+                    _report('info', f"Recognized as {food_name} (confidence: {confidence:.2f})", messages)
+                return food_name, confidence
+        
+        if verbose:
+            # If still no match, try to find any food-related words
+            food_related_words = ['food', 'dish', 'meal', 'cuisine', 'cooking', 'recipe', 'eat', 'dining', 'indian', 'spice', 'vegetable', 'rice', 'bread', 'sweet', 'snack']
+            for prob, catid in zip(top10_prob, top10_catid):
+                predicted_label = self.labels[catid.item()]
+                cleaned_label = self._clean_text(predicted_label)
+                
+                if any(word in cleaned_label for word in food_related_words):
+                    _report('warning', "Detected food in the image but couldn't identify the specific dish. Please try another image or use the text input.", messages)
+                    return None, 0.0
+            
+            _report('warning', "Could not recognize the food in the image. Please try another image or use the text input.", messages)
+        return None, 0.0
+    
+    def recognize_food(self, image: Image.Image, messages: Optional[List[Tuple[str, str]]] = None) -> str:
         """
         Recognize food from an image
         
         Args:
             image (PIL.Image): Input image
+            messages (list, optional): Collects the (level, text) reports for the
+                Streamlit UI instead of showing them
             
         Returns:
             str: Recognized food name or None if not recognized
@@ -226,67 +336,36 @@ class FoodRecognizer:
             return None
             
         try:
-            # First try to match with preset images
-            if self.preset_images:
-                preset_match, _ = self._compare_with_preset(self._get_image_features(image))
-                if preset_match:
-                    return preset_match
-            
-            # If no preset match, fall back to the original recognition method
-            # Preprocess the image
-            img_tensor = self.transform(image).unsqueeze(0)
-            
             # Get predictions
-            with torch.no_grad():
-                outputs = self.model(img_tensor)
-                probabilities = torch.nn.functional.softmax(outputs[0], dim=0)
-                
-                # Get top 10 predictions
-                top10_prob, top10_catid = torch.topk(probabilities, 10)
-                
-                # Set confidence threshold
-                CONFIDENCE_THRESHOLD = 0.2  # Lowered threshold for better matching
-                
-                # Try to match each prediction
-                for prob, catid in zip(top10_prob, top10_catid):
-                    predicted_label = self.labels[catid.item()]
-                    cleaned_label = self._clean_text(predicted_label)
-                    confidence = prob.item()
-                    
-                    # Skip if confidence is too low
-                    if confidence < CONFIDENCE_THRESHOLD:
-                        continue
-                    
-                    # First, try to match with our specific food items
-                    for food_name, variations in self.food_mapping.items():
-                        for variation in variations:
-                            if variation in cleaned_label:
-                                st.info(f"Recognized as {food_name} (confidence: {confidence:.2f})")
-                                return food_name
-                    
-                    # If no direct match, try similarity matching with higher threshold
-                    best_match = self._find_best_match(cleaned_label, threshold=0.6)  # Lowered threshold
-                    if best_match:
-                        food_name = self.reverse_mapping[best_match]
-                        st.info(f"Recognized as {food_name} (confidence: {confidence:.2f})")
-                        return food_name
-                
-                # If still no match, try to find any food-related words
-                food_related_words = ['food', 'dish', 'meal', 'cuisine', 'cooking', 'recipe', 'eat', 'dining', 'indian', 'spice', 'vegetable', 'rice', 'bread', 'sweet', 'snack']
-                for prob, catid in zip(top10_prob, top10_catid):
-                    predicted_label = self.labels[catid.item()]
-                    cleaned_label = self._clean_text(predicted_label)
-                    
-                    if any(word in cleaned_label for word in food_related_words):
-                        st.warning("Detected food in the image but couldn't identify the specific dish. Please try another image or use the text input.")
-                        return None
+            outputs = self._get_image_features(image, messages)
+            if outputs is None:
+                return None
             
-            st.warning("Could not recognize the food in the image. Please try another image or use the text input.")
-            return None
+            food_name, _ = self._match_outputs(outputs[0], messages=messages)
+            return food_name
         except Exception as e:
-            st.error(f"Error recognizing food: {str(e)}")
+            _report('error', f"Error recognizing food: {str(e)}", messages)
             return None
     
+    def recognize_batch(self, images: List[Image.Image]) -> List[Tuple[Optional[str], float]]:
+        """
+        Recognize food in several images with a single forward pass
+        
+        Unlike recognize_food, this does not report to the Streamlit UI, which
+        makes it suitable for video streams and batch jobs.
+        
+        Args:
+            images (List[PIL.Image]): Input images
+            
+        Returns:
+            List[Tuple[Optional[str], float]]: Food name (or None) and confidence per image
+        """
+        if self.model is None or not images:
+            return [(None, 0.0) for _ in images]
+        
+        outputs = self._infer(images)
+        return [self._match_outputs(row, verbose=False) for row in outputs]
+    
     def get_nutrition_info(self, food_name: str) -> dict:
         """
         Get nutrition information for a recognized food
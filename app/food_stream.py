@@ -0,0 +1,211 @@
+import argparse
+import json
+import sys
+import time
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+try:
+    import cv2
+except ImportError:  # OpenCV is only needed to read video files and devices
+    cv2 = None
+
+
+def difference_hash(image: Image.Image, hash_size: int = 8) -> int:
+    """
+    Compute a difference hash (dHash) of an image
+
+    The image is shrunk to a (hash_size + 1) x hash_size grayscale thumbnail and
+    each bit records whether a pixel is brighter than its right neighbour. Frames
+    that look alike end up a small Hamming distance apart.
+
+    Args:
+        image (PIL.Image): Input image
+        hash_size (int): Number of rows (and bits per row) in the hash
+
+    Returns:
+        int: The hash packed into an integer
+    """
+    thumbnail = image.convert('L').resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR)
+    pixels = np.asarray(thumbnail, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes"""
+    return bin(a ^ b).count('1')
+
+
+def iter_video_frames(source: Union[str, int], stride: int = 1) -> Iterator[Tuple[int, float, Image.Image]]:
+    """
+    Read frames from a video file or capture device
+
+    Args:
+        source (str | int): Path to a video file, stream URL or device index
+        stride (int): Only decode every `stride`-th frame
+
+    Yields:
+        Tuple[int, float, PIL.Image]: Frame index, timestamp in seconds and the RGB frame
+    """
+    if cv2 is None:
+        raise ImportError("OpenCV is required for video input. Install it with: pip install opencv-python-headless")
+
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise ValueError(f"Could not open video source: {source}")
+
+    is_device = isinstance(source, int)
+    start = time.monotonic()
+    frame_index = 0
+    try:
+        while True:
+            # grab() skips the decode step for frames we are not going to use
+            if not capture.grab():
+                break
+            if frame_index % stride == 0:
+                ok, frame = capture.retrieve()
+                if not ok:
+                    break
+                if is_device:
+                    timestamp = time.monotonic() - start
+                else:
+                    timestamp = capture.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                yield frame_index, timestamp, Image.fromarray(frame)
+            frame_index += 1
+    finally:
+        capture.release()
+
+
+class FoodStreamRecognizer:
+    def __init__(self, recognizer, batch_size: int = 8, hash_threshold: int = 6,
+                 smoothing_window: int = 5, max_batch_delay: float = 0.5):
+        """
+        Run food recognition over a stream of frames
+
+        Args:
+            recognizer (FoodRecognizer): Recognizer used for inference and nutrition lookup
+            batch_size (int): Maximum number of frames per forward pass
+            hash_threshold (int): Frames within this Hamming distance of the last
+                analysed frame are treated as duplicates and skipped
+            smoothing_window (int): Number of recent analysed frames whose
+                predictions are used for smoothing; skipped duplicates don't count
+            max_batch_delay (float): Flush a partial batch once its oldest frame is
+                this many seconds old, so live feeds don't wait for a full batch
+        """
+        self.recognizer = recognizer
+        self.batch_size = batch_size
+        self.hash_threshold = hash_threshold
+        self.smoothing_window = smoothing_window
+        self.max_batch_delay = max_batch_delay
+        self._nutrition_cache = {}
+        self.stats = {'frames': 0, 'skipped': 0, 'analysed': 0, 'batches': 0}
+
+    def _get_nutrition(self, food_name: Optional[str]) -> Optional[Dict]:
+        """Look up nutrition information once per dish"""
+        if food_name is None:
+            return None
+        if food_name not in self._nutrition_cache:
+            self._nutrition_cache[food_name] = self.recognizer.get_nutrition_info(food_name)
+        return self._nutrition_cache[food_name]
+
+    def process(self, frames: Iterable[Tuple[int, float, Image.Image]]) -> Iterator[Dict]:
+        """
+        Recognize food in a frame stream and report dish changes
+
+        Args:
+            frames: Iterable of (frame_index, timestamp, image) tuples, e.g. from iter_video_frames
+
+        Yields:
+            Dict: Dish-change event with frame_index, timestamp, food, previous_food,
+            confidence and nutrition
+        """
+        last_hash = None
+        # Frames waiting for the next forward pass; skipped duplicates never
+        # join, as they would only repeat the prediction they duplicate
+        pending: List[Tuple[int, float, Image.Image]] = []
+        history = deque(maxlen=self.smoothing_window)
+        current_food = None
+
+        def flush():
+            nonlocal current_food
+            predictions = self.recognizer.recognize_batch([frame for _, _, frame in pending])
+            self.stats['batches'] += 1
+            self.stats['analysed'] += len(pending)
+
+            events = []
+            for (frame_index, timestamp, _), prediction in zip(pending, predictions):
+                history.append(prediction)
+
+                # Confidence-weighted vote over the recent predictions
+                votes = {}
+                for name, score in history:
+                    votes[name] = votes.get(name, 0.0) + max(score, 1e-6)
+                stable_food = max(votes, key=votes.get)
+
+                if stable_food != current_food:
+                    events.append({
+                        'frame_index': frame_index,
+                        'timestamp': timestamp,
+                        'food': stable_food,
+                        'previous_food': current_food,
+                        'confidence': votes[stable_food] / len(history),
+                        'nutrition': self._get_nutrition(stable_food)
+                    })
+                    current_food = stable_food
+            pending.clear()
+            return events
+
+        for frame_index, timestamp, frame in frames:
+            self.stats['frames'] += 1
+
+            # Skip inference for near-duplicates of the last analysed frame
+            frame_hash = difference_hash(frame)
+            if last_hash is not None and hamming_distance(frame_hash, last_hash) <= self.hash_threshold:
+                self.stats['skipped'] += 1
+            else:
+                last_hash = frame_hash
+                pending.append((frame_index, timestamp, frame))
+
+            if pending and (len(pending) >= self.batch_size or timestamp - pending[0][1] >= self.max_batch_delay):
+                yield from flush()
+
+        if pending:
+            yield from flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recognize food in a video file or camera feed")
+    parser.add_argument('source', help="Video file path, stream URL or camera index")
+    parser.add_argument('--stride', type=int, default=1, help="Only decode every n-th frame")
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--hash-threshold', type=int, default=6)
+    parser.add_argument('--window', type=int, default=5, help="Smoothing window in analysed frames")
+    args = parser.parse_args()
+
+    from food_recognition import FoodRecognizer
+
+    source = int(args.source) if args.source.isdigit() else args.source
+    stream = FoodStreamRecognizer(
+        FoodRecognizer(),
+        batch_size=args.batch_size,
+        hash_threshold=args.hash_threshold,
+        smoothing_window=args.window
+    )
+
+    start = time.monotonic()
+    for event in stream.process(iter_video_frames(source, stride=args.stride)):
+        print(json.dumps(event, default=float), flush=True)
+
+    elapsed = max(time.monotonic() - start, 1e-9)
+    stats = stream.stats
+    print(f"{stats['frames']} frames ({stats['skipped']} skipped, {stats['analysed']} analysed "
+          f"in {stats['batches']} batches) at {stats['frames'] / elapsed:.1f} fps", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
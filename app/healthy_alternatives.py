@@ -1,13 +1,22 @@
-from typing import Dict, List, Tuple
+import re
+import numpy as np
+import pandas as pd
+import streamlit as st
+from sklearn.neighbors import KDTree
+from nutrition_utils import load_nutrition_data
+from ingredient_nutrition import NUTRIENTS, load_ingredient_nutrition
+from typing import Dict, List, Optional, Tuple
 
 class HealthyAlternatives:
     def __init__(self):
-        # Define common fast food items and their healthier alternatives
+        # Define common fast food items and their healthier alternatives, with
+        # the grams of each ingredient in one serving
         self.alternatives = {
             'samosa': [
                 {
                     'name': 'Baked Vegetable Pockets',
                     'ingredients': ['Whole wheat flour', 'Mixed vegetables', 'Low-fat paneer', 'Herbs'],
+                    'quantities': [50, 100, 40, 5],
                     'benefits': [
                         'Lower in calories and fat due to baking instead of deep frying',
                         'Higher in fiber and protein',
@@ -17,6 +26,7 @@ class HealthyAlternatives:
                 {
                     'name': 'Sprouted Moong Chaat',
                     'ingredients': ['Sprouted moong beans', 'Cucumber', 'Tomato', 'Lemon juice', 'Mint chutney'],
+                    'quantities': [100, 50, 50, 10, 15],
                     'benefits': [
                         'Rich in plant-based protein and fiber',
                         'Low in calories and fat',
@@ -28,6 +38,7 @@ class HealthyAlternatives:
                 {
                     'name': 'Multigrain Pav with Vegetable Mash',
                     'ingredients': ['Multigrain bread', 'Mixed vegetables', 'Low-fat butter', 'Herbs'],
+                    'quantities': [80, 200, 10, 5],
                     'benefits': [
                         'Higher in fiber and complex carbohydrates',
                         'Lower in refined flour and fat',
@@ -37,6 +48,7 @@ class HealthyAlternatives:
                 {
                     'name': 'Quinoa Vegetable Bowl',
                     'ingredients': ['Quinoa', 'Mixed vegetables', 'Low-fat yogurt', 'Herbs'],
+                    'quantities': [60, 150, 80, 5],
                     'benefits': [
                         'Complete protein source',
                         'Rich in fiber and essential nutrients',
@@ -48,6 +60,7 @@ class HealthyAlternatives:
                 {
                     'name': 'Grilled Paneer Sandwich',
                     'ingredients': ['Multigrain bread', 'Grilled paneer', 'Mint chutney', 'Vegetables'],
+                    'quantities': [60, 60, 15, 60],
                     'benefits': [
                         'Higher in protein and lower in carbs',
                         'Contains healthy fats from paneer',
@@ -57,6 +70,7 @@ class HealthyAlternatives:
                 {
                     'name': 'Sprouted Moong Tikki Burger',
                     'ingredients': ['Sprouted moong patty', 'Whole wheat bun', 'Vegetables', 'Mint chutney'],
+                    'quantities': [80, 60, 50, 15],
                     'benefits': [
                         'High in plant-based protein',
                         'Rich in fiber and essential amino acids',
@@ -68,6 +82,7 @@ class HealthyAlternatives:
                 {
                     'name': 'Millet Dosa',
                     'ingredients': ['Foxtail millet', 'Urad dal', 'Vegetables', 'Coconut chutney'],
+                    'quantities': [50, 20, 50, 30],
                     'benefits': [
                         'Higher in protein and fiber',
                         'Rich in essential minerals',
@@ -77,6 +92,7 @@ class HealthyAlternatives:
                 {
                     'name': 'Quinoa Dosa',
                     'ingredients': ['Quinoa', 'Urad dal', 'Vegetables', 'Mint chutney'],
+                    'quantities': [50, 20, 50, 20],
                     'benefits': [
                         'Complete protein source',
                         'Rich in fiber and antioxidants',
@@ -88,6 +104,7 @@ class HealthyAlternatives:
                 {
                     'name': 'Multigrain Roti with Vegetable Curry',
                     'ingredients': ['Multigrain flour', 'Mixed vegetables', 'Low-fat yogurt', 'Herbs'],
+                    'quantities': [60, 150, 50, 5],
                     'benefits': [
                         'Lower in refined flour and oil',
                         'Higher in fiber and protein',
@@ -97,6 +114,7 @@ class HealthyAlternatives:
                 {
                     'name': 'Quinoa Upma with Vegetables',
                     'ingredients': ['Quinoa', 'Mixed vegetables', 'Herbs', 'Lemon juice'],
+                    'quantities': [60, 100, 5, 10],
                     'benefits': [
                         'Complete protein source',
                         'Rich in fiber and essential nutrients',
@@ -108,6 +126,7 @@ class HealthyAlternatives:
                 {
                     'name': 'Sprouted Chana Chaat',
                     'ingredients': ['Sprouted chana', 'Cucumber', 'Tomato', 'Lemon juice', 'Herbs'],
+                    'quantities': [100, 50, 50, 10, 5],
                     'benefits': [
                         'Higher in protein and fiber',
                         'Lower in refined flour and oil',
@@ -117,6 +136,7 @@ class HealthyAlternatives:
                 {
                     'name': 'Quinoa Bhel',
                     'ingredients': ['Quinoa', 'Vegetables', 'Lemon juice', 'Herbs', 'Roasted peanuts'],
+                    'quantities': [40, 80, 10, 5, 10],
                     'benefits': [
                         'Complete protein source',
                         'Rich in fiber and healthy fats',
@@ -128,6 +148,7 @@ class HealthyAlternatives:
                 {
                     'name': 'Baked Vegetable Fritters',
                     'ingredients': ['Mixed vegetables', 'Besan', 'Herbs', 'Olive oil'],
+                    'quantities': [100, 30, 5, 5],
                     'benefits': [
                         'Lower in calories and fat',
                         'Higher in fiber and protein',
@@ -137,6 +158,7 @@ class HealthyAlternatives:
                 {
                     'name': 'Roasted Chana',
                     'ingredients': ['Roasted chana', 'Herbs', 'Lemon juice'],
+                    'quantities': [40, 3, 5],
                     'benefits': [
                         'High in plant-based protein',
                         'Rich in fiber and minerals',
@@ -148,6 +170,7 @@ class HealthyAlternatives:
                 {
                     'name': 'Grilled Paneer with Vegetables',
                     'ingredients': ['Low-fat paneer', 'Bell peppers', 'Onion', 'Herbs', 'Olive oil'],
+                    'quantities': [120, 60, 40, 5, 5],
                     'benefits': [
                         'Lower in calories and fat',
                         'Higher in protein and fiber',
@@ -157,6 +180,7 @@ class HealthyAlternatives:
                 {
                     'name': 'Tofu Tikka',
                     'ingredients': ['Tofu', 'Vegetables', 'Herbs', 'Olive oil'],
+                    'quantities': [150, 60, 5, 5],
                     'benefits': [
                         'Lower in saturated fat',
                         'Rich in plant-based protein',
@@ -168,6 +192,7 @@ class HealthyAlternatives:
                 {
                     'name': 'Sweet Potato Tikki',
                     'ingredients': ['Sweet potato', 'Herbs', 'Olive oil'],
+                    'quantities': [150, 5, 5],
                     'benefits': [
                         'Lower glycemic index',
                         'Higher in fiber and vitamins',
@@ -177,6 +202,7 @@ class HealthyAlternatives:
                 {
                     'name': 'Moong Dal Tikki',
                     'ingredients': ['Moong dal', 'Vegetables', 'Herbs', 'Olive oil'],
+                    'quantities': [40, 60, 5, 5],
                     'benefits': [
                         'High in plant-based protein',
                         'Rich in fiber and minerals',
@@ -188,6 +214,7 @@ class HealthyAlternatives:
                 {
                     'name': 'Multigrain Vegetable Pizza',
                     'ingredients': ['Multigrain base', 'Low-fat cheese', 'Vegetables', 'Herbs'],
+                    'quantities': [100, 40, 80, 3],
                     'benefits': [
                         'Higher in fiber and protein',
                         'Lower in refined flour and fat',
@@ -197,6 +224,7 @@ class HealthyAlternatives:
                 {
                     'name': 'Quinoa Pizza Bowl',
                     'ingredients': ['Quinoa', 'Vegetables', 'Low-fat cheese', 'Herbs'],
+                    'quantities': [60, 100, 30, 3],
                     'benefits': [
                         'Complete protein source',
                         'Rich in fiber and nutrients',
@@ -205,18 +233,232 @@ class HealthyAlternatives:
                 }
             ]
         }
+        
+        # Typical recipes of the fast foods themselves, in grams per serving
+        self.original_recipes = {
+            'samosa': {'Refined flour': 50, 'Potato': 100, 'Green peas': 15, 'Vegetable oil': 25, 'Spices': 3},
+            'pav bhaji': {'White bread': 80, 'Butter': 20, 'Potato': 100, 'Mixed vegetables': 80,
+                          'Tomato': 50, 'Onion': 30, 'Spices': 5},
+            'vada pav': {'White bread': 60, 'Potato': 100, 'Besan': 25, 'Vegetable oil': 15,
+                         'Mint chutney': 10, 'Spices': 3},
+            'dosa': {'Rice': 60, 'Urad dal': 20, 'Vegetable oil': 10, 'Potato': 80, 'Onion': 20,
+                     'Coconut chutney': 30},
+            'puri bhaji': {'Whole wheat flour': 60, 'Vegetable oil': 25, 'Potato': 120, 'Onion': 20, 'Spices': 3},
+            'bhel puri': {'Puffed rice': 40, 'Sev': 20, 'Onion': 20, 'Tomato': 20, 'Potato': 30,
+                          'Tamarind chutney': 20, 'Mint chutney': 10},
+            'pakora': {'Besan': 40, 'Onion': 60, 'Potato': 30, 'Vegetable oil': 25, 'Spices': 3},
+            'paneer tikka': {'Paneer': 150, 'Yogurt': 30, 'Bell peppers': 40, 'Onion': 30,
+                             'Vegetable oil': 10, 'Spices': 5},
+            'aloo tikki': {'Potato': 150, 'Green peas': 20, 'Refined flour': 10, 'Vegetable oil': 20,
+                           'Tamarind chutney': 20, 'Spices': 3},
+            'pizza': {'Pizza base': 120, 'Cheese': 60, 'Tomato': 30, 'Bell peppers': 20, 'Onion': 20,
+                      'Olive oil': 5}
+        }
+        
+        # Nutrients used to find similar dishes, and which way is healthier for
+        # each (-1: less is better, 1: more is better, 0: only used for similarity)
+        self.features = ['Calories', 'Protein', 'Fat', 'Carbs', 'Sugar', 'Fibre', 'Sodium']
+        self.direction = np.array([-1, 1, -1, 0, -1, 1, 0])
+        
+        # An alternative may be this many standard deviations worse on a nutrient
+        # and still count as no worse, so rounding noise doesn't rule dishes out
+        self.dominance_slack = 0.05
+        # Upper bound on neighbours examined per query while looking for healthier dishes
+        self.max_candidates = 1000
+        
+        try:
+            self.df = load_nutrition_data()
+            self._build_index()
+        except Exception as e:
+            st.error(f"Error building healthier alternatives index: {str(e)}")
+            self.df = None
+            self.tree = None
+        
+        self.original_nutrition = {}
+        try:
+            self._compute_curated_nutrition()
+        except Exception as e:
+            st.error(f"Error computing nutrition of curated alternatives: {str(e)}")
+    
+    def _compute_curated_nutrition(self):
+        """
+        Compute per-serving nutrition of every curated alternative and original dish
+        
+        All recipes go through one sparse product with the ingredient nutrition
+        table, and the results are stored on the alternatives, so comparisons
+        need no lookups at query time.
+        """
+        alternatives = [alt for alts in self.alternatives.values() for alt in alts]
+        recipes = [dict(zip(alt['ingredients'], alt['quantities'])) for alt in alternatives]
+        recipes += list(self.original_recipes.values())
+        totals = load_ingredient_nutrition().compute(recipes)[NUTRIENTS].round(2).to_dict('records')
+        
+        for alt, nutrition in zip(alternatives, totals):
+            alt.update(nutrition, basis='per serving')
+        for food, nutrition in zip(self.original_recipes, totals[len(alternatives):]):
+            self.original_nutrition[food] = {'name': food.title(), **nutrition, 'basis': 'per serving'}
     
-    def get_alternatives(self, food_item: str) -> List[Dict]:
+    def _build_index(self):
         """
-        Get healthier alternatives for a given fast food item
+        Standardize the catalog's nutrient vectors once and index them in a KD-tree
+        
+        Nearest-neighbour queries then take roughly logarithmic time in the
+        catalog size instead of a scan over every dish.
+        """
+        values = self.df[self.features].to_numpy(dtype=np.float64)
+        std = values.std(axis=0)
+        std[std == 0] = 1.0
+        self.values = values
+        self.vectors = (values - values.mean(axis=0)) / std
+        self.tree = KDTree(self.vectors)
+        
+        self.names = self.df['Food'].to_numpy()
+        self.lower_names = self.df['Food'].str.lower().str.strip()
+        self.lower_name_array = self.lower_names.to_numpy()
+        self.name_index = {}
+        for position, name in enumerate(self.lower_names):
+            self.name_index.setdefault(name, position)
+    
+    def _find_food(self, food_item: str) -> Optional[int]:
+        """Position of a dish in the catalog: an exact name match, else the shortest name containing it"""
+        query = food_item.lower().strip()
+        if query in self.name_index:
+            return self.name_index[query]
+        
+        matches = self.lower_names[self.lower_names.str.contains(query, regex=False)]
+        if matches.empty:
+            return None
+        return int(matches.str.len().idxmin())
+    
+    def _describe_benefits(self, original: int, alternative: int) -> List[str]:
+        """Readable differences between a dish and its alternative"""
+        benefits = []
+        for feature, direction, before, after in zip(self.features, self.direction,
+                                                     self.values[original], self.values[alternative]):
+            change = (after - before) * direction
+            if direction == 0 or change <= 0:
+                continue
+            unit = 'kcal' if feature == 'Calories' else 'g'
+            word = 'more' if direction > 0 else 'fewer' if feature == 'Calories' else 'less'
+            if before > 0:
+                benefits.append(f"{change / before:.0%} {word} {feature.lower()} ({before:.1f} → {after:.1f} {unit})")
+            else:
+                benefits.append(f"{change:.1f} {unit} {word} {feature.lower()}")
+        return benefits
+    
+    def find_alternatives(self, food_item: str, k: int = 5) -> List[Dict]:
+        """
+        Find the most similar catalog dishes that are healthier than a given dish
+        
+        A candidate is healthier when it is no worse on calories, fat, sugar,
+        protein and fibre and better on at least one of them. Neighbours are
+        fetched nearest first in growing batches until k healthier dishes are
+        found or max_candidates have been examined.
         
         Args:
-            food_item (str): Name of the fast food item
+            food_item (str): Name of a dish in the nutrition catalog
+            k (int): Maximum number of alternatives
+            
+        Returns:
+            List[Dict]: Alternatives, most similar first, with their name,
+            nutrients per 100 g, distance and benefits
+        """
+        if self.tree is None:
+            return []
+        
+        position = self._find_food(food_item)
+        if position is None:
+            return []
+        
+        query = self.vectors[position]
+        limit = min(len(self.vectors), self.max_candidates)
+        fetch = min(limit, 8 * k)
+        while True:
+            distances, indices = self.tree.query(query[np.newaxis], k=fetch)
+            distances, indices = distances[0], indices[0]
+            
+            improvement = (self.vectors[indices] - query) * self.direction
+            healthier = (
+                (improvement >= -self.dominance_slack).all(axis=1)
+                & (improvement > self.dominance_slack).any(axis=1)
+                & (self.lower_name_array[indices] != self.lower_name_array[position])
+            )
+            if healthier.sum() >= k or fetch >= limit:
+                break
+            fetch = min(limit, fetch * 4)
+        
+        alternatives = []
+        for distance, index in zip(distances[healthier][:k], indices[healthier][:k]):
+            alternatives.append({
+                'name': self.names[index],
+                **{feature: round(float(value), 2) for feature, value in zip(self.features, self.values[index])},
+                'basis': 'per 100 g',
+                'distance': round(float(distance), 3),
+                'benefits': self._describe_benefits(position, index)
+            })
+        return alternatives
+    
+    def get_alternatives(self, food_item: str, k: int = 5) -> List[Dict]:
+        """
+        Get healthier alternatives for a given food item
+        
+        Hand-picked alternatives for common fast foods come first, followed by
+        the most similar healthier dishes from the nutrition catalog.
+        
+        Args:
+            food_item (str): Name of the food item
+            k (int): Maximum number of catalog alternatives
             
         Returns:
             List[Dict]: List of healthier alternatives with their benefits
         """
-        return self.alternatives.get(food_item.lower(), [])
+        # Curated picks also apply to dishes such as "vegetable samosa"
+        key = self._curated_key(food_item)
+        curated = self.alternatives[key] if key is not None else []
+        return curated + self.find_alternatives(food_item, k)
+    
+    def _curated_key(self, food_item: str) -> Optional[str]:
+        """Curated fast food matching a food item, exactly or as whole words of its name"""
+        query = food_item.lower().strip()
+        if query in self.alternatives:
+            return query
+        return next((name for name in self.alternatives if re.search(rf'\b{re.escape(name)}\b', query)), None)
+    
+    def get_comparison(self, food_item: str, k: int = 5) -> pd.DataFrame:
+        """
+        Get a food item and its healthier alternatives side by side
+        
+        Curated alternatives are compared with the fast food's typical recipe
+        per serving, and catalog alternatives with the catalog dish per 100 g.
+        
+        Args:
+            food_item (str): Name of the food item
+            k (int): Maximum number of catalog alternatives
+            
+        Returns:
+            pd.DataFrame: One row per dish with name, role ('original' or
+            'alternative'), basis, nutrients, ingredients and benefits
+        """
+        rows = []
+        key = self._curated_key(food_item)
+        if key is not None and key in self.original_nutrition:
+            rows.append({**self.original_nutrition[key], 'role': 'original'})
+        if key is not None:
+            rows.extend({**alt, 'role': 'alternative'} for alt in self.alternatives[key])
+        
+        catalog_alternatives = self.find_alternatives(food_item, k)
+        if catalog_alternatives:
+            position = self._find_food(food_item)
+            rows.append({
+                'name': self.names[position],
+                **{feature: round(float(value), 2) for feature, value in zip(self.features, self.values[position])},
+                'basis': 'per 100 g',
+                'role': 'original'
+            })
+            rows.extend({**alt, 'role': 'alternative'} for alt in catalog_alternatives)
+        
+        columns = ['name', 'role', 'basis'] + NUTRIENTS + ['ingredients', 'benefits']
+        return pd.DataFrame(rows).reindex(columns=columns)
     
     def get_all_food_items(self) -> List[str]:
         """
@@ -0,0 +1,331 @@
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import sys
+import tarfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from PIL import Image
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp')
+
+
+def iter_images(source: str) -> Iterator[Tuple[str, Union[str, bytes]]]:
+    """
+    List the images in a directory (recursively) or a tar archive
+
+    Directories are walked in sorted order, so reruns see the images in the
+    same order. Tar archives, compressed or not, are read as a stream, one
+    member at a time.
+
+    Args:
+        source (str): Directory or .tar / .tar.gz / .tgz path
+
+    Yields:
+        Tuple[str, str | bytes]: Image id (its relative path) and the file path
+        for directories, or the file contents for archives
+    """
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    path = os.path.join(root, name)
+                    yield os.path.relpath(path, source), path
+    elif os.path.isfile(source) and tarfile.is_tarfile(source):
+        with tarfile.open(source, 'r|*') as archive:
+            for member in archive:
+                if member.isfile() and member.name.lower().endswith(IMAGE_EXTENSIONS):
+                    yield member.name, archive.extractfile(member).read()
+    else:
+        raise ValueError(f"{source} is neither a directory nor a tar archive")
+
+
+def decode_image(source: Union[str, bytes], size: int = 256) -> Image.Image:
+    """
+    Decode an image to RGB, at reduced scale where the format allows it
+
+    JPEG photos can be decoded straight to 1/2, 1/4 or 1/8 scale, which is
+    most of the decoding cost for camera-sized images. The image is never
+    reduced below size pixels on its shorter side, so the model's resize
+    and crop see the same detail as before.
+
+    Args:
+        source (str | bytes): File path or file contents
+        size (int): Smallest side the model's preprocessing needs
+
+    Returns:
+        PIL.Image: Decoded RGB image
+    """
+    image = Image.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+    image.draft('RGB', (size, size))
+    return image.convert('RGB')
+
+
+def decode_ahead(items: Iterable[Tuple[str, Union[str, bytes]]], workers: int = 4,
+                 window: int = 64) -> Iterator[Tuple[str, Optional[Image.Image], Optional[str]]]:
+    """
+    Decode images on a thread pool, in order, with at most window in flight
+
+    Args:
+        items: (image id, path or contents) pairs, e.g. from iter_images
+        workers (int): Decoding threads
+        window (int): Images read or decoded ahead of the consumer
+
+    Yields:
+        Tuple[str, PIL.Image | None, str | None]: Image id, the image, and an
+        error message if it could not be decoded
+    """
+    def result(image_id, future):
+        try:
+            return image_id, future.result(), None
+        except Exception as e:
+            return image_id, None, f"Could not decode image ({type(e).__name__})"
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image-decode') as executor:
+        pending = deque()
+        for image_id, source in items:
+            pending.append((image_id, executor.submit(decode_image, source)))
+            if len(pending) >= window:
+                yield result(*pending.popleft())
+        while pending:
+            yield result(*pending.popleft())
+
+
+class ImageBatchAnalyzer:
+    def __init__(self, recognizer, batch_size: int = 32, decode_workers: int = 4):
+        """
+        Recognize food and assess its nutrition over a stream of images
+
+        Decoding runs on a thread pool a bounded distance ahead of inference,
+        and inference runs in batches of batch_size, so memory stays constant
+        however many images there are. Nutrition and health impacts are looked
+        up once per dish.
+
+        Args:
+            recognizer (FoodRecognizer): Recognizer used for inference and nutrition lookup
+            batch_size (int): Images per forward pass
+            decode_workers (int): Decoding threads
+        """
+        self.recognizer = recognizer
+        self.batch_size = batch_size
+        self.decode_workers = decode_workers
+        self._reports = {}
+        self.stats = {'images': 0, 'failed': 0, 'unrecognized': 0, 'batches': 0}
+
+    def _report(self, food_name: str) -> Tuple[Optional[Dict], Dict]:
+        """Nutrition and health impacts of a dish, looked up once"""
+        if food_name not in self._reports:
+            from nutrition_utils import assess_health_impact
+
+            nutrition = self.recognizer.get_nutrition_info(food_name)
+            if nutrition is not None:
+                nutrition = {key: value if key == 'name' else float(value) for key, value in nutrition.items()}
+            self._reports[food_name] = (nutrition, assess_health_impact(nutrition) if nutrition else {})
+        return self._reports[food_name]
+
+    def _flush(self, batch: List[Tuple[str, Optional[Image.Image], Optional[str]]]) -> Iterator[Dict]:
+        images = [image for _, image, _ in batch if image is not None]
+        predictions = iter(self.recognizer.recognize_batch(images) if images else [])
+        if images:
+            self.stats['batches'] += 1
+
+        for image_id, image, error in batch:
+            self.stats['images'] += 1
+            if image is None:
+                self.stats['failed'] += 1
+                yield {'image': image_id, 'error': error}
+                continue
+
+            food_name, confidence = next(predictions)
+            record = {'image': image_id, 'food': food_name, 'confidence': round(float(confidence), 4),
+                      'nutrition': None, 'health_impact': {}}
+            if food_name is None:
+                self.stats['unrecognized'] += 1
+            else:
+                record['nutrition'], record['health_impact'] = self._report(food_name)
+            yield record
+
+    def analyze(self, items: Iterable[Tuple[str, Union[str, bytes]]]) -> Iterator[Dict]:
+        """
+        Analyze images in order
+
+        Args:
+            items: (image id, path or contents) pairs, e.g. from iter_images
+
+        Yields:
+            Dict: Report with image, food, confidence, nutrition and
+            health_impact, or image and error if it could not be decoded
+        """
+        batch = []
+        for decoded in decode_ahead(items, self.decode_workers, window=2 * self.batch_size):
+            batch.append(decoded)
+            if len(batch) == self.batch_size:
+                yield from self._flush(batch)
+                batch = []
+        if batch:
+            yield from self._flush(batch)
+
+
+class ReportWriter:
+    CSV_COLUMNS = ['image', 'food', 'confidence', 'calories', 'protein', 'fat', 'carbs',
+                   'health_impact', 'error']
+
+    def __init__(self, stream, output_format: str, header: bool = True):
+        """
+        Write image reports as they complete
+
+        JSONL output has one line per image with the full report. CSV output
+        has one row per image with the nutrition flattened and the health
+        impacts joined into one column.
+
+        Args:
+            stream: Text stream to write to
+            output_format (str): 'jsonl' or 'csv'
+            header (bool): Write the CSV header, i.e. the file is new
+        """
+        self.stream = stream
+        self.output_format = output_format
+        if output_format == 'csv':
+            self.writer = csv.DictWriter(stream, fieldnames=self.CSV_COLUMNS)
+            if header:
+                self.writer.writeheader()
+
+    def write(self, report: Dict):
+        """Write one image's report"""
+        if self.output_format == 'jsonl':
+            self.stream.write(json.dumps(report) + '\n')
+            return
+
+        nutrition = report.get('nutrition') or {}
+        self.writer.writerow({
+            'image': report['image'],
+            'food': report.get('food'),
+            'confidence': report.get('confidence'),
+            **{nutrient: nutrition.get(nutrient) for nutrient in ['calories', 'protein', 'fat', 'carbs']},
+            'health_impact': '; '.join(f"{impact}: {details}" for impact, details in report.get('health_impact', {}).items()),
+            'error': report.get('error', '')
+        })
+
+
+def resume_output(path: str, output_format: str) -> Set[str]:
+    """
+    Prepare an earlier, possibly interrupted, run's output for appending
+
+    Only reports of images analyzed without errors are kept. Failed images
+    are retried and their new reports appended, so the output holds one
+    report per image. A last line or row cut short by a crash is dropped
+    too, so the next report starts on a line of its own.
+
+    Args:
+        path (str): Output .jsonl or .csv of the earlier run
+        output_format (str): 'jsonl' or 'csv'
+
+    Returns:
+        Set[str]: Ids of the images already analyzed
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    kept = []
+    with open(path, newline='', encoding='utf-8') as f:
+        if output_format == 'jsonl':
+            for line in f:
+                try:
+                    report = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if 'error' not in report:
+                    done.add(report['image'])
+                    kept.append(line if line.endswith('\n') else line + '\n')
+        else:
+            for row in csv.reader(f):
+                # A row cut short by a crash has fewer columns
+                if len(row) == len(ReportWriter.CSV_COLUMNS) and row[0] != 'image' and not row[-1]:
+                    done.add(row[0])
+                    kept.append(row)
+
+    # Rewrite through a temporary file, so a crash here can't lose the finished reports
+    temporary = path + '.tmp'
+    with open(temporary, 'w', newline='', encoding='utf-8') as f:
+        if output_format == 'jsonl':
+            f.writelines(kept)
+        else:
+            writer = csv.writer(f)
+            writer.writerow(ReportWriter.CSV_COLUMNS)
+            writer.writerows(kept)
+    os.replace(temporary, path)
+    return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze a directory or tar archive of meal photos")
+    parser.add_argument('source', help="Directory of images or a .tar/.tar.gz archive")
+    parser.add_argument('-o', '--output', help="Output .jsonl or .csv; rerunning with the same file resumes. "
+                                               "Defaults to JSONL on stdout")
+    parser.add_argument('--format', choices=['jsonl', 'csv'], help="Output format; defaults to the output's extension")
+    parser.add_argument('--batch-size', type=int, default=32, help="Images per forward pass")
+    parser.add_argument('--decode-workers', type=int, default=os.cpu_count() or 4, help="Image decoding threads")
+    parser.add_argument('--progress', type=float, default=5.0, help="Seconds between progress lines")
+    parser.add_argument('--restart', action='store_true', help="Overwrite the output instead of resuming")
+    args = parser.parse_args()
+
+    output_format = args.format or ('csv' if args.output and args.output.lower().endswith('.csv') else 'jsonl')
+
+    # Outside an app, the recognizer's Streamlit messages only turn into log noise
+    logging.disable(logging.WARNING)
+
+    from food_recognition import FoodRecognizer
+
+    recognizer = FoodRecognizer(
+        num_workers=int(os.getenv('EATELLIGENCE_MODEL_WORKERS', '0')),
+        threads_per_worker=int(os.getenv('EATELLIGENCE_THREADS_PER_WORKER', '0')) or None
+    )
+    if recognizer.model is None:
+        sys.exit("The food recognition model could not be loaded")
+
+    done = resume_output(args.output, output_format) if args.output and not args.restart else set()
+    if done:
+        print(f"Resuming: skipping {len(done)} images already analyzed", file=sys.stderr)
+    items = ((image_id, source) for image_id, source in iter_images(args.source) if image_id not in done)
+
+    # Append, so an interrupted run can be resumed from the same file
+    if args.output:
+        new_file = args.restart or not os.path.exists(args.output) or os.path.getsize(args.output) == 0
+        output = open(args.output, 'w' if args.restart else 'a', newline='', encoding='utf-8')
+    else:
+        new_file, output = True, sys.stdout
+    writer = ReportWriter(output, output_format, header=new_file)
+    analyzer = ImageBatchAnalyzer(recognizer, args.batch_size, args.decode_workers)
+
+    start = last_progress = time.monotonic()
+    stats = analyzer.stats
+    try:
+        for report in analyzer.analyze(items):
+            writer.write(report)
+            now = time.monotonic()
+            if now - last_progress >= args.progress:
+                output.flush()
+                last_progress = now
+                print(f"{stats['images']} images ({stats['failed']} failed) at "
+                      f"{stats['images'] / (now - start):.1f} images/s", file=sys.stderr)
+    finally:
+        if output is sys.stdout:
+            output.flush()
+        else:
+            output.close()
+
+    elapsed = max(time.monotonic() - start, 1e-9)
+    print(f"{stats['images']} images ({stats['unrecognized']} unrecognized, {stats['failed']} failed) "
+          f"in {stats['batches']} batches, {elapsed:.1f}s at {stats['images'] / elapsed:.1f} images/s",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
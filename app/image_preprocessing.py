@@ -0,0 +1,105 @@
+import threading
+from typing import List, Optional, Sequence
+
+import numpy as np
+import torch
+from PIL import Image
+
+# ImageNet statistics used by the pre-trained ResNet
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+
+class ImagePreprocessor:
+    def __init__(self, resize: int = 256, crop: int = 224,
+                 mean: Sequence[float] = IMAGENET_MEAN, std: Sequence[float] = IMAGENET_STD):
+        """
+        Convert PIL images into normalized model input batches
+
+        Equivalent to Resize(resize) -> CenterCrop(crop) -> ToTensor() -> Normalize(mean, std),
+        but resizing and cropping happen in a single PIL call, and the uint8 to
+        float conversion and normalization are fused into one lookup-table pass
+        that writes straight into a preallocated batch buffer.
+
+        The result is close to torchvision's, not identical. Resampling only
+        the crop box rounds some pixels differently, and large images are first
+        reduced by an integer factor (reducing_gap=3.0), which roughly halves
+        the resize time for camera-sized photos. On photos a few pixels differ
+        by one uint8 level, 0.0175 after normalization. Large high-frequency
+        images can differ by up to four levels.
+
+        Args:
+            resize (int): Size of the shorter image side before cropping
+            crop (int): Size of the square center crop
+            mean (Sequence[float]): Per-channel mean for normalization
+            std (Sequence[float]): Per-channel standard deviation for normalization
+        """
+        self.resize = resize
+        self.crop = crop
+
+        # One 256-entry table per channel maps raw pixel values to normalized floats
+        levels = np.arange(256, dtype=np.float32) / 255.0
+        self.lookup = np.stack([(levels - m) / s for m, s in zip(mean, std)]).astype(np.float32)
+
+        # Each thread gets its own buffer, since Streamlit sessions share one recognizer
+        self._local = threading.local()
+
+    def _get_buffer(self, batch_size: int) -> torch.Tensor:
+        """Return a reusable buffer with room for at least batch_size images"""
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None or buffer.shape[0] < batch_size:
+            buffer = torch.empty((batch_size, 3, self.crop, self.crop), dtype=torch.float32)
+            self._local.buffer = buffer
+        return buffer
+
+    def _resize_and_crop(self, image: Image.Image) -> Image.Image:
+        """Resize the shorter side and take the center crop in one resampling step"""
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        width, height = image.size
+        resized_width = self.resize if width <= height else int(self.resize * width / height)
+        resized_height = self.resize if height <= width else int(self.resize * height / width)
+        scale_x = resized_width / width
+        scale_y = resized_height / height
+
+        # Crop box in resized coordinates, mapped back onto the source image
+        left = int(round((resized_width - self.crop) / 2.0))
+        top = int(round((resized_height - self.crop) / 2.0))
+        box = (left / scale_x, top / scale_y, (left + self.crop) / scale_x, (top + self.crop) / scale_y)
+
+        return image.resize((self.crop, self.crop), Image.Resampling.BILINEAR, box=box, reducing_gap=3.0)
+
+    def preprocess_into(self, image: Image.Image, out: np.ndarray):
+        """
+        Write one normalized image into a (3, crop, crop) float32 array
+
+        Args:
+            image (PIL.Image): Input image
+            out (np.ndarray): Destination array, e.g. one slot of a batch buffer
+        """
+        pixels = np.asarray(self._resize_and_crop(image))
+        for channel in range(3):
+            np.take(self.lookup[channel], pixels[:, :, channel], out=out[channel])
+
+    def __call__(self, images: List[Image.Image], out: Optional[torch.Tensor] = None) -> torch.Tensor:
+        """
+        Preprocess a list of images into a batch tensor
+
+        Args:
+            images (List[PIL.Image]): Input images
+            out (torch.Tensor, optional): Destination tensor of shape (N, 3, crop, crop).
+                When omitted, the thread's reusable buffer is used.
+
+        Returns:
+            torch.Tensor: Batch of shape (len(images), 3, crop, crop). When no `out`
+            was given, this is a view into the reusable buffer and is only valid
+            until the next call from the same thread.
+        """
+        if out is None:
+            out = self._get_buffer(len(images))
+        batch = out[:len(images)]
+        batch_array = batch.numpy()
+        for index, image in enumerate(images):
+            self.preprocess_into(image, batch_array[index])
+        return batch
@@ -0,0 +1,290 @@
+import os
+import re
+from fractions import Fraction
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+NUTRIENTS = ['Calories', 'Protein', 'Fat', 'Carbs', 'Sugar', 'Fibre', 'Sodium']
+
+# Other names for ingredients in the table, after normalization
+INGREDIENT_ALIASES = {
+    'maida': 'refined flour',
+    'atta': 'whole wheat flour',
+    'gram flour': 'besan',
+    'multigrain base': 'multigrain bread',
+    'whole wheat bun': 'whole wheat bread',
+    'pav': 'white bread',
+    'bread': 'white bread',
+    'vegetables': 'mixed vegetables',
+    'sprouted moong': 'sprouted moong beans',
+    'sprouted moong patty': 'sprouted moong beans',
+    'grilled paneer': 'paneer',
+    'cottage cheese': 'paneer',
+    'curd': 'yogurt',
+    'dahi': 'yogurt',
+    'green gram': 'moong dal',
+    'black gram': 'urad dal',
+    'red gram': 'toor dal',
+    'palak': 'spinach',
+    'methi': 'fenugreek leaves',
+    'lauki': 'bottle gourd',
+    'tinda': 'round gourd',
+    'karela': 'bitter gourd',
+    'bhindi': 'okra',
+    'baingan': 'brinjal',
+    'gajar': 'carrot',
+    'shimla mirch': 'bell peppers',
+    'capsicum': 'bell peppers',
+    'tamatar': 'tomato',
+    'aloo': 'potato',
+    'matar': 'green peas',
+    'peas': 'green peas',
+    'pyaz': 'onion',
+    'oil': 'vegetable oil',
+    'chicken': 'chicken breast',
+    'chana': 'roasted chana',
+    'turmeric': 'spices',
+    'cumin': 'spices',
+    'coriander': 'herbs',
+    'mint': 'herbs',
+    'curry leaves': 'herbs',
+    'mustard seeds': 'spices',
+    'fenugreek': 'spices',
+    'asafoetida': 'spices',
+    'cinnamon': 'spices',
+    'cardamom': 'spices',
+    'cloves': 'spices',
+    'garam masala': 'spices',
+    'lemon': 'lemon juice',
+    'chili': 'spices',
+    'chilli': 'spices',
+    'red chili': 'spices',
+    'green chili': 'spices',
+    'ginger': 'spices',
+    'garlic': 'spices',
+    'black pepper': 'spices',
+}
+
+# Millilitres per unit of volume; a row's Density (g/ml) turns them into grams
+VOLUME_UNITS = {'ml': 1.0, 'l': 1000.0, 'cup': 240.0, 'tbsp': 15.0, 'tsp': 5.0, 'pinch': 0.3}
+
+# Grams per unit of mass
+MASS_UNITS = {'g': 1.0, 'kg': 1000.0, 'oz': 28.35, 'lb': 453.6}
+
+UNIT_ALIASES = {
+    'ml': 'ml', 'millilitre': 'ml', 'milliliter': 'ml', 'millilitres': 'ml', 'milliliters': 'ml',
+    'l': 'l', 'litre': 'l', 'liter': 'l', 'litres': 'l', 'liters': 'l',
+    'cup': 'cup', 'cups': 'cup', 'c': 'cup', 'katori': 'cup', 'katoris': 'cup', 'glass': 'cup', 'glasses': 'cup',
+    'tbsp': 'tbsp', 'tbsps': 'tbsp', 'tbs': 'tbsp', 'tablespoon': 'tbsp', 'tablespoons': 'tbsp',
+    'tsp': 'tsp', 'tsps': 'tsp', 'teaspoon': 'tsp', 'teaspoons': 'tsp',
+    'pinch': 'pinch', 'pinches': 'pinch', 'dash': 'pinch',
+    'g': 'g', 'gm': 'g', 'gms': 'g', 'gram': 'g', 'grams': 'g', 'gr': 'g',
+    'kg': 'kg', 'kgs': 'kg', 'kilogram': 'kg', 'kilograms': 'kg',
+    'oz': 'oz', 'ounce': 'oz', 'ounces': 'oz',
+    'lb': 'lb', 'lbs': 'lb', 'pound': 'lb', 'pounds': 'lb',
+    'piece': 'piece', 'pieces': 'piece', 'pc': 'piece', 'pcs': 'piece', 'whole': 'piece',
+    'slice': 'piece', 'slices': 'piece', 'clove': 'piece', 'cloves': 'piece', 'nos': 'piece', 'no': 'piece',
+}
+
+# Piece sizes relative to the table's Piece Weight
+SIZE_FACTORS = {'small': 0.7, 'medium': 1.0, 'large': 1.4, 'big': 1.4}
+
+# Grams assumed for lines like "salt to taste" that give no quantity
+TRACE_GRAMS = 1.0
+
+UNICODE_FRACTIONS = {'½': ' 1/2', '⅓': ' 1/3', '⅔': ' 2/3', '¼': ' 1/4', '¾': ' 3/4', '⅛': ' 1/8'}
+
+_NUMBER = r'(?:\d+\s+\d+/\d+|\d+/\d+|\d*\.\d+|\d+)'
+_QUANTITY = re.compile(rf'^\s*({_NUMBER})(?:\s*(?:-|to)\s*({_NUMBER}))?\s*([a-z]+\b\.?)?\s*(?:of\s+)?')
+_TRACE = re.compile(r'\b(to taste|for garnish(ing)?|as needed|as required|a pinch|few|handful)\b')
+
+
+class IngredientNutrition:
+    def __init__(self, path: Optional[str] = None):
+        """
+        Ingredient nutrition table for computing dish nutrition from recipes
+
+        The table is held as a dense (ingredients x nutrients) matrix of values
+        per 100 g. Recipes become rows of a sparse (recipes x ingredients)
+        matrix of grams, so the nutrition of any number of recipes is a single
+        sparse matrix product.
+
+        Args:
+            path (str, optional): CSV with an Ingredient column and one column per
+                nutrient, per 100 g. Defaults to ingredient_nutrition.csv next to this file.
+        """
+        if path is None:
+            path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ingredient_nutrition.csv')
+
+        table = pd.read_csv(path)
+        self.ingredients = table['Ingredient'].str.lower().str.strip().tolist()
+        self.index = {name: position for position, name in enumerate(self.ingredients)}
+        self.matrix = table[NUTRIENTS].to_numpy(dtype=np.float64) / 100.0  # per gram
+        # Grams per ml and per piece, for converting household measures
+        self.density = table['Density'].to_numpy(dtype=np.float64)
+        self.piece_weight = table['Piece Weight'].to_numpy(dtype=np.float64)
+        self.default_density = 0.6
+        self.default_piece_weight = 100.0
+        self._lookups = {}
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        """Lower-case an ingredient name and collapse hyphens, punctuation and spacing"""
+        name = re.sub(r'[^a-z ]', ' ', name.lower().replace('-', ' '))
+        return ' '.join(name.split())
+
+    def lookup(self, name: str) -> Optional[int]:
+        """
+        Row of an ingredient in the table
+
+        Tries the name itself, its aliases and singular forms, then shorter
+        runs of its words, longest first, so "red chili powder" finds "chili"
+        and "fresh coriander leaves" finds "coriander".
+        """
+        name = self.normalize(name)
+        if name not in self._lookups:
+            words = name.split()
+            spans = (' '.join(words[start:start + length])
+                     for length in range(len(words), 0, -1)
+                     for start in range(len(words) - length + 1))
+            self._lookups[name] = next(
+                (row for span in spans for row in [self._lookup_exact(span)] if row is not None), None
+            )
+        return self._lookups[name]
+
+    def _lookup_exact(self, name: str) -> Optional[int]:
+        """Row of a normalized name, its alias or its singular form"""
+        for candidate in (name, name[:-2] if name.endswith('es') else None, name.rstrip('s')):
+            if candidate in self.index:
+                return self.index[candidate]
+            if candidate in INGREDIENT_ALIASES:
+                return self.index.get(INGREDIENT_ALIASES[candidate])
+        return None
+
+    def parse(self, line: Union[str, Dict]) -> Tuple[str, float]:
+        """
+        Parse a recipe ingredient line into an ingredient name and grams
+
+        Understands quantities like "2", "1/2", "1 1/2", "½" and ranges like
+        "2-3" (averaged), followed by an optional unit: volumes (cup, tbsp, tsp,
+        ml, ...) are converted with the ingredient's density, masses (g, kg, oz,
+        lb) directly, and counts ("2 tomatoes", "1 large onion") with its piece
+        weight. Lines without a quantity, like "salt to taste", count as a trace.
+
+        Args:
+            line (str or Dict): e.g. "2 cups moong dal", or a dict such as
+                {"quantity": "1 tbsp", "name": "ghee"}
+
+        Returns:
+            Tuple[str, float]: Ingredient name and its weight in grams
+        """
+        if isinstance(line, dict):
+            line = ' '.join(str(value) for value in line.values())
+        text = str(line).lower()
+        for fraction, replacement in UNICODE_FRACTIONS.items():
+            text = text.replace(fraction, replacement)
+        # Preparation notes after a comma or in brackets don't change the quantity
+        text = re.sub(r'\([^)]*\)', ' ', text).split(',')[0]
+
+        trace = bool(_TRACE.search(text))
+        text = _TRACE.sub(' ', text)
+        amount, unit = None, None
+        match = _QUANTITY.match(text)
+        if match:
+            low, high, word = match.groups()
+            amount = self._number(low) if high is None else (self._number(low) + self._number(high)) / 2
+            word = (word or '').rstrip('.')
+            if word in UNIT_ALIASES:
+                unit = UNIT_ALIASES[word]
+                text = text[match.end():]
+            else:
+                text = text[match.end(2) if high else match.end(1):]
+
+        words = [word for word in text.split() if word not in ('a', 'an', 'of', 'some')]
+        size = 1.0
+        if words and words[0] in SIZE_FACTORS:
+            size = SIZE_FACTORS[words.pop(0)]
+        name = self.normalize(' '.join(words))
+
+        row = self.lookup(name) if name else None
+        if amount is None:
+            if trace or not name:
+                return name, TRACE_GRAMS
+            amount, unit = 1.0, 'piece'
+        if unit in MASS_UNITS:
+            return name, amount * MASS_UNITS[unit]
+        if unit in VOLUME_UNITS:
+            density = self.density[row] if row is not None else self.default_density
+            return name, float(amount * VOLUME_UNITS[unit] * density)
+        piece_weight = self.piece_weight[row] if row is not None else self.default_piece_weight
+        return name, float(amount * size * piece_weight)
+
+    @staticmethod
+    def _number(text: str) -> float:
+        """Value of a quantity like 2, 0.5, 1/2 or 1 1/2"""
+        try:
+            return float(sum(Fraction(part) for part in text.split()))
+        except ZeroDivisionError:
+            return 0.0
+
+    def parse_recipe(self, lines: Iterable[Union[str, Dict]]) -> Dict[str, float]:
+        """Grams of each ingredient in a recipe's ingredient lines, summed per name"""
+        recipe = {}
+        for line in lines:
+            name, grams = self.parse(line)
+            if name:
+                recipe[name] = recipe.get(name, 0.0) + grams
+        return recipe
+
+    def quantity_matrix(self, recipes: List[Dict[str, float]]) -> sparse.csr_matrix:
+        """
+        Build the sparse (recipes x ingredients) matrix of grams
+
+        Ingredients missing from the table are left out; see unmatched().
+
+        Args:
+            recipes (List[Dict[str, float]]): Grams of each ingredient, per recipe
+
+        Returns:
+            scipy.sparse.csr_matrix: Quantity matrix
+        """
+        rows, columns, grams = [], [], []
+        for row, recipe in enumerate(recipes):
+            for name, quantity in recipe.items():
+                column = self.lookup(name)
+                if column is not None:
+                    rows.append(row)
+                    columns.append(column)
+                    grams.append(quantity)
+        # Duplicate (row, column) pairs, e.g. "tomato" and "tamatar", are summed
+        return sparse.csr_matrix((grams, (rows, columns)), shape=(len(recipes), len(self.ingredients)))
+
+    def unmatched(self, recipe: Dict[str, float]) -> List[str]:
+        """Ingredients of a recipe that are not in the table"""
+        return [name for name in recipe if self.lookup(name) is None]
+
+    def compute(self, recipes: List[Dict[str, float]]) -> pd.DataFrame:
+        """
+        Compute the nutrition of many recipes at once
+
+        Args:
+            recipes (List[Dict[str, float]]): Grams of each ingredient, per recipe
+
+        Returns:
+            pd.DataFrame: One row per recipe with the total of each nutrient and
+            the matched Weight in grams
+        """
+        quantities = self.quantity_matrix(recipes)
+        totals = pd.DataFrame(quantities @ self.matrix, columns=NUTRIENTS)
+        totals['Weight'] = np.asarray(quantities.sum(axis=1)).ravel()
+        return totals
+
+
+@lru_cache(maxsize=None)
+def load_ingredient_nutrition() -> IngredientNutrition:
+    """Shared ingredient nutrition table, loaded once per process"""
+    return IngredientNutrition()
@@ -0,0 +1,217 @@
+import bisect
+import difflib
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+# Other names for ingredients, keyed by the name the app uses for them: the
+# Hindi name where the recipe generator's categories use one, otherwise English
+INGREDIENT_SYNONYMS = {
+    'palak': ['spinach', 'पालक'],
+    'methi': ['fenugreek leaves', 'fenugreek greens', 'मेथी'],
+    'lauki': ['bottle gourd', 'doodhi', 'ghiya', 'calabash', 'लौकी'],
+    'tinda': ['round gourd', 'indian squash', 'टिंडा'],
+    'karela': ['bitter gourd', 'bitter melon', 'करेला'],
+    'bhindi': ['okra', 'ladies finger', 'lady finger', 'भिंडी'],
+    'baingan': ['brinjal', 'eggplant', 'aubergine', 'बैंगन'],
+    'gajar': ['carrot', 'गाजर'],
+    'shimla mirch': ['capsicum', 'bell pepper', 'शिमला मिर्च'],
+    'tamatar': ['tomato', 'टमाटर'],
+    'aloo': ['potato', 'आलू'],
+    'pyaz': ['onion', 'pyaaz', 'kanda', 'प्याज'],
+    'matar': ['green peas', 'peas', 'मटर'],
+    'gobhi': ['cauliflower', 'phool gobhi', 'गोभी'],
+    'patta gobhi': ['cabbage', 'bandh gobhi', 'पत्ता गोभी'],
+    'kheera': ['cucumber', 'खीरा'],
+    'shakarkandi': ['sweet potato', 'शकरकंदी'],
+    'ragi': ['finger millet', 'nachni', 'mandua', 'रागी'],
+    'bajra': ['pearl millet', 'बाजरा'],
+    'jowar': ['sorghum', 'ज्वार'],
+    'foxtail millet': ['kangni', 'kakum', 'navane'],
+    'little millet': ['kutki', 'samai'],
+    'kodo millet': ['kodra', 'kodo'],
+    'barnyard millet': ['sanwa', 'jhangora', 'samak'],
+    'brown rice': ['brown chawal'],
+    'red rice': ['lal chawal', 'matta rice'],
+    'moong dal': ['split green gram', 'mung dal', 'moong', 'मूंग दाल'],
+    'toor dal': ['arhar dal', 'tuvar dal', 'pigeon pea', 'तूर दाल', 'अरहर दाल'],
+    'chana dal': ['split bengal gram', 'split chickpeas', 'चना दाल'],
+    'urad dal': ['split black gram', 'उड़द दाल'],
+    'masoor dal': ['red lentils', 'मसूर दाल'],
+    'horse gram': ['kulthi', 'kulith', 'कुलथी'],
+    'turmeric': ['haldi', 'हल्दी'],
+    'cumin': ['jeera', 'zeera', 'जीरा'],
+    'coriander': ['dhania', 'cilantro', 'धनिया'],
+    'mustard seeds': ['rai', 'sarson', 'राई'],
+    'fenugreek': ['methi seeds', 'methi dana'],
+    'asafoetida': ['hing', 'heeng', 'हींग'],
+    'curry leaves': ['kadi patta', 'curry patta', 'कड़ी पत्ता'],
+    'cinnamon': ['dalchini', 'दालचीनी'],
+    'cardamom': ['elaichi', 'इलायची'],
+    'cloves': ['laung', 'लौंग'],
+    'ghee': ['clarified butter', 'घी'],
+    'mustard oil': ['sarson ka tel', 'सरसों का तेल'],
+    'sesame oil': ['til oil', 'gingelly oil', 'तिल का तेल'],
+    'coconut oil': ['nariyal tel', 'नारियल तेल'],
+    'peanuts': ['moongphali', 'groundnuts', 'मूंगफली'],
+    'almonds': ['badam', 'बादाम'],
+    'cashews': ['kaju', 'काजू'],
+    'walnuts': ['akhrot', 'अखरोट'],
+    'flaxseeds': ['alsi', 'linseed', 'अलसी'],
+    'chia seeds': ['sabja'],
+    'paneer': ['cottage cheese', 'पनीर'],
+    'yogurt': ['dahi', 'curd', 'दही'],
+    'besan': ['gram flour', 'chickpea flour', 'बेसन'],
+    'whole wheat flour': ['atta', 'आटा'],
+    'refined flour': ['maida', 'मैदा'],
+    'rice': ['chawal', 'चावल'],
+    'ginger': ['adrak', 'अदरक'],
+    'garlic': ['lehsun', 'lahsun', 'लहसुन'],
+    'lemon': ['nimbu', 'नींबू'],
+    'mint': ['pudina', 'पुदीना'],
+    'jaggery': ['gur', 'गुड़'],
+    'coconut': ['nariyal', 'नारियल'],
+    'tofu': ['bean curd', 'soy paneer'],
+    'chicken': ['murgh', 'मुर्गा'],
+    'egg': ['anda', 'अंडा'],
+    'fish': ['machli', 'मछली'],
+}
+
+# Ranking tiers: the app's own ingredients first, then their other names, then catalog dishes
+INGREDIENT, SYNONYM, DISH = 0, 1, 2
+
+
+def normalize_term(text: str) -> str:
+    """Casefold, strip accents and collapse punctuation and spacing; Devanagari is kept"""
+    text = unicodedata.normalize('NFKD', text.casefold())
+    # Drop Latin combining accents, but not Devanagari vowel signs
+    text = ''.join(char for char in text if not ('\u0300' <= char <= '\u036f'))
+    text = unicodedata.normalize('NFC', text)
+    # Punctuation and symbols separate words; marks are part of Devanagari letters
+    return ' '.join(''.join(' ' if unicodedata.category(char)[0] in 'PS' else char for char in text).split())
+
+
+class IngredientIndex:
+    def __init__(self, categories: Dict[str, List[str]], dishes: Iterable[str] = (),
+                 synonyms: Dict[str, List[str]] = INGREDIENT_SYNONYMS, limit: int = 8):
+        """
+        Prefix trie over ingredient names, their synonyms and catalog dish names
+
+        Every name is indexed from the start of each of its words, so "dal"
+        completes "moong dal" as well as "dal makhani". Each trie node keeps
+        its best completions, ranked ahead of time by tier (the app's
+        ingredients, then synonyms, then dishes), by whether the prefix starts
+        the name, and by length. A completion therefore costs one step per
+        typed character, with no search below the node.
+
+        Args:
+            categories (Dict[str, List[str]]): Ingredient categories, as in
+                RecipeGenerator.get_ingredient_categories()
+            dishes (Iterable[str]): Catalog dish names
+            synonyms (Dict[str, List[str]]): Other names keyed by canonical name
+            limit (int): Completions kept per node
+        """
+        self.limit = limit
+        self._root = [{}, []]
+        # Normalized name or synonym -> canonical name
+        self.canonical_names: Dict[str, str] = {}
+
+        for names in categories.values():
+            for name in names:
+                self._add(name, name, INGREDIENT)
+        for canonical, others in synonyms.items():
+            self._add(canonical, canonical, INGREDIENT)
+            for other in others:
+                self._add(other, canonical, SYNONYM)
+        for dish in dishes:
+            dish = ' '.join(dish.split())
+            self._add(dish, dish, DISH)
+        self._vocabulary = list(self.canonical_names)
+
+    def _add(self, term: str, canonical: str, tier: int):
+        key = normalize_term(term)
+        if not key or key in self.canonical_names and tier >= SYNONYM:
+            return
+        self.canonical_names[key] = canonical
+
+        words = key.split(' ')
+        offset = 0
+        for position, word in enumerate(words):
+            entry = ((tier, position > 0, len(key), key), canonical, term)
+            node = self._root
+            for char in key[offset:]:
+                node = node[0].setdefault(char, [{}, []])
+                top = node[1]
+                if entry not in top and (len(top) < self.limit or entry < top[-1]):
+                    bisect.insort(top, entry)
+                    del top[self.limit:]
+            offset += len(word) + 1
+
+    def complete(self, prefix: str, k: int = 5) -> List[Tuple[str, str]]:
+        """
+        Best completions of a partly typed name
+
+        Args:
+            prefix (str): Text typed so far
+            k (int): Maximum number of completions
+
+        Returns:
+            List[Tuple[str, str]]: (canonical name, name that matched) pairs,
+            best first, one per canonical name
+        """
+        node = self._root
+        for char in normalize_term(prefix):
+            node = node[0].get(char)
+            if node is None:
+                return []
+        completions, seen = [], set()
+        for _, canonical, term in node[1]:
+            if canonical not in seen:
+                seen.add(canonical)
+                completions.append((canonical, term))
+                if len(completions) == k:
+                    break
+        return completions
+
+    def canonical(self, term: str, cutoff: float = 0.8) -> Optional[str]:
+        """
+        Canonical name for an exact name or synonym, or for a close misspelling of one
+
+        Args:
+            term (str): Name as entered
+            cutoff (float): Minimum similarity (0-1) for a misspelling to match
+
+        Returns:
+            str: Canonical name, or None if nothing is close enough
+        """
+        key = normalize_term(term)
+        if key in self.canonical_names:
+            return self.canonical_names[key]
+        matches = difflib.get_close_matches(key, self._vocabulary, n=1, cutoff=cutoff)
+        return self.canonical_names[matches[0]] if matches else None
+
+    def normalize(self, ingredients: Union[str, Iterable[str]]) -> Tuple[List[str], Dict[str, str]]:
+        """
+        Map entered ingredients to canonical names
+
+        Unrecognized ingredients are kept as entered, and duplicates dropped.
+
+        Args:
+            ingredients (str or Iterable[str]): Comma-separated text or a list
+
+        Returns:
+            Tuple[List[str], Dict[str, str]]: Canonical ingredients, and the
+            entered names that were changed, mapped to what they became
+        """
+        if isinstance(ingredients, str):
+            ingredients = ingredients.split(',')
+        result, changed = [], {}
+        for ingredient in ingredients:
+            ingredient = ingredient.strip()
+            if not ingredient:
+                continue
+            canonical = self.canonical(ingredient) or ' '.join(ingredient.split())
+            if normalize_term(canonical) != normalize_term(ingredient):
+                changed[ingredient] = canonical
+            if canonical not in result:
+                result.append(canonical)
+        return result, changed
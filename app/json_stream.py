@@ -0,0 +1,141 @@
+import json
+import re
+from typing import Any, List, Tuple
+
+_TRAILING_COMMAS = re.compile(r',\s*([}\]])')
+_PARTIAL_UNICODE_ESCAPE = re.compile(r'\\u[0-9a-fA-F]{0,3}$')
+
+
+class JsonStreamParser:
+    """
+    Parse a JSON object out of streamed text, tolerating prose and truncation
+
+    Text before the first '{' is skipped, and the object is complete as soon
+    as its closing brace arrives, so surrounding prose or markdown fences are
+    ignored. Each chunk is scanned once while the parser keeps the nesting
+    stack and the last point where everything before it was a complete
+    value. If the stream stops early, repaired() cuts back to that point (or
+    closes a string value that was cut short) and closes every open array and
+    object, so the fields that did arrive can still be used.
+    """
+
+    def __init__(self):
+        self.text = ''
+        self.start = None
+        self.end = None
+        # Open containers as [bracket, expected] with expected one of
+        # 'key', 'colon', 'value' or 'comma' for objects
+        self._stack: List[List[str]] = []
+        self._in_string = False
+        self._string_is_key = False
+        self._escaped = False
+        self._safe: Tuple[int, Tuple[str, ...]] = (0, ())
+
+    @property
+    def complete(self) -> bool:
+        return self.end is not None
+
+    @property
+    def document(self) -> str:
+        """The JSON object received so far, without any surrounding text"""
+        if self.start is None:
+            return ''
+        return self.text[self.start:self.end]
+
+    def feed(self, chunk: str):
+        offset = len(self.text)
+        self.text += chunk
+        if self.complete:
+            return
+        for position, char in enumerate(chunk, offset):
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._string_is_key:
+                        self._stack[-1][1] = 'colon'
+                    else:
+                        self._value_done(position + 1)
+            elif self.start is None:
+                if char == '{':
+                    self.start = position
+                    self._open(char, position)
+            elif char == '"':
+                self._in_string = True
+                self._string_is_key = self._stack[-1][0] == '{' and self._stack[-1][1] == 'key'
+            elif char in '{[':
+                self._open(char, position)
+            elif char in '}]':
+                self._stack.pop()
+                if not self._stack:
+                    self.end = position + 1
+                    return
+                self._value_done(position + 1)
+            elif char == ':':
+                self._stack[-1][1] = 'value'
+            elif char == ',':
+                self._safe = (position, self._brackets())
+                if self._stack[-1][0] == '{':
+                    self._stack[-1][1] = 'key'
+
+    def _brackets(self) -> Tuple[str, ...]:
+        return tuple(bracket for bracket, _ in self._stack)
+
+    def _open(self, bracket: str, position: int):
+        self._stack.append([bracket, 'key'])
+        self._safe = (position + 1, self._brackets())
+
+    def _value_done(self, position: int):
+        """Everything up to position is complete"""
+        self._safe = (position, self._brackets())
+        if self._stack[-1][0] == '{':
+            self._stack[-1][1] = 'comma'
+
+    def repaired(self) -> str:
+        """
+        The JSON object received so far, closed up into a valid document
+
+        A string value of an object that was cut short is kept and closed; a
+        cut-short array item, key or number is dropped, since it may be wrong.
+        """
+        if self.complete:
+            return self.document
+        if self.start is None:
+            return ''
+
+        if self._in_string and not self._string_is_key and self._stack[-1][0] == '{':
+            body = self.text[self.start:]
+            if self._escaped:
+                body = body[:-1]
+            body = _PARTIAL_UNICODE_ESCAPE.sub('', body) + '"'
+            brackets = self._brackets()
+        else:
+            position, brackets = self._safe
+            body = self.text[self.start:position]
+        return body + ''.join('}' if bracket == '{' else ']' for bracket in reversed(brackets))
+
+    def value(self) -> Any:
+        """
+        Decode the object, repairing it first if it is incomplete
+
+        Raises:
+            ValueError: If no object was found or it cannot be decoded
+        """
+        document = self.document if self.complete else self.repaired()
+        if not document:
+            raise ValueError("No JSON object found")
+        try:
+            return json.loads(document)
+        except json.JSONDecodeError:
+            # Trailing commas are the most common slip in model-written JSON
+            return json.loads(_TRAILING_COMMAS.sub(r'\1', document))
+
+
+def parse_json_object(text: str) -> Any:
+    """Decode the first JSON object in text, repairing it if it was cut short"""
+    parser = JsonStreamParser()
+    parser.feed(text)
+    return parser.value()
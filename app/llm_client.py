@@ -0,0 +1,451 @@
+import argparse
+import json
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import openai
+
+try:
+    import httpx
+except ImportError:  # Only needed to tune the connection pool; openai pools connections either way
+    httpx = None
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the provider while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Stop calling a provider that keeps failing
+
+        After failure_threshold consecutive failures the breaker opens and calls
+        fail fast. Once reset_timeout seconds have passed, a single trial call is
+        let through; its success closes the breaker, its failure reopens it.
+
+        Args:
+            failure_threshold (int): Consecutive failures that open the breaker
+            reset_timeout (float): Seconds to stay open before a trial call
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now"""
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = 'half-open'
+                return True
+            # Open, or half-open with the trial call still running
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == 'half-open' or self._failures >= self.failure_threshold:
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+
+
+class RequestLimiter:
+    def __init__(self, max_concurrent: int = 4, tokens_per_minute: int = 90000):
+        """
+        Limit concurrent LLM calls and their token throughput, first come first served
+
+        Tokens come from a bucket holding up to a minute's budget that refills
+        continuously. Each call reserves an estimate of its tokens up front and
+        settles the difference with its actual usage when it ends. Waiting
+        calls are admitted strictly in arrival order, so a large request at the
+        head of the queue is not starved by smaller ones behind it.
+
+        Args:
+            max_concurrent (int): Calls allowed in flight at once
+            tokens_per_minute (int): Token budget per minute
+        """
+        self.max_concurrent = max_concurrent
+        self.capacity = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self.active = 0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._queue = deque()
+        self._condition = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: int, timeout: Optional[float] = None):
+        """
+        Wait for a call slot and reserve tokens for it
+
+        Args:
+            tokens (int): Estimated tokens of the call
+            timeout (float, optional): Seconds to wait at most
+
+        Raises:
+            TimeoutError: If the call was not admitted in time
+        """
+        needed = min(float(tokens), self.capacity)
+        end = None if timeout is None else time.monotonic() + timeout
+        ticket = object()
+        with self._condition:
+            self._queue.append(ticket)
+            try:
+                while True:
+                    self._refill()
+                    wait = None
+                    if self._queue[0] is ticket and self.active < self.max_concurrent:
+                        if self._tokens >= needed:
+                            self._queue.popleft()
+                            self.active += 1
+                            self._tokens -= needed
+                            return
+                        wait = (needed - self._tokens) / self.rate
+                    if end is not None:
+                        remaining = end - time.monotonic()
+                        if remaining <= 0:
+                            raise TimeoutError("Timed out waiting for an LLM call slot")
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._condition.wait(wait)
+            finally:
+                if ticket in self._queue:
+                    self._queue.remove(ticket)
+                # Whoever is now at the head of the queue may be able to go
+                self._condition.notify_all()
+
+    def release(self, reserved: int, used: Optional[int] = None):
+        """
+        Free a call slot and settle its tokens
+
+        Args:
+            reserved (int): Tokens passed to acquire
+            used (int, optional): Tokens actually used; None keeps the reservation
+        """
+        with self._condition:
+            self.active -= 1
+            if used is not None:
+                # May leave the bucket in debt when the estimate was too low
+                self._tokens = min(self.capacity, self._tokens + min(float(reserved), self.capacity) - used)
+            self._condition.notify_all()
+
+    @property
+    def waiting(self) -> int:
+        """Calls queued for a slot"""
+        with self._condition:
+            return len(self._queue)
+
+
+class LLMMetrics:
+    def __init__(self, window: int = 1000):
+        """
+        Latency and token usage of recent LLM calls
+
+        Args:
+            window (int): Number of most recent calls kept for latency percentiles
+        """
+        self._calls = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.totals = {'calls': 0, 'errors': 0, 'retries': 0, 'rejected': 0,
+                       'prompt_tokens': 0, 'completion_tokens': 0}
+
+    def record(self, latency: float, ok: bool, attempts: int = 1,
+               prompt_tokens: int = 0, completion_tokens: int = 0):
+        """Record one call, including all of its attempts"""
+        with self._lock:
+            self._calls.append(latency)
+            self.totals['calls'] += 1
+            self.totals['errors'] += not ok
+            self.totals['retries'] += attempts - 1
+            self.totals['prompt_tokens'] += prompt_tokens
+            self.totals['completion_tokens'] += completion_tokens
+
+    def record_rejected(self):
+        """Record a call refused by the open circuit breaker or not admitted by the limiter in time"""
+        with self._lock:
+            self.totals['rejected'] += 1
+
+    def summary(self) -> Dict:
+        """Totals plus p50/p95/max latency in seconds over the recent calls"""
+        with self._lock:
+            latencies = np.array(self._calls)
+            summary = dict(self.totals)
+        if len(latencies):
+            summary.update(
+                latency_p50=float(np.percentile(latencies, 50)),
+                latency_p95=float(np.percentile(latencies, 95)),
+                latency_max=float(latencies.max())
+            )
+        return summary
+
+
+class _MeteredStream:
+    """Wrap a streamed completion to record its metrics once it ends"""
+
+    def __init__(self, stream, client: 'LLMClient', start: float, attempts: int,
+                 reserved: int, prompt_tokens: int):
+        self._stream = stream
+        self._client = client
+        self._start = start
+        self._attempts = attempts
+        self._reserved = reserved
+        self._prompt_tokens = prompt_tokens
+        self._chunks = 0
+        self._ok = True
+        self._recorded = False
+
+    def __iter__(self):
+        try:
+            for event in self._stream:
+                self._chunks += 1
+                yield event
+        except Exception:
+            self._ok = False
+            raise
+        finally:
+            self._finish()
+
+    def close(self):
+        self._stream.close()
+        self._finish()
+
+    def _finish(self):
+        if self._recorded:
+            return
+        self._recorded = True
+        # Streams carry no usage, so each content chunk counts as one completion token
+        self._client.metrics.record(time.monotonic() - self._start, self._ok, self._attempts,
+                                    completion_tokens=self._chunks)
+        if self._ok:
+            self._client.breaker.record_success()
+        else:
+            self._client.breaker.record_failure()
+        if self._client.limiter is not None:
+            self._client.limiter.release(self._reserved, self._prompt_tokens + self._chunks)
+
+
+class LLMClient:
+    def __init__(self, api_key: str, base_url: Optional[str] = None, timeout: float = 30.0,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_cap: float = 8.0,
+                 max_connections: int = 20, breaker: Optional[CircuitBreaker] = None,
+                 limiter: Optional[RequestLimiter] = None):
+        """
+        OpenAI chat client with connection pooling, retries and a circuit breaker
+
+        Rate-limit (429), server (5xx), connection and timeout errors are retried
+        up to max_retries times with full-jitter exponential backoff, honouring
+        Retry-After when the provider sends it. Other errors are raised at once.
+
+        Args:
+            api_key (str): API key
+            base_url (str, optional): Alternative OpenAI-compatible endpoint, e.g.
+                the local stand-in server from llm_stub_server.py
+            timeout (float): Default per-request timeout in seconds
+            max_retries (int): Retries after the first attempt
+            backoff_base (float): Backoff before the first retry, doubled on each retry
+            backoff_cap (float): Maximum backoff in seconds
+            max_connections (int): Size of the keep-alive connection pool
+            breaker (CircuitBreaker, optional): Defaults to a new CircuitBreaker()
+            limiter (RequestLimiter, optional): Limiter shared with other clients;
+                calls are not limited without one
+        """
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.breaker = breaker or CircuitBreaker()
+        self.limiter = limiter
+        self.metrics = LLMMetrics()
+
+        http_client = None
+        if httpx is not None:
+            http_client = httpx.Client(
+                limits=httpx.Limits(max_connections=max_connections,
+                                    max_keepalive_connections=max_connections,
+                                    keepalive_expiry=60.0),
+                timeout=timeout
+            )
+        # Retries are handled here, so the SDK's own are turned off
+        self._client = openai.OpenAI(api_key=api_key, base_url=base_url, timeout=timeout,
+                                     max_retries=0, http_client=http_client)
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        if isinstance(error, (openai.APIConnectionError, openai.RateLimitError)):
+            return True
+        return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """Seconds to wait before the next attempt"""
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_cap)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    @staticmethod
+    def _estimate_tokens(kwargs: Dict) -> Tuple[int, int]:
+        """Rough prompt tokens (about four characters each) and prompt plus completion limit"""
+        prompt = sum(len(str(message.get('content', ''))) for message in kwargs.get('messages', [])) // 4
+        return prompt, prompt + (kwargs.get('max_tokens') or 0)
+
+    def _call(self, reserve: int, **kwargs):
+        """
+        Create a completion, retrying transient failures; returns (response, attempts)
+
+        Each attempt holds a limiter slot with reserve tokens. It is released
+        here if the attempt fails, and by the caller once a successful call ends.
+
+        Every failed attempt is reported to the breaker, so a half-open trial
+        always settles it: errors in the request itself (4xx) show the provider
+        is answering and count as a success, anything else as a failure. The
+        limiter slot is taken before asking the breaker, so a call that times
+        out waiting for a slot never becomes a trial that is not made.
+        """
+        for attempt in range(self.max_retries + 1):
+            if self.limiter is not None:
+                try:
+                    self.limiter.acquire(reserve, timeout=kwargs.get('timeout', self.timeout))
+                except TimeoutError:
+                    self.metrics.record_rejected()
+                    raise
+            if not self.breaker.allow():
+                if self.limiter is not None:
+                    self.limiter.release(reserve, 0)
+                self.metrics.record_rejected()
+                raise CircuitOpenError("LLM provider is failing; not calling it for now")
+            try:
+                return self._client.chat.completions.create(**kwargs), attempt + 1
+            except Exception as e:
+                if self.limiter is not None:
+                    self.limiter.release(reserve, 0)
+                if not self._is_retryable(e):
+                    if isinstance(e, openai.APIStatusError) and e.status_code < 500:
+                        self.breaker.record_success()
+                    else:
+                        self.breaker.record_failure()
+                    raise
+                self.breaker.record_failure()
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self._backoff(attempt, e))
+
+    def chat(self, **kwargs):
+        """
+        Create a chat completion
+
+        Args:
+            **kwargs: Arguments for chat.completions.create
+
+        Returns:
+            ChatCompletion: The completion
+
+        Raises:
+            CircuitOpenError: While the circuit breaker is open
+            TimeoutError: If the limiter did not admit the call within its timeout
+        """
+        start = time.monotonic()
+        _, reserve = self._estimate_tokens(kwargs)
+        try:
+            response, attempts = self._call(reserve, **kwargs)
+        except (CircuitOpenError, TimeoutError):
+            raise
+        except Exception:
+            self.metrics.record(time.monotonic() - start, False, self.max_retries + 1)
+            raise
+
+        self.breaker.record_success()
+        usage = getattr(response, 'usage', None)
+        prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+        completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+        if self.limiter is not None:
+            self.limiter.release(reserve, prompt_tokens + completion_tokens if usage is not None else None)
+        self.metrics.record(time.monotonic() - start, True, attempts,
+                            prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        return response
+
+    def stream_chat(self, **kwargs):
+        """
+        Create a streamed chat completion
+
+        Only opening the stream is retried; once chunks flow, errors reach the caller.
+
+        Args:
+            **kwargs: Arguments for chat.completions.create (stream is set for you)
+
+        Returns:
+            Iterable of completion chunks with a close() method. Iterate it to
+            the end or close it, so its limiter slot is released.
+        """
+        start = time.monotonic()
+        prompt_tokens, reserve = self._estimate_tokens(kwargs)
+        try:
+            stream, attempts = self._call(reserve, stream=True, **kwargs)
+        except (CircuitOpenError, TimeoutError):
+            raise
+        except Exception:
+            self.metrics.record(time.monotonic() - start, False, self.max_retries + 1)
+            raise
+        return _MeteredStream(stream, self, start, attempts, reserve, prompt_tokens)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test an OpenAI-compatible endpoint through LLMClient")
+    parser.add_argument('--base-url', default='http://127.0.0.1:8765/v1')
+    parser.add_argument('--api-key', default='stub')
+    parser.add_argument('--model', default='gpt-3.5-turbo')
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--stream', action='store_true', help="Use streamed completions")
+    parser.add_argument('--max-in-flight', type=int, help="Limit concurrent calls with a RequestLimiter")
+    parser.add_argument('--tokens-per-minute', type=int, default=90000, help="Token budget of the limiter")
+    args = parser.parse_args()
+
+    limiter = RequestLimiter(args.max_in_flight, args.tokens_per_minute) if args.max_in_flight else None
+    client = LLMClient(api_key=args.api_key, base_url=args.base_url, max_connections=args.concurrency,
+                       limiter=limiter)
+    messages = [{"role": "user", "content": "Generate a healthy Indian recipe using these ingredients: palak, paneer."}]
+
+    def one_request(_):
+        try:
+            if args.stream:
+                for _ in client.stream_chat(model=args.model, messages=messages):
+                    pass
+            else:
+                client.chat(model=args.model, messages=messages)
+        except Exception:
+            pass
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        list(pool.map(one_request, range(args.requests)))
+    elapsed = time.monotonic() - start
+
+    summary = client.metrics.summary()
+    summary.update(elapsed=elapsed, requests_per_second=args.requests / elapsed, breaker=client.breaker.state)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+
+def _stub_recipe(messages: List[Dict]) -> Dict:
+    """Canned recipe built from the ingredients named in the prompt"""
+    prompt = ' '.join(message.get('content', '') for message in messages)
+    match = re.search(r'ingredients:\s*([^.\n]+)', prompt)
+    ingredients = [name.strip() for name in match.group(1).split(',')] if match else ['mixed vegetables']
+    main_ingredient = ingredients[0] or 'mixed vegetables'
+    return {
+        'name': f"{main_ingredient.title()} Stir Fry",
+        'servings': 2,
+        'ingredients': [f"1 cup {name}" for name in ingredients] + ['1 tsp oil', 'Salt to taste'],
+        'instructions': [
+            "1. Heat oil in a pan",
+            f"2. Add {', '.join(ingredients)} and stir fry for 5 minutes",
+            "3. Season with salt and serve"
+        ],
+        'health_benefits': ["Rich in fiber", "Low in calories"]
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep connections alive between requests
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, body: Dict, headers: Dict = None):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.path.rstrip('/') not in ('/v1/chat/completions', '/chat/completions'):
+            self._send_json(404, {'error': {'message': f"Unknown path {self.path}", 'type': 'invalid_request_error'}})
+            return
+        try:
+            request = json.loads(body)
+        except json.JSONDecodeError:
+            self._send_json(400, {'error': {'message': "Invalid JSON body", 'type': 'invalid_request_error'}})
+            return
+
+        server = self.server
+        time.sleep(max(0.0, server.latency + random.uniform(-server.jitter, server.jitter)))
+
+        roll = random.random()
+        if roll < server.rate_limit_rate:
+            self._send_json(429, {'error': {'message': "Rate limit reached", 'type': 'rate_limit_error'}},
+                            {'Retry-After': str(server.retry_after)})
+            return
+        if roll < server.rate_limit_rate + server.error_rate:
+            self._send_json(500, {'error': {'message': "Injected server error", 'type': 'server_error'}})
+            return
+
+        json_mode = (request.get('response_format') or {}).get('type') == 'json_object'
+        if json_mode and not server.json_mode:
+            self._send_json(400, {'error': {'message': "response_format is not supported with this model",
+                                            'type': 'invalid_request_error', 'param': 'response_format'}})
+            return
+
+        messages = request.get('messages', [])
+        content = json.dumps(_stub_recipe(messages), indent=2)
+        if server.prose and not json_mode:
+            content = f"Here is a healthy recipe for you:\n```json\n{content}\n```\nEnjoy your meal!"
+        tokens = re.findall(r'\s*\S+', content)
+        finish_reason = 'stop'
+        if request.get('max_tokens') and len(tokens) > request['max_tokens']:
+            tokens = tokens[:request['max_tokens']]
+            finish_reason = 'length'
+        content = ''.join(tokens)
+        prompt_tokens = sum(len(message.get('content', '').split()) for message in messages)
+        completion_tokens = len(tokens)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        model = request.get('model', 'stub')
+
+        if request.get('stream'):
+            self._stream(completion_id, model, tokens, finish_reason)
+            return
+
+        self._send_json(200, {
+            'id': completion_id,
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': model,
+            'choices': [{'index': 0, 'finish_reason': finish_reason,
+                         'message': {'role': 'assistant', 'content': content}}],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                      'total_tokens': prompt_tokens + completion_tokens}
+        })
+
+    def _stream(self, completion_id: str, model: str, tokens: List[str], finish_reason: str):
+        """Send the completion as server-sent events, one whitespace-delimited token per chunk"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def send(data: str):
+            event = f"data: {data}\n\n".encode('utf-8')
+            self.wfile.write(f"{len(event):x}\r\n".encode('ascii') + event + b"\r\n")
+            self.wfile.flush()
+
+        delay = 1.0 / self.server.tokens_per_second if self.server.tokens_per_second > 0 else 0.0
+        try:
+            for token in tokens:
+                send(json.dumps({
+                    'id': completion_id,
+                    'object': 'chat.completion.chunk',
+                    'created': int(time.time()),
+                    'model': model,
+                    'choices': [{'index': 0, 'delta': {'content': token}, 'finish_reason': None}]
+                }))
+                if delay:
+                    time.sleep(delay)
+            send(json.dumps({
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [{'index': 0, 'delta': {}, 'finish_reason': finish_reason}]
+            }))
+            send('[DONE]')
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading, e.g. once the recipe JSON was complete
+            self.close_connection = True
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8765, latency: float = 0.2,
+                 jitter: float = 0.0, error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 retry_after: float = 1.0, tokens_per_second: float = 0.0, prose: bool = False,
+                 json_mode: bool = True, verbose: bool = False):
+        """
+        Local OpenAI-compatible chat completions server for offline testing
+
+        Answers POST /v1/chat/completions, streamed or not, with a canned recipe
+        for the ingredients named in the prompt, after a configurable delay, and
+        fails a configurable share of requests with 429 or 500 responses.
+        Replies are cut off at max_tokens (one token per word), like a real
+        model's, and can be wrapped in prose outside JSON mode.
+
+        Args:
+            host (str): Address to listen on
+            port (int): Port to listen on; 0 picks a free port
+            latency (float): Seconds before each response starts
+            jitter (float): Latency varies uniformly by up to this many seconds
+            error_rate (float): Share of requests answered with a 500 error
+            rate_limit_rate (float): Share of requests answered with a 429 error
+            retry_after (float): Retry-After seconds sent with 429 responses
+            tokens_per_second (float): Streaming speed; 0 sends all chunks at once
+            prose (bool): Wrap replies in prose and a markdown fence unless JSON mode is requested
+            json_mode (bool): Accept response_format json_object; if False such requests get a 400
+            verbose (bool): Log every request
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.tokens_per_second = tokens_per_second
+        self.prose = prose
+        self.json_mode = json_mode
+        self.verbose = verbose
+        super().__init__((host, port), StubHandler)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def handle_error(self, request, client_address):
+        # Clients dropping keep-alive connections is routine, not worth a traceback
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def start(self) -> threading.Thread:
+        """Serve on a daemon thread, e.g. from a benchmark script"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local OpenAI-compatible stand-in server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.2, help="Seconds before each response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Random +/- seconds added to the latency")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of requests failing with 500")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Share of requests failing with 429")
+    parser.add_argument('--retry-after', type=float, default=1.0, help="Retry-After sent with 429 responses")
+    parser.add_argument('--tokens-per-second', type=float, default=0.0, help="Streaming speed; 0 for no delay")
+    parser.add_argument('--prose', action='store_true', help="Wrap replies in prose outside JSON mode")
+    parser.add_argument('--no-json-mode', action='store_true', help="Reject requests for JSON mode with a 400")
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    server = StubServer(args.host, args.port, args.latency, args.jitter, args.error_rate,
+                        args.rate_limit_rate, args.retry_after, args.tokens_per_second, args.prose,
+                        not args.no_json_mode, args.verbose)
+    print(f"Serving on {server.base_url}; set OPENAI_BASE_URL to use it")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -7,7 +7,12 @@ from food_recognition import FoodRecognizer
 from recipe_generator import RecipeGenerator
 from disease_recommender import DiseaseRecommender
 from healthy_alternatives import HealthyAlternatives
+from ingredient_search import IngredientIndex, normalize_term
+from session_memo import session_memo
+import hashlib
+import io
 import json
+import os
 
 # Set page config - MUST be the first Streamlit command
 st.set_page_config(
@@ -154,16 +159,26 @@ with st.sidebar:
 # Initialize components
 @st.cache_resource
 def load_components():
+    nutrition_data = load_nutrition_data()
+    recipe_generator = RecipeGenerator()
     return {
-        'nutrition_data': load_nutrition_data(),
-        'food_recognizer': FoodRecognizer(),
-        'recipe_generator': RecipeGenerator(),
+        'nutrition_data': nutrition_data,
+        'food_recognizer': FoodRecognizer(
+            num_workers=int(os.getenv('EATELLIGENCE_MODEL_WORKERS', '0')),
+            threads_per_worker=int(os.getenv('EATELLIGENCE_THREADS_PER_WORKER', '0')) or None
+        ),
+        'recipe_generator': recipe_generator,
+        'ingredient_index': IngredientIndex(recipe_generator.get_ingredient_categories(), nutrition_data['Food']),
         'disease_recommender': DiseaseRecommender(),
         'healthy_alternatives': HealthyAlternatives()
     }
 
 components = load_components()
 
+# Each tab runs as a fragment, so an interaction reruns only that tab's code.
+# Streamlit versions without fragments rerun the whole page as before.
+fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None) or (lambda func: func)
+
 # Create tabs
 food_tab, recipe_tab, disease_tab, alt_tab = st.tabs([
     "🍽️ Food Analyzer",
@@ -176,7 +191,116 @@ food_tab, recipe_tab, disease_tab, alt_tab = st.tabs([
 pastel_divider = "<div class='pastel-divider'></div>"
 
 # Food Analyzer Tab
-with food_tab:
+def analyze_food(food_name):
+    """
+    Nutrition, health impacts and macronutrient chart for a dish
+    
+    Args:
+        food_name (str): Dish name
+        
+    Returns:
+        dict: Dish, nutrition, impacts and a plotly figure spec, or just the
+        dish if no nutrition information is available
+    """
+    nutrition_info = get_nutrition_info(food_name)
+    if not nutrition_info:
+        return {'dish': food_name, 'nutrition': None}
+    
+    # Create pie chart for macronutrients
+    macronutrients = pd.DataFrame({
+        'Nutrient': ['Protein', 'Fat', 'Carbohydrates'],
+        'Amount': [
+            nutrition_info['protein'],
+            nutrition_info['fat'],
+            nutrition_info['carbs']
+        ]
+    })
+    
+    fig = px.pie(
+        macronutrients,
+        values='Amount',
+        names='Nutrient',
+        title="Macronutrient Distribution",
+        color_discrete_sequence=['#2E7D32', '#81C784', '#A5D6A7'],
+        hole=0.4  # Creates a donut chart
+    )
+    
+    # Update layout for better appearance
+    fig.update_traces(
+        textposition='inside',
+        textinfo='percent+label',
+        insidetextfont=dict(size=14, color='white'),
+        marker=dict(line=dict(color='white', width=2))
+    )
+    
+    fig.update_layout(
+        title_x=0.5,
+        title_font_size=20,
+        showlegend=True,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="center",
+            x=0.5
+        )
+    )
+    
+    return {
+        'dish': food_name,
+        'nutrition': nutrition_info,
+        'impacts': assess_health_impact(nutrition_info),
+        'figure': fig.to_dict()
+    }
+
+def show_food_analysis(result):
+    nutrition_info = result['nutrition']
+    if not nutrition_info:
+        st.warning("Nutritional information not available for this food item.")
+        return
+    
+    # Display nutrition info in a styled table
+    st.markdown("### 📊 Nutritional Information")
+    nutrition_df = pd.DataFrame([nutrition_info])
+    st.markdown("""
+    <style>
+    .nutrition-table {
+        background-color: rgba(255, 255, 255, 0.9);
+        border-radius: 10px;
+        padding: 20px;
+        margin: 10px 0;
+    }
+    </style>
+    """, unsafe_allow_html=True)
+    st.markdown('<div class="nutrition-table">', unsafe_allow_html=True)
+    st.dataframe(nutrition_df, use_container_width=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    st.plotly_chart(result['figure'], use_container_width=True)
+    
+    # Health Impact Assessment
+    st.markdown("### 🏥 Health Impact Assessment")
+    
+    # Display health impacts with color coding
+    for impact, details in result['impacts'].items():
+        impact_class = "positive" if "positive" in details.lower() else "caution" if "moderate" in details.lower() else "negative"
+        st.markdown(f"""
+        <div class="impact-item {impact_class}">
+            <h4 style='margin: 0;'>{impact}</h4>
+            <p style='margin: 5px 0;'>{details}</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+def recognize_and_analyze(image_data):
+    # The recognizer's messages are kept with the result, so they are shown again when it is reused
+    messages = []
+    food_name = components['food_recognizer'].recognize_food(Image.open(io.BytesIO(image_data)), messages)
+    result = analyze_food(food_name) if food_name else {'dish': None}
+    result['messages'] = messages
+    return result
+
+@fragment
+def show_food_analyzer():
     st.subheader("🍽️ Food Analyzer")
     st.markdown(pastel_divider, unsafe_allow_html=True)
     
@@ -187,6 +311,10 @@ with food_tab:
     </div>
     """, unsafe_allow_html=True)
     
+    # Results are kept per session, so reruns caused by other widgets don't
+    # decode, recognize and chart the same upload or search again
+    memo = session_memo()
+    
     col1, col2 = st.columns([1, 1])
     
     with col1:
@@ -194,91 +322,19 @@ with food_tab:
         uploaded_file = st.file_uploader("Choose an image...", type=["jpg", "jpeg", "png"])
         
         if uploaded_file is not None:
-            image = Image.open(uploaded_file)
-            st.image(image, caption="Uploaded Food Image", use_column_width=True)
+            image_data = uploaded_file.getvalue()
+            st.image(image_data, caption="Uploaded Food Image", use_column_width=True)
             
-            # Get food recognition
-            food_name = components['food_recognizer'].recognize_food(image)
-            if food_name:
-                st.success(f"Recognized Food: {food_name}")
-                
-                # Get nutrition info
-                nutrition_info = get_nutrition_info(food_name)
-                if nutrition_info:
-                    # Display nutrition info in a styled table
-                    st.markdown("### 📊 Nutritional Information")
-                    nutrition_df = pd.DataFrame([nutrition_info])
-                    st.markdown("""
-                    <style>
-                    .nutrition-table {
-                        background-color: rgba(255, 255, 255, 0.9);
-                        border-radius: 10px;
-                        padding: 20px;
-                        margin: 10px 0;
-                    }
-                    </style>
-                    """, unsafe_allow_html=True)
-                    st.markdown('<div class="nutrition-table">', unsafe_allow_html=True)
-                    st.dataframe(nutrition_df, use_container_width=True)
-                    st.markdown('</div>', unsafe_allow_html=True)
-                    
-                    # Create pie chart for macronutrients
-                    macronutrients = pd.DataFrame({
-                        'Nutrient': ['Protein', 'Fat', 'Carbohydrates'],
-                        'Amount': [
-                            nutrition_info['protein'],
-                            nutrition_info['fat'],
-                            nutrition_info['carbs']
-                        ]
-                    })
-                    
-                    fig = px.pie(
-                        macronutrients,
-                        values='Amount',
-                        names='Nutrient',
-                        title="Macronutrient Distribution",
-                        color_discrete_sequence=['#2E7D32', '#81C784', '#A5D6A7'],
-                        hole=0.4  # Creates a donut chart
-                    )
-                    
-                    # Update layout for better appearance
-                    fig.update_traces(
-                        textposition='inside',
-                        textinfo='percent+label',
-                        insidetextfont=dict(size=14, color='white'),
-                        marker=dict(line=dict(color='white', width=2))
-                    )
-                    
-                    fig.update_layout(
-                        title_x=0.5,
-                        title_font_size=20,
-                        showlegend=True,
-                        legend=dict(
-                            orientation="h",
-                            yanchor="bottom",
-                            y=1.02,
-                            xanchor="center",
-                            x=0.5
-                        )
-                    )
-                    
-                    st.plotly_chart(fig, use_container_width=True)
-                    
-                    # Health Impact Assessment
-                    st.markdown("### 🏥 Health Impact Assessment")
-                    health_impact = assess_health_impact(nutrition_info)
-                    
-                    # Display health impacts with color coding
-                    for impact, details in health_impact.items():
-                        impact_class = "positive" if "positive" in details.lower() else "caution" if "moderate" in details.lower() else "negative"
-                        st.markdown(f"""
-                        <div class="impact-item {impact_class}">
-                            <h4 style='margin: 0;'>{impact}</h4>
-                            <p style='margin: 5px 0;'>{details}</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                else:
-                    st.warning("Nutritional information not available for this food item.")
+            # Get food recognition and nutrition info
+            result = memo.get_or_compute(
+                ('upload', hashlib.sha256(image_data).hexdigest()),
+                lambda: recognize_and_analyze(image_data)
+            )
+            for level, text in result['messages']:
+                getattr(st, level)(text)
+            if result['dish']:
+                st.success(f"Recognized Food: {result['dish']}")
+                show_food_analysis(result)
             else:
                 st.error("Could not recognize the food in the image. Please try another image or use text input.")
     
@@ -287,85 +343,16 @@ with food_tab:
         food_name = st.text_input("Enter food name")
         
         if food_name:
-            nutrition_info = get_nutrition_info(food_name)
-            if nutrition_info:
-                # Display nutrition info in a styled table
-                st.markdown("### 📊 Nutritional Information")
-                nutrition_df = pd.DataFrame([nutrition_info])
-                st.markdown("""
-                <style>
-                .nutrition-table {
-                    background-color: rgba(255, 255, 255, 0.9);
-                    border-radius: 10px;
-                    padding: 20px;
-                    margin: 10px 0;
-                }
-                </style>
-                """, unsafe_allow_html=True)
-                st.markdown('<div class="nutrition-table">', unsafe_allow_html=True)
-                st.dataframe(nutrition_df, use_container_width=True)
-                st.markdown('</div>', unsafe_allow_html=True)
-                
-                # Create pie chart for macronutrients
-                macronutrients = pd.DataFrame({
-                    'Nutrient': ['Protein', 'Fat', 'Carbohydrates'],
-                    'Amount': [
-                        nutrition_info['protein'],
-                        nutrition_info['fat'],
-                        nutrition_info['carbs']
-                    ]
-                })
-                
-                fig = px.pie(
-                    macronutrients,
-                    values='Amount',
-                    names='Nutrient',
-                    title="Macronutrient Distribution",
-                    color_discrete_sequence=['#2E7D32', '#81C784', '#A5D6A7'],
-                    hole=0.4  # Creates a donut chart
-                )
-                
-                # Update layout for better appearance
-                fig.update_traces(
-                    textposition='inside',
-                    textinfo='percent+label',
-                    insidetextfont=dict(size=14, color='white'),
-                    marker=dict(line=dict(color='white', width=2))
-                )
-                
-                fig.update_layout(
-                    title_x=0.5,
-                    title_font_size=20,
-                    showlegend=True,
-                    legend=dict(
-                        orientation="h",
-                        yanchor="bottom",
-                        y=1.02,
-                        xanchor="center",
-                        x=0.5
-                    )
-                )
-                
-                st.plotly_chart(fig, use_container_width=True)
-                
-                # Health Impact Assessment
-                st.markdown("### 🏥 Health Impact Assessment")
-                health_impact = assess_health_impact(nutrition_info)
-                
-                # Display health impacts with color coding
-                for impact, details in health_impact.items():
-                    impact_class = "positive" if "positive" in details.lower() else "caution" if "moderate" in details.lower() else "negative"
-                    st.markdown(f"""
-                    <div class="impact-item {impact_class}">
-                        <h4 style='margin: 0;'>{impact}</h4>
-                        <p style='margin: 5px 0;'>{details}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-            else:
-                st.warning("Nutritional information not available for this food item.")
+            food_name = food_name.strip()
+            result = memo.get_or_compute(('search', food_name.lower()), lambda: analyze_food(food_name))
+            show_food_analysis(result)
+
+with food_tab:
+    show_food_analyzer()
 
 # AI-Based Food Innovation Tab
-with recipe_tab:
+@fragment
+def show_food_innovations():
     st.subheader("🧪 AI-Based Food Innovation")
     st.markdown(pastel_divider, unsafe_allow_html=True)
     
@@ -529,8 +516,20 @@ with recipe_tab:
         # Add a note about the innovation
         st.info("💡 This AI-suggested food innovation combines traditional ingredients with modern nutritional science to create healthier alternatives to conventional foods.")
 
+with recipe_tab:
+    show_food_innovations()
+
+def show_calorie_warning(calorie_deviation, daily_calories, period):
+    # The planner falls back on meals outside their calorie share when nothing closer is left
+    direction = "below" if calorie_deviation < 0 else "above"
+    st.warning(
+        f"Some meals miss their calorie share by more than 10%, as the suitable foods allow nothing closer. "
+        f"The plan is {abs(calorie_deviation):.0f} calories {direction} your {daily_calories} calorie target {period}."
+    )
+
 # Disease-Specific Diets Tab
-with disease_tab:
+@fragment
+def show_disease_diets():
     st.subheader("🩺 Disease-Specific Diets")
     st.markdown(pastel_divider, unsafe_allow_html=True)
     
@@ -718,11 +717,13 @@ with disease_tab:
         "arthritis": "Arthritis"
     }
     
-    selected_disease = st.selectbox(
-        "Select a health condition",
+    selected_diseases = st.multiselect(
+        "Select your health conditions",
         diseases,
+        default=["diabetes"],
         format_func=lambda x: disease_names[x]
     )
+    selected_names = " + ".join(disease_names[disease] for disease in selected_diseases)
     
     # Get daily calorie target
     daily_calories = st.slider(
@@ -733,20 +734,74 @@ with disease_tab:
         step=100
     )
     
-    if st.button("Generate Diet Plan"):
-        diet_plan = components['disease_recommender'].get_diet_plan(selected_disease, daily_calories)
+    plan_days = st.radio(
+        "Plan length",
+        [1, 7],
+        format_func=lambda days: "1 day" if days == 1 else "1 week",
+        horizontal=True
+    )
+    
+    generate_plan = st.button("Generate Diet Plan")
+    
+    if generate_plan and not selected_diseases:
+        st.warning("Please select at least one health condition.")
+    elif generate_plan and plan_days > 1:
+        weekly_plan = components['disease_recommender'].get_weekly_plan(selected_diseases, daily_calories, days=plan_days)
         
-        if diet_plan and 'description' in diet_plan:
-            st.subheader(f"Diet Plan for {disease_names[selected_disease]}")
+        if weekly_plan['days']:
+            st.subheader(f"Weekly Diet Plan for {selected_names}")
+            st.info(weekly_plan['description'])
+            if not weekly_plan['within_tolerance']:
+                show_calorie_warning(weekly_plan['calorie_deviation'], daily_calories, "a day on average")
+            
+            for day, day_plan in enumerate(weekly_plan['days'], 1):
+                with st.expander(f"Day {day} ({day_plan['nutritional_summary']['calories']:.0f} calories)"):
+                    st.dataframe(pd.DataFrame([
+                        {
+                            'Meal': meal_type.title(),
+                            'Foods': ", ".join(
+                                food + (f" (x{servings})" if servings > 1 else "")
+                                for food, servings in zip(meal_info['foods'], meal_info['servings'])
+                            ),
+                            'Calories': round(meal_info['nutrition']['calories']),
+                            'Protein': round(meal_info['nutrition']['protein'], 1),
+                            'Fat': round(meal_info['nutrition']['fat'], 1),
+                            'Carbs': round(meal_info['nutrition']['carbs'], 1)
+                        }
+                        for meal_type, meal_info in day_plan['meals'].items()
+                    ]), use_container_width=True)
+            
+            # Display nutritional summary
+            st.subheader("Average Daily Nutrition")
+            summary = weekly_plan['nutritional_summary']
+            col1, col2, col3, col4 = st.columns(4)
+            
+            with col1:
+                st.metric("Calories", f"{summary['calories']:.0f}")
+            with col2:
+                st.metric("Protein", f"{summary['protein']:.1f}g")
+            with col3:
+                st.metric("Fat", f"{summary['fat']:.1f}g")
+            with col4:
+                st.metric("Carbs", f"{summary['carbs']:.1f}g")
+        else:
+            st.error("Could not generate diet plan. Please try again.")
+    elif generate_plan:
+        diet_plan = components['disease_recommender'].get_diet_plan(selected_diseases, daily_calories)
+        
+        if diet_plan['meals']:
+            st.subheader(f"Diet Plan for {selected_names}")
             st.info(diet_plan['description'])
+            if not diet_plan['within_tolerance']:
+                show_calorie_warning(diet_plan['calorie_deviation'], daily_calories, "in total")
             
             # Display meals
             st.subheader("Daily Meal Plan")
             for meal_type, meal_info in diet_plan['meals'].items():
-                with st.expander(f"{meal_type.title()} ({int(daily_calories * components['disease_recommender'].meal_types[meal_type])} calories)"):
+                with st.expander(f"{meal_type.title()} ({int(meal_info['target_calories'])} calories)"):
                     st.write("Foods:")
-                    for food in meal_info['foods']:
-                        st.write(f"- {food}")
+                    for food, servings in zip(meal_info['foods'], meal_info['servings']):
+                        st.write(f"- {food}" + (f" ({servings} servings)" if servings > 1 else ""))
                     
                     st.write("Nutritional Information:")
                     col1, col2, col3, col4 = st.columns(4)
@@ -772,16 +827,41 @@ with disease_tab:
                 st.metric("Total Fat", f"{summary['fat']:.1f}g")
             with col4:
                 st.metric("Total Carbs", f"{summary['carbs']:.1f}g")
-            
-            # Display suitable foods
-            st.subheader("Suitable Foods")
-            suitable_foods = components['disease_recommender'].get_suitable_foods(selected_disease)
-            st.dataframe(suitable_foods[['Food', 'Calories', 'Protein', 'Fat', 'Carbs']])
         else:
             st.error("Could not generate diet plan. Please try again.")
+    
+    # Display suitable foods, best first
+    if selected_diseases:
+        st.subheader("Suitable Foods")
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            calorie_range = st.slider("Calories per 100 g", min_value=0, max_value=900, value=(0, 900), step=10)
+        with col2:
+            page = st.number_input("Page", min_value=1, value=1, step=1)
+        
+        suitable_foods, total = components['disease_recommender'].rank_foods(
+            selected_diseases, page=int(page), page_size=20, calorie_range=calorie_range
+        )
+        st.dataframe(suitable_foods[['Food', 'Suitability', 'Calories', 'Protein', 'Fat', 'Carbs', 'Sugar', 'Fibre', 'Sodium']])
+        st.caption(f"Page {int(page)} of {max(1, -(-total // 20))} ({total} foods meet every criterion for {selected_names})")
+        
+        # Foods that miss a limit are kept apart, with the limits they miss
+        near_misses, near_miss_total = components['disease_recommender'].rank_foods(
+            selected_diseases, page_size=20, calorie_range=calorie_range, near_misses=True
+        )
+        with st.expander(f"Close matches that miss a limit ({near_miss_total} foods)"):
+            st.dataframe(near_misses[['Food', 'Suitability', 'Misses', 'Calories', 'Protein', 'Fat', 'Carbs', 'Sugar', 'Fibre', 'Sodium']])
+            st.caption(
+                f"Each food's suitability is lowered by {components['disease_recommender'].violation_penalty:g} "
+                "for every 100% it is past a limit, e.g. by 1 for sugar at 7.5 g against a limit of 5 g."
+            )
+
+with disease_tab:
+    show_disease_diets()
 
 # Healthier Alternatives Tab
-with alt_tab:
+@fragment
+def show_healthier_alternatives():
     st.subheader("🥗 Healthier Alternatives")
     st.markdown(pastel_divider, unsafe_allow_html=True)
     
@@ -789,91 +869,80 @@ with alt_tab:
     food_name = st.text_input("Enter a food item to find healthier alternatives")
     
     if food_name:
-        alternatives = components['healthy_alternatives'].get_alternatives(food_name)
-        if alternatives is not None:
-            # Convert list to DataFrame if needed
-            if isinstance(alternatives, list):
-                if not alternatives:  # Check if list is empty
-                    st.error("Could not find healthier alternatives for this food.")
-                else:
-                    # Convert list to DataFrame
-                    alternatives_df = pd.DataFrame(alternatives)
-                    st.subheader("Healthier Alternatives")
-                    st.dataframe(alternatives_df)
-                    
-                    # Create comparison chart
-                    try:
-                        # Ensure column names match the DataFrame
-                        if 'name' in alternatives_df.columns:
-                            x_column = 'name'
-                        elif 'Food' in alternatives_df.columns:
-                            x_column = 'Food'
-                        else:
-                            st.error("Could not find food name column in the data")
-                            x_column = None
-                        
-                        if x_column:
-                            fig = px.bar(
-                                alternatives_df,
-                                x=x_column,
-                                y=['Calories', 'Protein', 'Fat', 'Carbs'],
-                                title="Nutritional Comparison",
-                                barmode='group',
-                                color_discrete_sequence=['#FF6B6B', '#B8E0D2', '#95C9B9', '#F8E8E8']
-                            )
-                            st.plotly_chart(fig)
-                    except Exception as e:
-                        st.error(f"Error creating comparison chart: {str(e)}")
-            else:
-                # Handle DataFrame case
-                if not alternatives.empty:
-                    st.subheader("Healthier Alternatives")
-                    st.dataframe(alternatives)
-                    
-                    # Create comparison chart
-                    try:
-                        # Ensure column names match the DataFrame
-                        if 'name' in alternatives.columns:
-                            x_column = 'name'
-                        elif 'Food' in alternatives.columns:
-                            x_column = 'Food'
-                        else:
-                            st.error("Could not find food name column in the data")
-                            x_column = None
-                        
-                        if x_column:
-                            fig = px.bar(
-                                alternatives,
-                                x=x_column,
-                                y=['Calories', 'Protein', 'Fat', 'Carbs'],
-                                title="Nutritional Comparison",
-                                barmode='group',
-                                color_discrete_sequence=['#FF6B6B', '#B8E0D2', '#95C9B9', '#F8E8E8']
-                            )
-                            st.plotly_chart(fig)
-                    except Exception as e:
-                        st.error(f"Error creating comparison chart: {str(e)}")
-                else:
-                    st.error("Could not find healthier alternatives for this food.")
-        else:
+        comparison = components['healthy_alternatives'].get_comparison(food_name)
+        alternatives_df = comparison[comparison['role'] == 'alternative']
+        if alternatives_df.empty:
             st.error("Could not find healthier alternatives for this food.")
+        else:
+            st.subheader("Healthier Alternatives")
+            st.dataframe(alternatives_df.drop(columns=['role']).dropna(axis=1, how='all'))
+            
+            # Compare each group of alternatives with the original on the same basis
+            try:
+                for basis, group in comparison.groupby('basis', sort=False):
+                    fig = px.bar(
+                        group,
+                        x='name',
+                        y=['Calories', 'Protein', 'Fat', 'Carbs'],
+                        title=f"Nutritional Comparison ({basis})",
+                        barmode='group',
+                        color_discrete_sequence=['#FF6B6B', '#B8E0D2', '#95C9B9', '#F8E8E8']
+                    )
+                    st.plotly_chart(fig)
+            except Exception as e:
+                st.error(f"Error creating comparison chart: {str(e)}")
 
+with alt_tab:
+    show_healthier_alternatives()
+
+def complete_ingredient(entered, completion):
+    # Runs before the rerun, so the text input can still be changed
+    st.session_state['recipe_ingredients'] = ', '.join(entered + [completion]) + ', '
+
+@fragment
 def show_recipe_generator():
     st.subheader("AI Recipe Generator")
     st.write("Get personalized recipe suggestions based on your available ingredients!")
+    index = components['ingredient_index']
     
     # Get user input
-    ingredients = st.text_input("Enter ingredients (comma-separated):")
+    ingredients = st.text_input("Enter ingredients (comma-separated):", key='recipe_ingredients')
+    
+    # Suggest completions for the ingredient being typed
+    *entered, partial = ingredients.split(',')
+    completions = index.complete(partial) if partial.strip() else []
+    if completions and index.canonical_names.get(normalize_term(partial)) != completions[0][0]:
+        columns = st.columns(len(completions))
+        for column, (canonical, matched) in zip(columns, completions):
+            label = canonical if matched == canonical else f"{canonical} ({matched})"
+            column.button(label, key=f"suggest_{canonical}", on_click=complete_ingredient,
+                          args=([name.strip() for name in entered if name.strip()], canonical))
+    
     cuisine = st.selectbox("Select cuisine type:", ["Indian", "Italian", "Chinese", "Mexican", "Mediterranean"])
     
-    if st.button("Generate Recipe"):
-        if ingredients:
+    col1, col2 = st.columns(2)
+    with col1:
+        generate = st.button("Generate Recipe")
+    with col2:
+        surprise = st.button("Surprise Me ✨", help="Ask the AI for a more creative recipe (takes a few seconds)")
+    
+    if generate or surprise:
+        # Spell every ingredient the way the recipes and cache do
+        ingredient_list, changed = index.normalize(ingredients)
+        if ingredient_list:
+            if changed:
+                st.caption("Using " + ", ".join(f"{canonical} for \"{name}\"" for name, canonical in changed.items()))
+            # Show an AI response as it streams in, then replace it with the formatted recipe
+            preview = st.empty()
             with st.spinner("Generating your recipe..."):
                 try:
-                    recipe = components['recipe_generator'].generate_recipe(
-                        ingredients=[i.strip() for i in ingredients.split(',')],
-                        cuisine=cuisine
+                    recipe = components['recipe_generator'].stream_recipe(
+                        ingredients=ingredient_list,
+                        cuisine=cuisine,
+                        on_text=lambda text: preview.code(text, language='json'),
+                        surprise=surprise
                     )
+                    preview.empty()
                     
                     if isinstance(recipe, str):
                         try:
@@ -884,6 +953,8 @@ def show_recipe_generator():
                     
                     # Display recipe
                     st.success("Here's your personalized recipe!")
+                    if recipe.get('incomplete'):
+                        st.info("The recipe was cut short, so some steps may be missing.")
                     
                     # Recipe name
                     st.markdown(f"### {recipe['name']}")
@@ -910,6 +981,12 @@ def show_recipe_generator():
                         st.metric("Carbs", f"{nutrition.get('carbs', 'N/A')}g")
                     with col4:
                         st.metric("Fat", f"{nutrition.get('fat', 'N/A')}g")
+                    if 'servings' in recipe:
+                        st.caption(f"Per serving (serves {recipe['servings']}), computed from the ingredient quantities"
+                                   f" · Fibre {nutrition.get('fibre', 'N/A')}g · Sugar {nutrition.get('sugar', 'N/A')}g"
+                                   f" · Sodium {nutrition.get('sodium', 'N/A')}mg")
+                    if recipe.get('unmatched_ingredients'):
+                        st.caption(f"Not counted: {', '.join(recipe['unmatched_ingredients'])}")
                     
                     # Health benefits
                     st.markdown("#### Health Benefits:")
@@ -920,3 +997,7 @@ def show_recipe_generator():
                     st.error(f"Error generating recipe: {str(e)}")
         else:
             st.warning("Please enter at least one ingredient.")
+
+with recipe_tab:
+    st.markdown(pastel_divider, unsafe_allow_html=True)
+    show_recipe_generator()
@@ -0,0 +1,190 @@
+import atexit
+import os
+import queue
+import threading
+from typing import Callable, Dict, List, Optional
+
+import torch
+import torch.multiprocessing as mp
+from PIL import Image
+
+
+def _serve(model_factory: Callable[[], torch.nn.Module], state_dict: Dict[str, torch.Tensor],
+           inputs: torch.Tensor, outputs: torch.Tensor, requests, results, num_threads: int):
+    """
+    Worker loop: run the model on batches placed in shared memory
+
+    Args:
+        model_factory (Callable): Builds the model architecture
+        state_dict (Dict[str, torch.Tensor]): Weights living in shared memory
+        inputs (torch.Tensor): Shared input slots of shape (slots, max_batch, 3, H, W)
+        outputs (torch.Tensor): Shared output slots of shape (slots, max_batch, num_outputs)
+        requests: Queue of (slot, batch_size) work items, None to stop
+        results: Queue receiving (slot, error message or None)
+        num_threads (int): Intra-op thread budget for this worker
+    """
+    torch.set_num_threads(num_threads)
+
+    # assign=True keeps the shared-memory tensors instead of copying them
+    model = model_factory()
+    model.load_state_dict(state_dict, assign=True)
+    model.eval()
+
+    while True:
+        item = requests.get()
+        if item is None:
+            break
+        slot, batch_size = item
+        try:
+            with torch.inference_mode():
+                outputs[slot, :batch_size].copy_(model(inputs[slot, :batch_size]))
+            results.put((slot, None))
+        except Exception as e:
+            results.put((slot, str(e)))
+
+
+class ModelServerPool:
+    def __init__(self, model: torch.nn.Module, model_factory: Callable[[], torch.nn.Module],
+                 num_workers: int = 2, threads_per_worker: Optional[int] = None,
+                 max_batch: int = 8, image_size: int = 224, num_outputs: int = 1000,
+                 start_method: str = 'spawn', timeout: float = 60.0):
+        """
+        Serve model inference from a pool of worker processes
+
+        Workers share the model weights and their input/output buffers with this
+        process through shared memory, so only slot numbers cross the process
+        boundary. Keeping torch off the Streamlit process frees it to serve the UI.
+
+        Args:
+            model (torch.nn.Module): Loaded model whose weights the workers will share
+            model_factory (Callable): Builds the same architecture without weights
+                (must be picklable, e.g. torchvision.models.resnet50)
+            num_workers (int): Number of worker processes
+            threads_per_worker (int, optional): torch thread budget per worker.
+                Defaults to splitting the CPU cores evenly between workers.
+            max_batch (int): Maximum number of images per request slot
+            image_size (int): Height and width of the preprocessed images
+            num_outputs (int): Size of the model output per image
+            start_method (str): 'spawn' (safe with Streamlit's threads) or 'fork'
+            timeout (float): Seconds to wait for a worker before giving up
+        """
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self.num_slots = num_workers * 2
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // num_workers)
+
+        # Move the weights into shared memory in place, so this process holds no extra copy
+        model.share_memory()
+        state_dict = model.state_dict()
+
+        self.inputs = torch.empty((self.num_slots, max_batch, 3, image_size, image_size)).share_memory_()
+        self.outputs = torch.empty((self.num_slots, max_batch, num_outputs)).share_memory_()
+
+        context = mp.get_context(start_method)
+        self._requests = context.Queue()
+        self._results = context.Queue()
+        self._workers = [
+            context.Process(
+                target=_serve,
+                args=(model_factory, state_dict, self.inputs, self.outputs,
+                      self._requests, self._results, self.threads_per_worker),
+                daemon=True
+            )
+            for _ in range(num_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+        # Slots are handed out to callers and returned once their results are read
+        self._free_slots = queue.Queue()
+        for slot in range(self.num_slots):
+            self._free_slots.put(slot)
+        self._done = [threading.Event() for _ in range(self.num_slots)]
+        self._errors: List[Optional[str]] = [None] * self.num_slots
+        # Slots given up on after a timeout, returned once their late result arrives
+        self._abandoned = set()
+        self._slots_lock = threading.Lock()
+
+        self._closed = False
+        self._collector = threading.Thread(target=self._collect_results, daemon=True)
+        self._collector.start()
+        atexit.register(self.close)
+
+    def _collect_results(self):
+        """Wake up the caller waiting on each finished slot, or reclaim an abandoned one"""
+        while True:
+            item = self._results.get()
+            if item is None:
+                break
+            slot, error = item
+            with self._slots_lock:
+                if slot in self._abandoned:
+                    # Its worker is done with it now, so it is safe to hand out again
+                    self._abandoned.discard(slot)
+                    self._free_slots.put(slot)
+                    continue
+                self._errors[slot] = error
+                self._done[slot].set()
+
+    def _run_slot(self, slot: int, batch_size: int) -> torch.Tensor:
+        """Dispatch a filled slot to the workers and wait for its outputs"""
+        self._done[slot].clear()
+        self._requests.put((slot, batch_size))
+        if not self._done[slot].wait(self.timeout):
+            raise TimeoutError("Model server did not respond in time")
+        if self._errors[slot] is not None:
+            raise RuntimeError(f"Model server error: {self._errors[slot]}")
+        return self.outputs[slot, :batch_size].clone()
+
+    def predict(self, images: List[Image.Image], preprocess) -> torch.Tensor:
+        """
+        Run the model on a list of images
+
+        Args:
+            images (List[PIL.Image]): Input images
+            preprocess (ImagePreprocessor): Writes the images into a shared input slot
+
+        Returns:
+            torch.Tensor: Model outputs of shape (len(images), num_outputs)
+
+        Raises:
+            TimeoutError: If no slot came free, or the workers did not answer, within timeout
+        """
+        if self._closed:
+            raise RuntimeError("Model server pool has been closed")
+
+        try:
+            slot = self._free_slots.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError("Model server is busy; no request slot came free in time")
+        try:
+            outputs = []
+            for start in range(0, len(images), self.max_batch):
+                chunk = images[start:start + self.max_batch]
+                preprocess(chunk, out=self.inputs[slot])
+                outputs.append(self._run_slot(slot, len(chunk)))
+            return torch.cat(outputs)
+        except TimeoutError:
+            # A worker may still write into this slot, so it is only handed out
+            # again once the collector sees its result
+            with self._slots_lock:
+                if not self._done[slot].is_set():
+                    self._abandoned.add(slot)
+                    slot = None
+            raise
+        finally:
+            if slot is not None:
+                self._free_slots.put(slot)
+
+    def close(self):
+        """Stop the worker processes"""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._workers:
+            self._requests.put(None)
+        for worker in self._workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+        self._results.put(None)
@@ -14,7 +14,7 @@ def load_nutrition_data() -> pd.DataFrame:
     The function:
     1. Loads the CSV file
     2. Removes rows with null values
-    3. Standardizes columns: 'Calories', 'Protein', 'Fat', 'Carbs'
+    3. Standardizes columns: 'Calories', 'Protein', 'Fat', 'Carbs', 'Sugar', 'Fibre', 'Sodium'
     4. Renames columns to match standard format
     """
     try:
@@ -31,19 +31,22 @@ def load_nutrition_data() -> pd.DataFrame:
             'Calories (kcal)': 'Calories',
             'Protein (g)': 'Protein',
             'Fats (g)': 'Fat',
-            'Carbohydrates (g)': 'Carbs'
+            'Carbohydrates (g)': 'Carbs',
+            'Free Sugar (g)': 'Sugar',
+            'Fibre (g)': 'Fibre',
+            'Sodium (mg)': 'Sodium'
         }
         df = df.rename(columns=column_mapping)
         
         # Select only the columns we need
-        columns_to_keep = ['Food', 'Calories', 'Protein', 'Fat', 'Carbs']
+        columns_to_keep = ['Food', 'Calories', 'Protein', 'Fat', 'Carbs', 'Sugar', 'Fibre', 'Sodium']
         df = df[columns_to_keep]
         
         # Remove rows with null values
         df = df.dropna()
         
         # Convert numeric columns to float
-        numeric_columns = ['Calories', 'Protein', 'Fat', 'Carbs']
+        numeric_columns = ['Calories', 'Protein', 'Fat', 'Carbs', 'Sugar', 'Fibre', 'Sodium']
         for col in numeric_columns:
             df[col] = pd.to_numeric(df[col], errors='coerce')
         
@@ -62,7 +65,10 @@ def load_nutrition_data() -> pd.DataFrame:
             'Calories': [39, 133, 90, 150, 250],
             'Protein': [1.9, 3.7, 4.5, 4.0, 6.0],
             'Fat': [0.2, 3.9, 2.0, 3.0, 2.0],
-            'Carbs': [7.8, 22.0, 12.0, 25.0, 45.0]
+            'Carbs': [7.8, 22.0, 12.0, 25.0, 45.0],
+            'Sugar': [0.1, 0.6, 1.5, 1.0, 1.2],
+            'Fibre': [0.8, 1.0, 2.5, 1.5, 1.3],
+            'Sodium': [130.0, 250.0, 300.0, 280.0, 320.0]
         })
 
 def get_nutrition_info(food_name: str) -> dict:
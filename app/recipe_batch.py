@@ -0,0 +1,203 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, Iterable, Iterator, Set
+
+
+def read_requests(path: str) -> Iterator[Dict]:
+    """
+    Read recipe requests from a JSONL file
+
+    Each line needs ingredients, as a list or a comma-separated string. The
+    fields id and cuisine are optional; ids default to the line number.
+
+    Lines that aren't JSON objects, or whose fields can't be used, are still
+    yielded, with an error saying what is wrong, so they end up as error
+    records in the output.
+
+    Args:
+        path (str): Path to a .jsonl file
+
+    Yields:
+        Dict: Request with id, ingredients and cuisine, plus error for an
+        invalid line
+    """
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield {'id': str(line_number), 'ingredients': [], 'cuisine': 'Indian',
+                       'error': f"line {line_number} is not valid JSON ({e.msg})"}
+                continue
+            if not isinstance(row, dict):
+                yield {'id': str(line_number), 'ingredients': [], 'cuisine': 'Indian',
+                       'error': f"line {line_number} is not a JSON object"}
+                continue
+
+            request = {'id': str(row.get('id') or line_number), 'ingredients': [],
+                       'cuisine': row.get('cuisine') or 'Indian'}
+            errors = []
+            ingredients = row.get('ingredients', [])
+            if isinstance(ingredients, str):
+                ingredients = ingredients.split(',')
+            if isinstance(ingredients, list) and all(isinstance(ingredient, str) for ingredient in ingredients):
+                request['ingredients'] = [ingredient.strip() for ingredient in ingredients if ingredient.strip()]
+            else:
+                errors.append(f"ingredients {ingredients!r} is not a list of ingredient names")
+            if not isinstance(request['cuisine'], str):
+                errors.append(f"cuisine {request['cuisine']!r} is not a cuisine name")
+                request['cuisine'] = 'Indian'
+            if errors:
+                request['error'] = '; '.join(errors)
+            yield request
+
+
+def resume_output(path: str) -> Set[str]:
+    """
+    Prepare an earlier, possibly interrupted, run's output for appending
+
+    Only complete recipes are kept. Failed or incomplete ones are dropped,
+    since they are retried and their new results appended, so the output
+    holds one record per request. A last line cut short by a crash is
+    dropped too, so the next record starts on a line of its own.
+
+    Args:
+        path (str): Output JSONL of the earlier run
+
+    Returns:
+        Set[str]: Ids of the requests with a complete recipe
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    kept = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if 'error' not in result and not result['recipe'].get('incomplete'):
+                done.add(result['id'])
+                kept.append(line if line.endswith('\n') else line + '\n')
+
+    # Rewrite through a temporary file, so a crash here can't lose the finished recipes
+    temporary = path + '.tmp'
+    with open(temporary, 'w', encoding='utf-8') as f:
+        f.writelines(kept)
+    os.replace(temporary, path)
+    return done
+
+
+def _generate(generator, request: Dict) -> Dict:
+    """Generate one recipe on a worker thread, reporting failures instead of falling back"""
+    result = dict(request)
+    if 'error' in request:
+        return result
+    start = time.monotonic()
+    try:
+        if not request['ingredients']:
+            raise ValueError("No ingredients")
+        result['recipe'] = generator.request_recipe(request['ingredients'], request['cuisine'])
+    except Exception as e:
+        result['error'] = str(e) or type(e).__name__
+    result['seconds'] = round(time.monotonic() - start, 3)
+    return result
+
+
+async def generate_recipes(generator, requests: Iterable[Dict], concurrency: int = 8) -> AsyncIterator[Dict]:
+    """
+    Generate AI recipes for many requests concurrently
+
+    Up to concurrency requests are in flight at once. Cached recipes are
+    returned without an API call, identical requests share one call, and the
+    generator's rate limiter still applies.
+
+    Args:
+        generator (RecipeGenerator): Generator with an API key
+        requests (Iterable[Dict]): Requests as produced by read_requests
+        concurrency (int): Requests in flight at once
+
+    Yields:
+        Dict: Request with its recipe or an error, in completion order
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    # The OpenAI client is synchronous, so each request runs on a pool thread
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='recipe-batch') as executor:
+        async def run(request: Dict) -> Dict:
+            async with semaphore:
+                return await loop.run_in_executor(executor, _generate, generator, request)
+
+        tasks = [asyncio.ensure_future(run(request)) for request in requests]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+async def _run(args):
+    from llm_client import RequestLimiter
+    from recipe_generator import RecipeGenerator
+
+    generator = RecipeGenerator()
+    if not generator.is_api_available:
+        sys.exit("Batch recipe generation needs an OpenAI API key")
+    # Size the limiter for the batch instead of the app's defaults
+    generator.client.limiter = RequestLimiter(args.concurrency, args.tokens_per_minute)
+
+    requests = list(read_requests(args.requests))
+    done = resume_output(args.output) if args.output and not args.restart else set()
+    pending = [request for request in requests if request['id'] not in done]
+    if done:
+        print(f"Resuming: {len(requests) - len(pending)} of {len(requests)} recipes already done", file=sys.stderr)
+
+    # Append, so an interrupted run can be resumed from the same file
+    output = open(args.output, 'w' if args.restart else 'a', encoding='utf-8') if args.output else sys.stdout
+    failed = 0
+    metrics = generator.client.metrics
+    calls = metrics.totals['calls']
+    start = time.monotonic()
+    try:
+        async for result in generate_recipes(generator, pending, args.concurrency):
+            failed += 'error' in result
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed = max(time.monotonic() - start, 1e-9)
+    # Cached and coalesced requests make no API call of their own
+    print(f"{len(pending)} recipes ({metrics.totals['calls'] - calls} API calls, {failed} failed) in {elapsed:.1f}s "
+          f"at {len(pending) / elapsed:.1f} recipes/s with concurrency {args.concurrency}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate AI recipes for many ingredient combinations")
+    parser.add_argument('requests', help="JSONL with {\"id\": ..., \"ingredients\": [...], \"cuisine\": ...} per line")
+    parser.add_argument('-o', '--output', help="Output JSONL; rerunning with the same file resumes. Defaults to stdout")
+    parser.add_argument('--concurrency', type=int, default=8, help="Requests in flight at once")
+    parser.add_argument('--tokens-per-minute', type=int, default=90000, help="Token budget for the OpenAI API")
+    parser.add_argument('--restart', action='store_true', help="Overwrite the output instead of resuming")
+    args = parser.parse_args()
+
+    # Outside an app, the generator's Streamlit messages only turn into log noise
+    logging.disable(logging.WARNING)
+
+    asyncio.run(_run(args))
+
+
+if __name__ == '__main__':
+    main()
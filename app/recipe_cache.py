@@ -0,0 +1,232 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'recipes.sqlite3')
+
+
+def normalize_ingredients(ingredients: Iterable[str]) -> List[str]:
+    """Casefold, trim and deduplicate ingredients, in sorted order"""
+    return sorted({' '.join(ingredient.casefold().split()) for ingredient in ingredients if ingredient.strip()})
+
+
+class RecipeCache:
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_entries: int = 5000,
+                 max_bytes: int = 50 * 1024 * 1024, ttl: float = 30 * 24 * 3600):
+        """
+        Persistent cache of generated recipes in SQLite
+
+        Entries are evicted least recently used first once the cache holds more
+        than max_entries recipes or max_bytes of recipe JSON, and expire ttl
+        seconds after they were generated. Lookups are a primary-key read, and
+        the last-access time is only written back once a minute per entry, so
+        hits stay well under a millisecond.
+
+        Args:
+            path (str): SQLite database file; its directory is created if needed
+            max_entries (int): Maximum number of cached recipes
+            max_bytes (int): Maximum total size of the cached recipe JSON
+            ttl (float): Seconds a recipe stays valid
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.touch_interval = 60.0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # One connection shared by Streamlit's session threads, guarded by a lock
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS recipes (
+                key TEXT PRIMARY KEY,
+                ingredients TEXT NOT NULL,
+                cuisine TEXT NOT NULL,
+                recipe TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS recipes_accessed ON recipes (accessed)")
+
+    @staticmethod
+    def make_key(ingredients: Iterable[str], cuisine: str, model: str,
+                 prompt_version: int, temperature: float) -> str:
+        """
+        Cache key for a recipe request
+
+        The same ingredients in any order, case or spacing give the same key.
+        Temperatures are bucketed to one decimal, since nearby values give
+        equally varied recipes.
+        """
+        request = {
+            'ingredients': normalize_ingredients(ingredients),
+            'cuisine': cuisine.casefold().strip(),
+            'model': model,
+            'prompt_version': prompt_version,
+            'temperature': round(temperature, 1)
+        }
+        return hashlib.sha256(json.dumps(request, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up a cached recipe
+
+        Args:
+            key (str): Key from make_key
+
+        Returns:
+            Dict: The recipe, or None if it is missing or expired
+        """
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT recipe, created, accessed FROM recipes WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                # Expired rows stay until evicted, so their popularity still counts for warm-up
+                return None
+            if now - row[2] > self.touch_interval:
+                self._db.execute(
+                    "UPDATE recipes SET accessed = ?, hits = hits + 1 WHERE key = ?", (now, key)
+                )
+        return json.loads(row[0])
+
+    def put(self, key: str, recipe: Dict, ingredients: Iterable[str], cuisine: str):
+        """
+        Store a recipe, evicting the least recently used ones if the cache is full
+
+        Args:
+            key (str): Key from make_key
+            recipe (Dict): Generated recipe
+            ingredients (Iterable[str]): Ingredients the recipe was generated from
+            cuisine (str): Cuisine the recipe was generated for
+        """
+        value = json.dumps(recipe)
+        now = time.time()
+        with self._lock:
+            self._db.execute("""
+                INSERT INTO recipes (key, ingredients, cuisine, recipe, size, created, accessed, hits)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 1)
+                ON CONFLICT (key) DO UPDATE SET
+                    recipe = excluded.recipe, size = excluded.size,
+                    created = excluded.created, accessed = excluded.accessed
+            """, (key, json.dumps(normalize_ingredients(ingredients)), cuisine, value, len(value), now, now))
+            self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until both size limits hold"""
+        count, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM recipes").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        excess_count = max(0, count - self.max_entries)
+        excess_bytes = max(0, total - self.max_bytes)
+        victims = []
+        for key, size in self._db.execute("SELECT key, size FROM recipes ORDER BY accessed"):
+            if excess_count <= 0 and excess_bytes <= 0:
+                break
+            victims.append((key,))
+            excess_count -= 1
+            excess_bytes -= size
+        self._db.executemany("DELETE FROM recipes WHERE key = ?", victims)
+
+    def popular(self, limit: int = 50) -> List[Tuple[List[str], str]]:
+        """
+        Most requested ingredient combinations, including expired ones
+
+        Hits are counted at most once per touch interval, like access times.
+
+        Args:
+            limit (int): Maximum number of combinations
+
+        Returns:
+            List[Tuple[List[str], str]]: (ingredients, cuisine) pairs, most popular first
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT ingredients, cuisine FROM recipes ORDER BY hits DESC, accessed DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [(json.loads(ingredients), cuisine) for ingredients, cuisine in rows]
+
+    def stats(self) -> Dict:
+        """Number of entries, total size in bytes and number of expired entries"""
+        with self._lock:
+            count, total, expired = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(created < ?), 0) FROM recipes",
+                (time.time() - self.ttl,)
+            ).fetchone()
+        return {'entries': count, 'bytes': total, 'expired': expired}
+
+    def clear(self):
+        """Remove every cached recipe"""
+        with self._lock:
+            self._db.execute("DELETE FROM recipes")
+
+
+def warm_up(generator, combinations: Iterable[Tuple[List[str], str]]) -> int:
+    """
+    Generate recipes for combinations that are not cached yet
+
+    Args:
+        generator (RecipeGenerator): Generator whose cache should be filled
+        combinations: (ingredients, cuisine) pairs
+
+    Returns:
+        int: Number of recipes generated and cached; failed, incomplete and
+        fallback recipes are not cached and not counted
+    """
+    generated = 0
+    for ingredients, cuisine in combinations:
+        key = generator.cache_key(ingredients, cuisine)
+        if generator.cache.get(key) is None:
+            generator.generate_recipe(ingredients, cuisine, surprise=True)
+            generated += generator.cache.get(key) is not None
+    return generated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the recipe generation cache")
+    parser.add_argument('command', choices=['warm', 'stats', 'clear'])
+    parser.add_argument('--top', type=int, default=50, help="Refresh the N most requested combinations")
+    parser.add_argument('--file', help="JSON list of {\"ingredients\": [...], \"cuisine\": ...} to pre-generate")
+    args = parser.parse_args()
+
+    if args.command == 'stats':
+        print(json.dumps(RecipeCache().stats()))
+        return
+    if args.command == 'clear':
+        RecipeCache().clear()
+        return
+
+    from recipe_generator import RecipeGenerator
+
+    generator = RecipeGenerator()
+    if generator.cache is None or not generator.is_api_available:
+        sys.exit("Warm-up needs both the cache and an OpenAI API key")
+
+    combinations = generator.cache.popular(args.top)
+    if args.file:
+        with open(args.file, encoding='utf-8') as f:
+            combinations += [(item['ingredients'], item.get('cuisine', 'Indian')) for item in json.load(f)]
+
+    start = time.monotonic()
+    generated = warm_up(generator, combinations)
+    print(f"Generated {generated} of {len(combinations)} recipes in {time.monotonic() - start:.1f}s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,18 @@
 import openai
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional, Tuple
+import copy
 import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from dotenv import load_dotenv
-import json
 import streamlit as st
+from recipe_cache import RecipeCache
+from llm_client import CircuitOpenError, LLMClient, RequestLimiter
+from ingredient_nutrition import load_ingredient_nutrition
+from json_stream import JsonStreamParser
+from recipe_templates import TemplateRecipeEngine
 
 # Try to load environment variables, but don't fail if .env file doesn't exist
 try:
@@ -11,14 +20,181 @@ try:
 except Exception as e:
     st.warning("Environment variables not loaded. Some features might be limited.")
 
+# Streaming API calls run on this shared pool, so a slow completion occupies a
+# pool thread rather than a Streamlit script thread for longer than its deadline
+_stream_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('EATELLIGENCE_RECIPE_WORKERS', '8')),
+    thread_name_prefix='recipe-stream'
+)
+
+# Every session's OpenAI calls share one limit on calls in flight and tokens per minute
+_limiter = RequestLimiter(
+    max_concurrent=int(os.getenv('EATELLIGENCE_LLM_CONCURRENCY', '4')),
+    tokens_per_minute=int(os.getenv('EATELLIGENCE_LLM_TOKENS_PER_MINUTE', '90000'))
+)
+
+# Recipe requests in flight by cache key, so identical concurrent requests share
+# one OpenAI call. Guarded by _in_flight_lock, as is every _SharedCompletion.
+_in_flight_lock = threading.Lock()
+_in_flight_calls: Dict[str, Future] = {}
+_in_flight_streams: Dict[str, '_SharedCompletion'] = {}
+
+
+def _coalesce(key: str, call: Callable[[], dict], timeout: Optional[float] = None) -> dict:
+    """
+    Run call, unless one for the same key is already running; then wait for its result
+    
+    The caller that ran call gets its result; every other caller gets a copy
+    of its own, so one request changing its recipe doesn't change another's.
+    
+    Args:
+        key (str): Request key, e.g. the recipe cache key
+        call (Callable[[], dict]): Makes the request
+        timeout (float, optional): Seconds to wait for a request already running
+    
+    Raises:
+        TimeoutError: If the running request did not finish within timeout
+    """
+    with _in_flight_lock:
+        future = _in_flight_calls.get(key)
+        leader = future is None
+        if leader:
+            future = _in_flight_calls[key] = Future()
+    if not leader:
+        return copy.deepcopy(future.result(timeout=timeout))
+    
+    try:
+        result = call()
+        # Stored as a copy, so the leader changing its result can't race with followers copying it
+        future.set_result(copy.deepcopy(result))
+        return result
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _in_flight_lock:
+            del _in_flight_calls[key]
+        if not future.done():
+            # Stopped by something like a Streamlit rerun, which is no concern of the other waiters
+            future.set_exception(RuntimeError("Recipe request was interrupted"))
+
+
+class _SharedCompletion:
+    """
+    One streamed completion fanned out to every request waiting for it
+    
+    Requests that join late first receive the chunks they missed. Once the
+    last subscriber leaves, the completion is dropped from _in_flight_streams
+    and its background read stops.
+    """
+    
+    def __init__(self):
+        self.chunks = []
+        self.subscribers = []
+    
+    @classmethod
+    def join(cls, key: str) -> Tuple['_SharedCompletion', queue.Queue, bool]:
+        """Subscribe to the completion for key; returns (completion, queue, whether it is new)"""
+        with _in_flight_lock:
+            shared = _in_flight_streams.get(key)
+            leader = shared is None
+            if leader:
+                shared = _in_flight_streams[key] = cls()
+            subscriber = queue.Queue()
+            for chunk in shared.chunks:
+                subscriber.put(chunk)
+            shared.subscribers.append(subscriber)
+        return shared, subscriber, leader
+    
+    def leave(self, key: str, subscriber: queue.Queue):
+        with _in_flight_lock:
+            self.subscribers.remove(subscriber)
+            if not self.subscribers and _in_flight_streams.get(key) is self:
+                del _in_flight_streams[key]
+    
+    @property
+    def abandoned(self) -> bool:
+        with _in_flight_lock:
+            return not self.subscribers
+    
+    def publish(self, chunk: str):
+        with _in_flight_lock:
+            self.chunks.append(chunk)
+            for subscriber in self.subscribers:
+                subscriber.put(chunk)
+    
+    def finish(self, key: str, end: Optional[Exception]):
+        """Send the end of the stream, None or an exception, and stop accepting subscribers"""
+        with _in_flight_lock:
+            if _in_flight_streams.get(key) is self:
+                del _in_flight_streams[key]
+            for subscriber in self.subscribers:
+                subscriber.put(end)
+
+
+# Fields of a recipe as shown to the user, with the list fields as lists of strings
+RECIPE_LIST_FIELDS = ['ingredients', 'instructions', 'health_benefits']
+
+
+def validate_recipe(data, truncated: bool = False) -> dict:
+    """
+    Check a decoded recipe against the expected schema and salvage what arrived
+    
+    A recipe needs a name and ingredients. Newline-separated strings become
+    lists, list items that are objects become strings, and missing list fields
+    become empty lists. Recipes that were cut short or are missing fields are
+    marked with incomplete, so they are shown but not cached.
+    
+    Args:
+        data: Decoded JSON
+        truncated (bool): Whether the response ended before the JSON object did
+        
+    Returns:
+        dict: Recipe with name, servings (if given) and the list fields
+        
+    Raises:
+        ValueError: If the recipe has no name or no ingredients
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Recipe is not a JSON object")
+    
+    recipe = {}
+    if isinstance(data.get('name'), str) and data['name'].strip():
+        recipe['name'] = data['name'].strip()
+    if data.get('servings') is not None:
+        recipe['servings'] = data['servings']
+    for field in RECIPE_LIST_FIELDS:
+        value = data.get(field) or []
+        if isinstance(value, str):
+            value = value.splitlines()
+        if not isinstance(value, list):
+            value = [value]
+        items = [' '.join(str(part) for part in item.values()) if isinstance(item, dict) else str(item)
+                 for item in value if item is not None]
+        recipe[field] = [item.strip() for item in items if item.strip()]
+    
+    missing = [field for field in ['name'] + RECIPE_LIST_FIELDS if not recipe.get(field)]
+    if 'name' in missing or 'ingredients' in missing:
+        raise ValueError(f"Recipe is missing {' and '.join(missing[:2])}")
+    if missing or truncated:
+        recipe['incomplete'] = True
+    return recipe
+
+
 class RecipeGenerator:
     def __init__(self):
         """Initialize the recipe generator with OpenAI client"""
         load_dotenv()
         try:
-            api_key = st.secrets.get("OPENAI_API_KEY") or os.getenv("OPENAI_API_KEY")
+            try:
+                api_key = st.secrets.get("OPENAI_API_KEY")
+            except Exception:
+                # No secrets.toml, e.g. when run from a command-line tool
+                api_key = None
+            api_key = api_key or os.getenv("OPENAI_API_KEY")
             if api_key:
-                self.client = openai.OpenAI(api_key=api_key)
+                # OPENAI_BASE_URL can point at a compatible endpoint such as llm_stub_server.py
+                self.client = LLMClient(api_key=api_key, base_url=os.getenv("OPENAI_BASE_URL"), limiter=_limiter)
                 self.is_api_available = True
             else:
                 st.warning("OpenAI API key not found. Using fallback recipe generation.")
@@ -29,6 +205,30 @@ class RecipeGenerator:
             self.is_api_available = False
             self.client = None
         
+        # Generation settings; bump prompt_version whenever the prompt changes so
+        # cached recipes from the old prompt are no longer used
+        self.model = "gpt-3.5-turbo"
+        self.temperature = 0.7
+        self.max_tokens = 500
+        self.prompt_version = 2
+        # Ask for JSON mode (structured output); calls the provider turns it down for are retried without it
+        self.json_mode = os.getenv('EATELLIGENCE_JSON_MODE', '1') != '0'
+        # Seconds a streamed recipe may take before the fallback recipe is used
+        self.deadline = float(os.getenv('EATELLIGENCE_RECIPE_DEADLINE', '20'))
+        
+        try:
+            self.cache = RecipeCache()
+        except Exception as e:
+            st.warning(f"Recipe cache unavailable: {str(e)}")
+            self.cache = None
+        
+        # Recipe nutrition is computed from the ingredient quantities rather than asked of the model
+        try:
+            self.nutrition_table = load_ingredient_nutrition()
+        except Exception as e:
+            st.warning(f"Ingredient nutrition table unavailable: {str(e)}")
+            self.nutrition_table = None
+        
         # Define common Indian ingredients
         self.ingredients = {
             'grains': [
@@ -52,95 +252,272 @@ class RecipeGenerator:
                 'almonds', 'cashews', 'walnuts', 'flaxseeds', 'chia seeds'
             ]
         }
+        self.template_engine = TemplateRecipeEngine(self.ingredients, self.nutrition_table)
     
-    def generate_recipe(self, ingredients: list, cuisine: str = "Indian") -> dict:
+    def generate_recipe(self, ingredients: list, cuisine: str = "Indian", surprise: bool = False) -> dict:
         """
         Generate a recipe based on available ingredients and cuisine type
         
+        Recipes come from the local template engine unless surprise is set,
+        in which case the OpenAI API writes one. Concurrent requests for the
+        same AI recipe, from any session, share a single OpenAI call.
+        
         Args:
             ingredients (list): List of available ingredients
             cuisine (str): Type of cuisine (default: Indian)
+            surprise (bool): Ask the AI for a more creative recipe
             
         Returns:
             dict: Generated recipe with name, ingredients, instructions, and nutrition info
         """
-        if not self.is_api_available:
-            return self._get_fallback_recipe(ingredients, cuisine)
+        if not surprise:
+            return self.template_recipe(ingredients, cuisine)
             
         try:
-            prompt = f"""Generate a healthy {cuisine} recipe using these ingredients: {', '.join(ingredients)}.
-            Include:
-            1. Recipe name
-            2. List of ingredients with quantities
-            3. Step-by-step cooking instructions
-            4. Nutritional information (calories, protein, carbs, fat)
-            5. Health benefits
-            Format the response as a JSON object with these keys: name, ingredients, instructions, nutrition, health_benefits"""
+            return self.request_recipe(ingredients, cuisine)
+        except ValueError as e:
+            st.error("Error parsing recipe response. Using fallback recipe.")
+            return self._get_fallback_recipe(ingredients, cuisine)
+        except (CircuitOpenError, TimeoutError):
+            st.warning("Recipe service is temporarily unavailable. Using fallback recipe.")
+            return self._get_fallback_recipe(ingredients, cuisine)
+        except Exception as e:
+            if self.is_api_available:
+                st.error(f"Error generating recipe. Using fallback recipe.")
+            return self._get_fallback_recipe(ingredients, cuisine)
+    
+    def request_recipe(self, ingredients: list, cuisine: str = "Indian") -> dict:
+        """
+        AI recipe from the cache or the OpenAI API, raising instead of falling back
+        
+        Args:
+            ingredients (list): List of available ingredients
+            cuisine (str): Type of cuisine (default: Indian)
             
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a professional chef specializing in healthy cooking."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=500
-            )
+        Returns:
+            dict: Generated recipe with name, ingredients, instructions, and nutrition info
             
-            try:
-                recipe_text = response.choices[0].message.content
-                recipe = json.loads(recipe_text)
+        Raises:
+            RuntimeError: If there is no API key, or the circuit breaker is open
+            TimeoutError: If the rate limiter did not admit the call in time, or an
+                identical request already running did not finish in time
+            ValueError: If the response holds no usable recipe
+        """
+        key = self.cache_key(ingredients, cuisine)
+        if self.cache is not None:
+            recipe = self.cache.get(key)
+            if recipe is not None:
                 return recipe
-            except (json.JSONDecodeError, AttributeError) as e:
-                st.error("Error parsing recipe response. Using fallback recipe.")
-                return self._get_fallback_recipe(ingredients, cuisine)
+        
+        if not self.is_api_available:
+            raise RuntimeError("OpenAI API key not found")
+        # A request already running gets long enough for all of its attempts and backoffs
+        client = self.client
+        timeout = (client.max_retries + 2) * (client.timeout + client.backoff_cap)
+        return _coalesce(key, lambda: self._complete(key, ingredients, cuisine), timeout)
+    
+    def _complete(self, key: str, ingredients: list, cuisine: str) -> dict:
+        """Request a recipe from the API and cache it if it arrived whole"""
+        response = self._request(self.client.chat, self._build_messages(ingredients, cuisine))
+        parser = JsonStreamParser()
+        parser.feed(response.choices[0].message.content or '')
+        recipe = self._parse_recipe(parser)
+        if self.cache is not None and 'incomplete' not in recipe:
+            self.cache.put(key, recipe, ingredients, cuisine)
+        return recipe
+    
+    def _request(self, call: Callable, messages: List[Dict], **options):
+        """Call the API in JSON mode, or without it if the provider rejects it for this call"""
+        options.update(model=self.model, messages=messages, temperature=self.temperature, max_tokens=self.max_tokens)
+        if self.json_mode:
+            try:
+                return call(response_format={"type": "json_object"}, **options)
+            except openai.BadRequestError:
+                # Older models and some compatible servers have no JSON mode; set
+                # EATELLIGENCE_JSON_MODE=0 for them to save the rejected call
+                pass
+        return call(**options)
+    
+    def _parse_recipe(self, parser: JsonStreamParser) -> dict:
+        """Validated recipe with nutrition from what the parser received, repairing a cut-short response"""
+        return self.add_nutrition(validate_recipe(parser.value(), truncated=not parser.complete))
+    
+    def stream_recipe(self, ingredients: list, cuisine: str = "Indian", deadline: Optional[float] = None,
+                      on_text: Optional[Callable[[str], None]] = None, surprise: bool = False) -> dict:
+        """
+        Generate a recipe, passing the response text on as it streams in
+        
+        Without surprise the local template recipe is returned at once, as in
+        generate_recipe. Otherwise the completion is read on a background
+        thread. This thread only waits for new text until the deadline, and
+        reading stops as soon as the recipe's JSON object is complete. A
+        response that ends early, or is still unfinished at the deadline, is
+        repaired and used if its name and ingredients arrived. Concurrent
+        requests for the same recipe, from any session, share one streamed
+        completion.
+        
+        Args:
+            ingredients (list): List of available ingredients
+            cuisine (str): Type of cuisine (default: Indian)
+            deadline (float, optional): Seconds to wait for the whole recipe before
+                using the fallback recipe. Defaults to self.deadline.
+            on_text (Callable, optional): Called with the text received so far
+                after every chunk, e.g. to update a Streamlit placeholder
+            surprise (bool): Ask the AI for a more creative recipe
             
+        Returns:
+            dict: Generated recipe with name, ingredients, instructions, and nutrition info
+        """
+        if not surprise:
+            return self.template_recipe(ingredients, cuisine)
+        
+        key = self.cache_key(ingredients, cuisine)
+        if self.cache is not None:
+            recipe = self.cache.get(key)
+            if recipe is not None:
+                return recipe
+        
+        if not self.is_api_available:
+            return self._get_fallback_recipe(ingredients, cuisine)
+        
+        deadline = self.deadline if deadline is None else deadline
+        shared, chunks, leader = _SharedCompletion.join(key)
+        if leader:
+            _stream_executor.submit(self._stream_completion, key, self._build_messages(ingredients, cuisine),
+                                    shared, deadline)
+        
+        parser = JsonStreamParser()
+        end = time.monotonic() + deadline
+        try:
+            while not parser.complete:
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    try:
+                        recipe = self._parse_recipe(parser)
+                        st.warning("Recipe generation is taking too long. Showing the part that arrived.")
+                        return recipe
+                    except ValueError:
+                        st.warning("Recipe generation is taking too long. Using fallback recipe.")
+                        return self._get_fallback_recipe(ingredients, cuisine)
+                try:
+                    chunk = chunks.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                parser.feed(chunk)
+                if on_text is not None:
+                    on_text(parser.text)
+        except (CircuitOpenError, TimeoutError):
+            st.warning("Recipe service is temporarily unavailable. Using fallback recipe.")
+            return self._get_fallback_recipe(ingredients, cuisine)
         except Exception as e:
             st.error(f"Error generating recipe. Using fallback recipe.")
             return self._get_fallback_recipe(ingredients, cuisine)
+        finally:
+            # The background read stops once no request needs it any more
+            shared.leave(key, chunks)
+        
+        try:
+            recipe = self._parse_recipe(parser)
+        except ValueError:
+            st.error("Error parsing recipe response. Using fallback recipe.")
+            return self._get_fallback_recipe(ingredients, cuisine)
+        if self.cache is not None and 'incomplete' not in recipe:
+            self.cache.put(key, recipe, ingredients, cuisine)
+        return recipe
     
-    def _get_fallback_recipe(self, ingredients: list, cuisine: str) -> dict:
-        """Provide a fallback recipe when API is not available"""
-        main_ingredient = ingredients[0] if ingredients else "mixed vegetables"
-        
-        fallback_recipes = {
-            "Indian": {
-                "name": f"{main_ingredient.title()} Curry",
-                "ingredients": [
-                    f"2 cups {main_ingredient}",
-                    "1 onion, finely chopped",
-                    "2 tomatoes, chopped",
-                    "2 tbsp oil",
-                    "1 tsp cumin seeds",
-                    "1 tsp turmeric powder",
-                    "1 tsp red chili powder",
-                    "Salt to taste",
-                    "Coriander leaves for garnish"
-                ],
-                "instructions": [
-                    "1. Heat oil in a pan and add cumin seeds",
-                    "2. Add chopped onions and sauté until golden brown",
-                    "3. Add tomatoes and cook until soft",
-                    "4. Add all spices and salt",
-                    f"5. Add {main_ingredient} and cook until tender",
-                    "6. Garnish with coriander leaves and serve hot"
-                ],
-                "nutrition": {
-                    "calories": 150,
-                    "protein": 4,
-                    "carbs": 20,
-                    "fat": 6
-                },
-                "health_benefits": [
-                    "Rich in fiber",
-                    "Low in calories",
-                    "Good source of vitamins and minerals",
-                    "Helps in weight management"
-                ]
-            }
+    def _stream_completion(self, key: str, messages: List[Dict], shared: _SharedCompletion, timeout: float):
+        """Read a streamed completion into its subscribers' queues: text chunks, then None or an exception"""
+        try:
+            stream = self._request(self.client.stream_chat, messages, timeout=timeout)
+            try:
+                for event in stream:
+                    if shared.abandoned:
+                        break
+                    if event.choices and event.choices[0].delta.content:
+                        shared.publish(event.choices[0].delta.content)
+            finally:
+                stream.close()
+            shared.finish(key, None)
+        except Exception as e:
+            shared.finish(key, e)
+    
+    def _build_messages(self, ingredients: list, cuisine: str) -> List[Dict]:
+        """Chat messages asking for a recipe as a JSON object"""
+        prompt = f"""Generate a healthy {cuisine} recipe using these ingredients: {', '.join(ingredients)}.
+            Include:
+            1. Recipe name
+            2. Number of servings
+            3. List of ingredients, each starting with its quantity in cups, spoons, grams or pieces
+            4. Step-by-step cooking instructions
+            5. Health benefits
+            Format the response as a JSON object with these keys: name, servings, ingredients, instructions, health_benefits"""
+        return [
+            {"role": "system", "content": "You are a professional chef specializing in healthy cooking."},
+            {"role": "user", "content": prompt}
+        ]
+    
+    def add_nutrition(self, recipe: dict) -> dict:
+        """
+        Compute a recipe's nutrition per serving from its ingredient lines
+        
+        Each line is parsed into grams of an ingredient and matched against the
+        ingredient nutrition table. The recipe's nutrition (calories, protein,
+        carbs, fat and sugar and fibre in g, sodium in mg) replaces any given
+        by the model, and ingredients missing from the table are listed under
+        unmatched_ingredients.
+        
+        Args:
+            recipe (dict): Recipe with ingredients and optionally servings
+            
+        Returns:
+            dict: The same recipe, updated in place
+        """
+        if self.nutrition_table is None:
+            return recipe
+        
+        quantities = self.nutrition_table.parse_recipe(recipe.get('ingredients', []))
+        totals = self.nutrition_table.compute([quantities]).iloc[0]
+        try:
+            servings = max(1, int(recipe.get('servings') or 1))
+        except (TypeError, ValueError):
+            servings = 1
+        
+        recipe['servings'] = servings
+        per_serving = totals / servings
+        recipe['nutrition'] = {
+            'calories': int(round(per_serving['Calories'])),
+            **{nutrient.lower(): round(float(per_serving[nutrient]), 1)
+               for nutrient in ['Protein', 'Carbs', 'Fat', 'Sugar', 'Fibre']},
+            'sodium': int(round(per_serving['Sodium']))
         }
+        recipe['unmatched_ingredients'] = [name for name in quantities if self.nutrition_table.lookup(name) is None]
+        return recipe
+    
+    def cache_key(self, ingredients: list, cuisine: str) -> str:
+        """Cache key for a recipe request under the current generation settings"""
+        return RecipeCache.make_key(ingredients, cuisine, self.model, self.prompt_version, self.temperature)
+    
+    def template_recipe(self, ingredients: list, cuisine: str = "Indian", variant: int = 0) -> dict:
+        """
+        Build a recipe locally from cuisine templates, in about a millisecond
         
-        return fallback_recipes.get(cuisine, fallback_recipes["Indian"])
+        Args:
+            ingredients (list): List of available ingredients
+            cuisine (str): Type of cuisine (default: Indian)
+            variant (int): Ask for a different recipe for the same ingredients
+            
+        Returns:
+            dict: Recipe with name, ingredients, instructions, and nutrition info
+        """
+        return self.add_nutrition(self.template_engine.generate(ingredients, cuisine, variant))
+    
+    def _get_fallback_recipe(self, ingredients: list, cuisine: str) -> dict:
+        """Provide a fallback recipe when API is not available"""
+        return self.template_recipe(ingredients, cuisine)
     
     def get_ingredient_categories(self) -> Dict[str, List[str]]:
         """
@@ -0,0 +1,431 @@
+import random
+import zlib
+from typing import Dict, List, Optional
+
+from ingredient_nutrition import IngredientNutrition
+
+# Role of each ingredient in a dish; healthy fats split into cooking fats and nuts or seeds
+ROLES = ['grains', 'pulses', 'vegetables', 'protein', 'spices', 'fats', 'nuts']
+
+ROLE_QUANTITIES = {
+    'grains': '1 cup',
+    'pulses': '1/2 cup',
+    'vegetables': '2 cups',
+    'protein': '200 g',
+    'spices': '1 tsp',
+    'fats': '1 tbsp',
+    'nuts': '2 tbsp',
+}
+
+ROLE_BENEFITS = {
+    'grains': "Whole grains release energy slowly and keep you full longer",
+    'pulses': "Pulses add plant protein and soluble fibre",
+    'vegetables': "Vegetables provide vitamins, minerals and antioxidants",
+    'protein': "High in protein for muscle repair and satiety",
+    'spices': "Spices like turmeric and cumin have anti-inflammatory properties",
+    'fats': "Cooked with a small amount of fat for better nutrient absorption",
+    'nuts': "Nuts and seeds add healthy fats and crunch",
+}
+
+# Dishes per cuisine. A dish needs all of its roles; the more of the given
+# ingredients' roles it uses, the better it fits. Steps tagged with a role are
+# only included when the recipe has ingredients in that role.
+CUISINE_TEMPLATES = {
+    'Indian': {
+        'aromatics': ['1 onion, finely chopped', '1 tomato, chopped'],
+        'spices': ['cumin', 'turmeric', 'mustard seeds', 'curry leaves', 'asafoetida', 'coriander'],
+        'fats': ['ghee', 'mustard oil', 'coconut oil', 'sesame oil'],
+        'garnish': 'coriander leaves',
+        'dishes': [
+            {
+                'name': "{grains} {pulses} Khichdi",
+                'roles': ['grains', 'pulses'],
+                'steps': [
+                    (None, "Rinse the {grains} and {pulses} together and soak for 20 minutes"),
+                    (None, "Heat {fats} in a pressure cooker and splutter the {spices}"),
+                    (None, "Add the onion and tomato and cook until soft"),
+                    ('vegetables', "Stir in the {vegetables} and cook for 2 minutes"),
+                    (None, "Add the {grains} and {pulses} with 4 cups of water and salt"),
+                    (None, "Pressure cook for 3 whistles and let the pressure release on its own"),
+                    ('nuts', "Top with toasted {nuts}"),
+                    (None, "Garnish with {garnish} and serve hot"),
+                ],
+            },
+            {
+                'name': "{pulses} Tadka",
+                'roles': ['pulses'],
+                'steps': [
+                    (None, "Pressure cook the {pulses} with 2 cups of water, turmeric and salt until soft"),
+                    ('vegetables', "Add the {vegetables} and simmer for 5 minutes"),
+                    (None, "Heat {fats} in a small pan and splutter the {spices}"),
+                    (None, "Add the onion and tomato and cook until the oil separates"),
+                    (None, "Pour the tadka over the dal and simmer for 2 minutes"),
+                    (None, "Garnish with {garnish} and serve hot"),
+                ],
+            },
+            {
+                'name': "{vegetables} {grains} Pulao",
+                'roles': ['grains', 'vegetables'],
+                'steps': [
+                    (None, "Rinse the {grains} and soak for 20 minutes"),
+                    (None, "Heat {fats} in a heavy pan and add the {spices}"),
+                    (None, "Add the onion and saute until golden"),
+                    (None, "Add the {vegetables} and tomato and cook for 3 minutes"),
+                    ('protein', "Fold in the {protein}"),
+                    (None, "Add the drained {grains}, 2 cups of water and salt"),
+                    (None, "Cover and cook on low heat until the water is absorbed"),
+                    ('nuts', "Scatter the {nuts} over the top"),
+                    (None, "Fluff with a fork, garnish with {garnish} and serve"),
+                ],
+            },
+            {
+                'name': "{protein} Bhurji",
+                'roles': ['protein'],
+                'steps': [
+                    (None, "Crumble or finely chop the {protein}"),
+                    (None, "Heat {fats} in a pan and add the {spices}"),
+                    (None, "Add the onion and tomato and cook until soft"),
+                    ('vegetables', "Add the {vegetables} and cook until tender"),
+                    (None, "Stir in the {protein} with salt and cook for 3 minutes"),
+                    (None, "Garnish with {garnish} and serve with roti"),
+                ],
+            },
+            {
+                'name': "{vegetables} Sabzi",
+                'roles': ['vegetables'],
+                'steps': [
+                    (None, "Wash and chop the {vegetables} into even pieces"),
+                    (None, "Heat {fats} in a kadai and splutter the {spices}"),
+                    (None, "Add the onion and saute until translucent"),
+                    (None, "Add the {vegetables}, tomato and salt, cover and cook until tender"),
+                    ('pulses', "Stir in the cooked {pulses}"),
+                    ('nuts', "Sprinkle with roasted {nuts}"),
+                    (None, "Garnish with {garnish} and serve with roti or rice"),
+                ],
+            },
+        ],
+    },
+    'Italian': {
+        'aromatics': ['1 onion, finely chopped', '2 cloves garlic, minced'],
+        'spices': ['oregano', 'basil', 'black pepper', 'chili flakes'],
+        'fats': ['olive oil'],
+        'garnish': 'fresh basil',
+        'dishes': [
+            {
+                'name': "{vegetables} {grains} Risotto",
+                'roles': ['grains'],
+                'steps': [
+                    (None, "Heat {fats} in a wide pan and soften the onion and garlic"),
+                    (None, "Add the {grains} and toast for a minute"),
+                    (None, "Add hot water a ladle at a time, stirring until each is absorbed"),
+                    ('vegetables', "Stir in the {vegetables} halfway through"),
+                    ('protein', "Fold in the {protein} at the end"),
+                    (None, "Season with {spices} and salt"),
+                    (None, "Garnish with {garnish} and serve"),
+                ],
+            },
+            {
+                'name': "{pulses} and {vegetables} Minestrone",
+                'roles': ['pulses'],
+                'steps': [
+                    (None, "Soak the {pulses} for 2 hours and cook until just tender"),
+                    (None, "Heat {fats} in a pot and soften the onion and garlic"),
+                    ('vegetables', "Add the {vegetables} and cook for 5 minutes"),
+                    (None, "Add the {pulses}, 4 cups of water, {spices} and salt and simmer for 15 minutes"),
+                    (None, "Garnish with {garnish} and serve"),
+                ],
+            },
+            {
+                'name': "Roasted {vegetables} with {protein}",
+                'roles': ['vegetables', 'protein'],
+                'steps': [
+                    (None, "Heat the oven to 200 C"),
+                    (None, "Toss the {vegetables} and {protein} with {fats}, garlic, {spices} and salt"),
+                    (None, "Roast for 20-25 minutes, turning once"),
+                    ('nuts', "Scatter with the {nuts}"),
+                    (None, "Garnish with {garnish} and serve"),
+                ],
+            },
+            {
+                'name': "{vegetables} Frittata-Style Bake",
+                'roles': ['vegetables'],
+                'steps': [
+                    (None, "Heat {fats} in an ovenproof pan and soften the onion and garlic"),
+                    (None, "Add the {vegetables} and cook until tender"),
+                    ('protein', "Add the {protein} and season with {spices} and salt"),
+                    (None, "Bake at 180 C for 15 minutes until set"),
+                    (None, "Garnish with {garnish} and serve"),
+                ],
+            },
+        ],
+    },
+    'Chinese': {
+        'aromatics': ['2 cloves garlic, minced', '1 inch ginger, grated', '2 spring onions, sliced'],
+        'spices': ['black pepper', 'chili flakes', 'ginger'],
+        'fats': ['sesame oil', 'vegetable oil'],
+        'garnish': 'spring onion greens',
+        'dishes': [
+            {
+                'name': "{vegetables} Fried {grains}",
+                'roles': ['grains'],
+                'steps': [
+                    (None, "Cook the {grains} ahead and let it cool completely"),
+                    (None, "Heat {fats} in a wok on high heat and add garlic and ginger"),
+                    ('vegetables', "Toss in the {vegetables} and stir fry for 2 minutes"),
+                    ('protein', "Add the {protein} and stir fry until cooked"),
+                    (None, "Add the {grains}, 1 tbsp soy sauce, {spices} and salt and toss well"),
+                    (None, "Garnish with {garnish} and serve"),
+                ],
+            },
+            {
+                'name': "{protein} and {vegetables} Stir Fry",
+                'roles': ['protein'],
+                'steps': [
+                    (None, "Cut the {protein} into bite-sized pieces"),
+                    (None, "Heat {fats} in a wok on high heat and add garlic and ginger"),
+                    (None, "Sear the {protein} for 3 minutes"),
+                    ('vegetables', "Add the {vegetables} and stir fry until crisp-tender"),
+                    (None, "Season with 1 tbsp soy sauce, {spices} and a splash of water"),
+                    ('nuts', "Toss with the {nuts}"),
+                    (None, "Garnish with {garnish} and serve"),
+                ],
+            },
+            {
+                'name': "Hot and Sour {vegetables} Soup",
+                'roles': ['vegetables'],
+                'steps': [
+                    (None, "Heat {fats} in a pot and add garlic and ginger"),
+                    (None, "Add the finely chopped {vegetables} and cook for 2 minutes"),
+                    ('pulses', "Add the cooked {pulses}"),
+                    (None, "Add 4 cups of water, 1 tbsp soy sauce, 1 tbsp vinegar, {spices} and salt"),
+                    (None, "Simmer for 5 minutes and thicken with a little cornflour slurry"),
+                    (None, "Garnish with {garnish} and serve hot"),
+                ],
+            },
+        ],
+    },
+    'Mexican': {
+        'aromatics': ['1 onion, chopped', '1 tomato, chopped', '2 cloves garlic, minced'],
+        'spices': ['cumin', 'chili powder', 'oregano', 'black pepper'],
+        'fats': ['olive oil', 'vegetable oil'],
+        'garnish': 'fresh coriander and a squeeze of lime',
+        'dishes': [
+            {
+                'name': "{pulses} and {grains} Burrito Bowl",
+                'roles': ['grains', 'pulses'],
+                'steps': [
+                    (None, "Cook the {grains} and the {pulses} separately until tender"),
+                    (None, "Heat {fats} in a pan and cook the onion and garlic"),
+                    (None, "Add the {pulses}, tomato, {spices} and salt and simmer for 5 minutes"),
+                    ('vegetables', "Saute the {vegetables} until lightly charred"),
+                    (None, "Layer the {grains}, {pulses} and vegetables in bowls"),
+                    (None, "Finish with {garnish}"),
+                ],
+            },
+            {
+                'name': "{protein} Fajita Skillet",
+                'roles': ['protein'],
+                'steps': [
+                    (None, "Slice the {protein} into strips and rub with {spices} and salt"),
+                    (None, "Heat {fats} in a skillet and sear the {protein}"),
+                    ('vegetables', "Add the {vegetables} and onion and cook until tender"),
+                    (None, "Serve with whole wheat tortillas and finish with {garnish}"),
+                ],
+            },
+            {
+                'name': "{vegetables} Tacos",
+                'roles': ['vegetables'],
+                'steps': [
+                    (None, "Heat {fats} in a pan and cook the onion and garlic"),
+                    (None, "Add the {vegetables}, {spices} and salt and cook until tender"),
+                    ('pulses', "Mash in the cooked {pulses}"),
+                    (None, "Spoon into warm tortillas and top with the tomato"),
+                    (None, "Finish with {garnish}"),
+                ],
+            },
+        ],
+    },
+    'Mediterranean': {
+        'aromatics': ['1 onion, finely chopped', '2 cloves garlic, minced', '1 tbsp lemon juice'],
+        'spices': ['oregano', 'cumin', 'paprika', 'black pepper'],
+        'fats': ['olive oil'],
+        'garnish': 'fresh mint and parsley',
+        'dishes': [
+            {
+                'name': "{grains} Tabbouleh with {vegetables}",
+                'roles': ['grains'],
+                'steps': [
+                    (None, "Cook the {grains} and let it cool"),
+                    ('vegetables', "Finely chop the {vegetables}"),
+                    (None, "Whisk {fats} with the lemon juice, garlic, {spices} and salt"),
+                    (None, "Toss the {grains} and vegetables with the dressing"),
+                    ('pulses', "Fold in the cooked {pulses}"),
+                    ('nuts', "Top with the {nuts}"),
+                    (None, "Garnish with {garnish} and serve chilled"),
+                ],
+            },
+            {
+                'name': "{pulses} Stew with {vegetables}",
+                'roles': ['pulses'],
+                'steps': [
+                    (None, "Soak and cook the {pulses} until tender"),
+                    (None, "Heat {fats} in a pot and soften the onion and garlic"),
+                    ('vegetables', "Add the {vegetables} and {spices} and cook for 5 minutes"),
+                    (None, "Add the {pulses} with 2 cups of water and salt and simmer for 15 minutes"),
+                    (None, "Finish with the lemon juice and garnish with {garnish}"),
+                ],
+            },
+            {
+                'name': "Grilled {protein} with {vegetables}",
+                'roles': ['protein'],
+                'steps': [
+                    (None, "Marinate the {protein} in {fats}, lemon juice, garlic, {spices} and salt"),
+                    (None, "Grill or pan-sear the {protein} until golden"),
+                    ('vegetables', "Grill the {vegetables} alongside"),
+                    (None, "Garnish with {garnish} and serve"),
+                ],
+            },
+            {
+                'name': "{vegetables} Salad",
+                'roles': ['vegetables'],
+                'steps': [
+                    (None, "Chop the {vegetables} into bite-sized pieces"),
+                    (None, "Whisk {fats} with the lemon juice, garlic, {spices} and salt"),
+                    ('pulses', "Add the cooked {pulses}"),
+                    (None, "Toss everything with the dressing"),
+                    ('nuts', "Top with the {nuts}"),
+                    (None, "Garnish with {garnish} and serve"),
+                ],
+            },
+        ],
+    },
+}
+
+
+class TemplateRecipeEngine:
+    def __init__(self, categories: Dict[str, List[str]], nutrition_table: Optional[IngredientNutrition] = None):
+        """
+        Build recipes locally from cuisine templates and ingredient roles
+
+        Each ingredient is given a role from the ingredient categories, or, for
+        ingredients outside them, from its nutrient profile in the ingredient
+        table. The dish whose roles best fit the ingredients is picked from the
+        cuisine's templates, missing spices and cooking fat are added from the
+        cuisine's pantry, and quantities and steps are filled in per role. The
+        same request always gives the same recipe; pass another variant for a
+        different one.
+
+        Args:
+            categories (Dict[str, List[str]]): Ingredient categories, as in
+                RecipeGenerator.ingredients
+            nutrition_table (IngredientNutrition, optional): Used to place
+                ingredients that are not in any category
+        """
+        self.nutrition_table = nutrition_table
+        self.roles = {}
+        for category, names in categories.items():
+            for name in names:
+                if category == 'healthy_fats':
+                    role = 'fats' if self._is_cooking_fat(name) else 'nuts'
+                else:
+                    role = category
+                self.roles[name.lower()] = role
+
+    @staticmethod
+    def _is_cooking_fat(name: str) -> bool:
+        return 'oil' in name or name in ('ghee', 'butter')
+
+    def role(self, ingredient: str) -> str:
+        """Role of an ingredient in a dish"""
+        name = ' '.join(ingredient.lower().split())
+        if name in self.roles:
+            return self.roles[name]
+        if self._is_cooking_fat(name):
+            return 'fats'
+
+        row = self.nutrition_table.lookup(name) if self.nutrition_table is not None else None
+        if row is None:
+            return 'vegetables'
+        calories, protein, fat, carbs = self.nutrition_table.matrix[row, :4] * 100
+        if fat >= 80:
+            return 'fats'
+        if fat >= 30:
+            return 'nuts'
+        if protein >= 18 and carbs >= 40:
+            return 'pulses'
+        if protein >= 8 and protein * 4 >= 0.25 * calories:
+            return 'protein'
+        if carbs >= 50:
+            return 'grains'
+        return 'vegetables' if calories else 'spices'
+
+    def generate(self, ingredients: List[str], cuisine: str = "Indian", variant: int = 0) -> dict:
+        """
+        Generate a recipe
+
+        Args:
+            ingredients (List[str]): Available ingredients
+            cuisine (str): Cuisine; unknown cuisines use the Indian templates
+            variant (int): Pick another of the best-fitting dishes and spices
+
+        Returns:
+            dict: Recipe with name, servings, ingredients, instructions and health_benefits
+        """
+        template = CUISINE_TEMPLATES.get(cuisine, CUISINE_TEMPLATES['Indian'])
+        names = list(dict.fromkeys(' '.join(name.lower().split()) for name in ingredients if name.strip()))
+        if not names:
+            names = ['mixed vegetables']
+        seed = zlib.crc32(f"{cuisine}|{'|'.join(sorted(names))}|{variant}".encode('utf-8'))
+        rng = random.Random(seed)
+
+        by_role = {role: [] for role in ROLES}
+        for name in names:
+            by_role[self.role(name)].append(name)
+        if not by_role['spices']:
+            by_role['spices'] = rng.sample(template['spices'], min(2, len(template['spices'])))
+        if not by_role['fats']:
+            by_role['fats'] = [rng.choice(template['fats'])]
+        present = {role for role, members in by_role.items() if members}
+
+        # Prefer dishes that use the most of the given ingredients' roles; mixed
+        # vegetables can always be added, so dishes needing them stay eligible
+        dishes = [dish for dish in template['dishes'] if set(dish['roles']) <= present | {'vegetables'}]
+        used = [len(present & ({role for role, _ in dish['steps'] if role} | set(dish['roles']))) for dish in dishes]
+        dish = rng.choice([dish for dish, count in zip(dishes, used) if count == max(used)])
+
+        if not by_role['vegetables'] and ('vegetables' in dish['roles'] or '{vegetables}' in dish['name']):
+            by_role['vegetables'] = ['mixed vegetables']
+        labels = {role: self._label(members) for role, members in by_role.items()}
+        labels['garnish'] = template['garnish']
+
+        recipe_lines = []
+        for role in ROLES:
+            members = by_role[role]
+            quantity = ROLE_QUANTITIES[role]
+            if role == 'vegetables' and len(members) > 1:
+                quantity = '1 cup'
+            recipe_lines += [f"{quantity} {name}" for name in members]
+        recipe_lines += template['aromatics'] + ["Salt to taste", f"{template['garnish'].capitalize()} for garnish"]
+
+        steps = [text.format(**labels) for role, text in dish['steps'] if role is None or by_role[role]]
+        name = ' '.join(dish['name'].format(**{role: self._title(members) for role, members in by_role.items()}).split())
+
+        return {
+            'name': name,
+            'servings': 3 if {'grains', 'pulses'} <= present else 2,
+            'ingredients': recipe_lines,
+            'instructions': steps,
+            'health_benefits': [ROLE_BENEFITS[role] for role in ROLES if by_role[role] and role != 'fats']
+        }
+
+    @staticmethod
+    def _label(members: List[str]) -> str:
+        """Ingredients of a role for use in a sentence"""
+        if len(members) <= 1:
+            return ''.join(members)
+        return ', '.join(members[:-1]) + ' and ' + members[-1]
+
+    @staticmethod
+    def _title(members: List[str]) -> str:
+        """Ingredients of a role for use in a dish name, at most two"""
+        return ' & '.join(member.title() for member in members[:2])
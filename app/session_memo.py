@@ -0,0 +1,101 @@
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import streamlit as st
+
+# Stands for a missing entry, so None can be stored like any other result
+_MISSING = object()
+
+
+class SessionMemo:
+    """
+    Least-recently-used memo of rendered results, capped by memory
+
+    Sizes are measured by pickling each result once when it is stored. When a
+    new result would take the memo over max_bytes or max_entries, the least
+    recently used results are evicted. A result larger than max_bytes on its
+    own is returned but not kept.
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, max_entries: int = 64):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any):
+        size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            while self._entries and (self.bytes + size > self.max_bytes or len(self._entries) >= self.max_entries):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+            self._entries[key] = (value, size)
+            self.bytes += size
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Memoized result for key, computing and storing it on a miss
+
+        A result of None is stored too, so a failed computation isn't repeated
+        on every rerun.
+
+        Args:
+            key (Hashable): Result key, e.g. ('upload', content hash)
+            compute (Callable[[], Any]): Produces the result; must be picklable
+
+        Returns:
+            Any: The stored or newly computed result
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {'entries': len(self._entries), 'bytes': self.bytes, 'hits': self.hits, 'misses': self.misses}
+
+
+def session_memo() -> SessionMemo:
+    """
+    The current browser session's memo, created on first use
+
+    Streamlit reruns the whole script on every interaction, so results kept
+    here survive reruns and are shared by all tabs of the session. The cap is
+    EATELLIGENCE_SESSION_MEMO_MB megabytes per session (default 16).
+    """
+    if 'session_memo' not in st.session_state:
+        max_mb = float(os.getenv('EATELLIGENCE_SESSION_MEMO_MB', '16'))
+        st.session_state['session_memo'] = SessionMemo(max_bytes=int(max_mb * 1024 * 1024))
+    return st.session_state['session_memo']
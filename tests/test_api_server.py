@@ -0,0 +1,117 @@
+import json
+import socket
+import time
+
+import pytest
+
+from api_server import MAX_ALTERNATIVES, MAX_DAILY_CALORIES, MAX_DAYS, APIError, APIServer, EatelligenceService
+
+
+@pytest.fixture(scope='module')
+def service():
+    return EatelligenceService(recognizer=False)
+
+
+@pytest.mark.parametrize('request_body, message', [
+    ({'conditions': ['diabetes'], 'days': 0}, 'days'),
+    ({'conditions': ['diabetes'], 'days': MAX_DAYS + 1}, 'days'),
+    ({'conditions': ['diabetes'], 'days': 100000}, 'days'),
+    ({'conditions': ['diabetes'], 'daily_calories': 0}, 'daily_calories'),
+    ({'conditions': ['diabetes'], 'daily_calories': -500}, 'daily_calories'),
+    ({'conditions': ['diabetes'], 'daily_calories': 'lots'}, 'daily_calories'),
+    ({'conditions': ['diabetes'], 'daily_calories': 1e400}, 'daily_calories'),
+    ({'conditions': ['diabetes'], 'daily_calories': MAX_DAILY_CALORIES + 1}, 'daily_calories'),
+    ({'conditions': ['diabetes'], 'daily_calories': 10 ** 12}, 'daily_calories'),
+    ({'conditions': ['diabetes'], 'seed': -1}, 'seed'),
+    ({'conditions': [1]}, 'conditions'),
+    ({'conditions': {'diabetes': True}}, 'conditions'),
+    ({'conditions': ['scurvy']}, 'Unsupported'),
+])
+def test_diet_plan_rejects_bad_requests(service, request_body, message):
+    with pytest.raises(APIError) as error:
+        service.diet_plan(request_body)
+    assert error.value.status == 400
+    assert message in str(error.value)
+
+
+def test_diet_plan_accepts_limits(service):
+    plan = service.diet_plan({'conditions': 'diabetes', 'daily_calories': 1800, 'days': 2, 'seed': 3})
+    assert plan['conditions'] == ['diabetes']
+    assert len(plan['days']) == 2
+
+
+@pytest.mark.parametrize('method, request_body, message', [
+    ('recipe', {'ingredients': ['chicken', 5]}, 'ingredients'),
+    ('recipe', {'ingredients': {'chicken': 1}}, 'ingredients'),
+    ('recipe', {'ingredients': []}, 'ingredients'),
+    ('recipe', {'ingredients': ['chicken'], 'cuisine': 5}, 'cuisine'),
+    ('recipe', {'ingredients': ['chicken'], 'cuisine': 'Martian'}, 'cuisine'),
+    ('alternatives', {'food': 'Pizza', 'k': -3}, 'k must be'),
+    ('alternatives', {'food': 'Pizza', 'k': 0}, 'k must be'),
+    ('alternatives', {'food': 'Pizza', 'k': MAX_ALTERNATIVES + 1}, 'k must be'),
+])
+def test_rejects_bad_recipe_and_alternatives_requests(service, method, request_body, message):
+    with pytest.raises(APIError) as error:
+        getattr(service, method)(request_body)
+    assert error.value.status == 400
+    assert message in str(error.value)
+
+
+def test_recipe_spells_cuisine_as_the_app_does(service):
+    result = service.recipe({'ingredients': 'palak, paneer', 'cuisine': ' italian'})
+    assert result['cuisine'] == 'Italian'
+    assert result['ingredients'] == ['palak', 'paneer']
+
+
+@pytest.fixture(scope='module')
+def server(service):
+    server = APIServer(service, port=0, workers=2, idle_timeout=0.5)
+    server.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def exchange(server, raw: bytes) -> bytes:
+    """Send raw bytes and read until the server closes the connection"""
+    with socket.create_connection(server.server_address, timeout=5) as connection:
+        connection.sendall(raw)
+        response = b''
+        while chunk := connection.recv(65536):
+            response += chunk
+    return response
+
+
+def test_keep_alive_serves_several_requests(server):
+    body = b'{"food": "Iced tea"}'
+    request = (b'POST /v1/nutrition HTTP/1.1\r\nHost: x\r\nContent-Length: %d\r\n\r\n' % len(body)) + body
+    response = exchange(server, request * 2 + b'GET /health HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n')
+    assert response.count(b'HTTP/1.1 200') == 3
+
+
+@pytest.mark.parametrize('length', [b'-1', b'abc', b'1e3', b'\xb2'])
+def test_bad_content_length_gets_400_and_closes(server, length):
+    # The connection is closed after the 400, so the rest is never taken for a request
+    response = exchange(server, b'POST /v1/nutrition HTTP/1.1\r\nHost: x\r\nContent-Length: ' + length
+                        + b'\r\n\r\n{"food": "Iced tea"}GET /health HTTP/1.1\r\nHost: x\r\n\r\n')
+    assert response.startswith(b'HTTP/1.1 400')
+    assert b'Connection: close' in response
+    assert response.count(b'HTTP/1.1') == 1
+
+
+def test_stalled_body_closes_silently(server, capsys):
+    start = time.monotonic()
+    response = exchange(server, b'POST /v1/nutrition HTTP/1.1\r\nHost: x\r\nContent-Length: 100\r\n\r\n{"fo')
+    assert response == b''
+    assert time.monotonic() - start < 3
+    assert 'Traceback' not in capsys.readouterr().err
+
+
+def test_recipe_batch_reports_bad_items_alone(server):
+    body = json.dumps({'requests': [{'ingredients': ['chicken', 5]}, {'ingredients': ['palak']},
+                                    {'ingredients': ['aloo'], 'cuisine': 'Martian'}]}).encode('utf-8')
+    response = exchange(server, b'POST /v1/recipe/batch HTTP/1.1\r\nHost: x\r\nConnection: close\r\n'
+                        b'Content-Length: %d\r\n\r\n' % len(body) + body)
+    assert response.startswith(b'HTTP/1.1 200')
+    results = json.loads(response.split(b'\r\n\r\n', 1)[1])['results']
+    assert [result.get('error', {}).get('status') for result in results] == [400, None, 400]
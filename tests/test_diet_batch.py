@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from diet_batch import generate_plans, patient_seed, read_patients
+
+
+@pytest.fixture
+def roster(tmp_path):
+    path = tmp_path / 'patients.csv'
+    path.write_text(
+        'patient_id,conditions,daily_calories,days,seed\n'
+        'p1,diabetes;hypertension,1800,2,5\n'
+        'p2,obesity,,,\n'
+        'p3,diabetes,lots,1,\n'
+        'p4,diabetes,1800,two,\n'
+        'p5,diabetes,0,1,\n'
+        'p6,diabetes,1800,1,x\n'
+        'p7,scurvy,1800,1,\n'
+    )
+    return path
+
+
+def test_read_patients_parses_rows_and_defaults(roster):
+    patients = {patient['patient_id']: patient for patient in read_patients(str(roster))}
+    assert patients['p1'] == {'patient_id': 'p1', 'conditions': ['diabetes', 'hypertension'],
+                              'daily_calories': 1800, 'days': 2, 'seed': 5}
+    assert patients['p2'] == {'patient_id': 'p2', 'conditions': ['obesity'],
+                              'daily_calories': 2000, 'days': 1, 'seed': None}
+
+
+@pytest.mark.parametrize('patient_id, message', [
+    ('p3', "daily_calories 'lots'"),
+    ('p4', "days 'two'"),
+    ('p5', "daily_calories must be positive"),
+    ('p6', "seed 'x'"),
+])
+def test_read_patients_turns_bad_numbers_into_errors(roster, patient_id, message):
+    patients = {patient['patient_id']: patient for patient in read_patients(str(roster))}
+    assert message in patients[patient_id]['error']
+
+
+def test_read_patients_jsonl_with_bad_conditions(tmp_path):
+    path = tmp_path / 'patients.jsonl'
+    path.write_text(json.dumps({'patient_id': 'a', 'conditions': [1]}) + '\n'
+                    + json.dumps({'conditions': ['PCOS'], 'daily_calories': 1500.7}) + '\n')
+    first, second = read_patients(str(path))
+    assert 'conditions' in first['error']
+    assert second == {'patient_id': '2', 'conditions': ['pcos'], 'daily_calories': 1500, 'days': 1, 'seed': None}
+
+
+def test_read_patients_jsonl_with_bad_lines(tmp_path):
+    path = tmp_path / 'patients.jsonl'
+    path.write_text('{bad json\n\n[1, 2]\n' + json.dumps({'conditions': 'obesity'}) + '\n')
+    patients = list(read_patients(str(path)))
+    assert [patient['patient_id'] for patient in patients] == ['1', '3', '4']
+    assert 'line 1 is not valid JSON' in patients[0]['error']
+    assert patients[1]['error'] == 'line 3 is not a JSON object'
+    assert 'error' not in patients[2]
+
+    for patient in patients:
+        patient['seed'] = patient_seed(patient, 0)
+    results = list(generate_plans(patients, workers=1))
+    assert [('error' in result) for result in results] == [True, True, False]
+
+
+def test_patient_seed_is_stable():
+    patient = {'patient_id': 'p2', 'seed': None}
+    assert patient_seed(patient, 0) == patient_seed(dict(patient), 0)
+    assert patient_seed(patient, 0) != patient_seed(patient, 1)
+    assert patient_seed({'patient_id': 'p1', 'seed': 5}, 0) == 5
+
+
+def test_generate_plans_reports_errors_per_patient(roster):
+    patients = list(read_patients(str(roster)))
+    for patient in patients:
+        patient['seed'] = patient_seed(patient, 0)
+    results = {result['patient_id']: result for result in generate_plans(patients, workers=1)}
+
+    assert len(results['p1']['days']) == 2
+    assert len(results['p2']['days']) == 1
+    assert "daily_calories 'lots'" in results['p3']['error']
+    assert 'Unsupported conditions' in results['p7']['error']
+    assert [patient_id for patient_id, result in results.items() if 'error' not in result] == ['p1', 'p2']
@@ -0,0 +1,119 @@
+import pytest
+
+from disease_recommender import DiseaseRecommender
+
+
+@pytest.fixture(scope='module')
+def recommender():
+    return DiseaseRecommender()
+
+
+@pytest.mark.parametrize('daily_calories', [0, -1200])
+def test_plans_reject_non_positive_calories(recommender, daily_calories):
+    plan = recommender.get_diet_plan('diabetes', daily_calories)
+    assert plan['meals'] == {} and 'daily_calories' in plan['description']
+    plan = recommender.get_weekly_plan('diabetes', daily_calories)
+    assert plan['days'] == [] and 'daily_calories' in plan['description']
+
+
+def test_weekly_plan_rejects_no_days(recommender):
+    plan = recommender.get_weekly_plan('diabetes', 2000, days=0)
+    assert plan['days'] == [] and 'days' in plan['description']
+
+
+def test_plans_flag_unreachable_calorie_targets(recommender):
+    plan = recommender.get_diet_plan('diabetes', 5000, seed=0)
+    assert plan['within_tolerance'] is False
+    assert plan['calorie_deviation'] == pytest.approx(plan['nutritional_summary']['calories'] - 5000)
+    assert plan['calorie_deviation'] < -500
+    assert not all(meal['within_tolerance'] for meal in plan['meals'].values())
+
+    plan = recommender.get_diet_plan('diabetes', 2000, seed=0)
+    assert plan['within_tolerance'] is True
+    assert abs(plan['calorie_deviation']) <= 0.1 * 2000
+
+
+def test_same_seed_gives_same_plan(recommender):
+    first = recommender.get_weekly_plan(['diabetes', 'hypertension'], 1800, days=3, seed=7)
+    second = recommender.get_weekly_plan(['hypertension', 'diabetes'], 1800, days=3, seed=7)
+    assert first == second
+    assert recommender.get_diet_plan('pcos', seed=3) == recommender.get_diet_plan('pcos', seed=3)
+
+
+def test_different_seeds_vary_the_plan(recommender):
+    plans = [recommender.get_diet_plan('diabetes', 2000, seed=seed)['meals'] for seed in range(5)]
+    assert any(plan != plans[0] for plan in plans[1:])
+
+
+@pytest.mark.parametrize('conditions', [['diabetes', 'hypertension'], ['obesity']])
+def test_weekly_plan_respects_repeat_window(recommender, conditions):
+    for seed in range(5):
+        plan = recommender.get_weekly_plan(conditions, 2000, days=7, seed=seed, repeat_window=2)
+        eaten = []
+        for day in plan['days']:
+            foods = [food for meal in day['meals'].values() for food in meal['foods']]
+            assert len(foods) == len(set(foods)), "a dish is repeated within a day"
+            for earlier in eaten[-2:]:
+                assert not earlier & set(foods), "a dish is repeated within the window"
+            eaten.append(set(foods))
+
+
+def meal_within_tolerance(meal, tolerance=0.1):
+    return abs(meal['nutrition']['calories'] - meal['target_calories']) <= tolerance * meal['target_calories'] + 1e-6
+
+
+@pytest.mark.parametrize('conditions', ['diabetes', 'hypertension', 'pcos', 'thyroid'])
+def test_weekly_plan_meals_stay_near_their_calorie_targets(recommender, conditions):
+    for seed in range(3):
+        plan = recommender.get_weekly_plan(conditions, 1600, days=7, seed=seed)
+        assert plan['within_tolerance']
+        assert all(meal_within_tolerance(meal) for day in plan['days'] for meal in day['meals'].values())
+
+
+@pytest.mark.parametrize('conditions', ['obesity', 'heart_disease', 'arthritis'])
+def test_weekly_plan_flags_meals_outside_tolerance(recommender, conditions):
+    # Few suitable dishes: avoiding repeats can push meals outside the tolerance, which must be flagged
+    for seed in range(3):
+        plan = recommender.get_weekly_plan(conditions, 1600, days=7, seed=seed)
+        for day in plan['days']:
+            for meal in day['meals'].values():
+                assert meal['within_tolerance'] == meal_within_tolerance(meal)
+            assert day['within_tolerance'] == all(meal['within_tolerance'] for meal in day['meals'].values())
+        assert plan['within_tolerance'] == all(day['within_tolerance'] for day in plan['days'])
+
+
+@pytest.mark.parametrize('name', ['Bengal 5 Spice Blend (Panch Phoran)', 'Mixed vegetable pickle (Sabziyoon ka achaar)'])
+def test_condiments_are_classified(recommender, name):
+    position = recommender.df.index[recommender.df['Food'].str.strip() == name][0]
+    assert recommender.condiments[position]
+    assert not any(suits[position] for suits in recommender.meal_suitability.values())
+
+
+def test_mixed_dishes_are_not_condiments(recommender):
+    position = recommender.df.index[recommender.df['Food'].str.strip() == 'Mixed vegetable pulao'][0]
+    assert not recommender.condiments[position]
+    assert recommender.meal_suitability['lunch'][position]
+
+
+def test_rank_foods_ranks_only_foods_meeting_every_criterion(recommender):
+    foods, total = recommender.rank_foods('obesity', page_size=1000)
+    assert total == len(foods) < 100
+    assert recommender.masks['obesity'][foods.index.to_numpy()].all()
+    assert foods['Suitability'].is_monotonic_decreasing
+
+
+def test_rank_foods_lists_near_misses_with_their_misses(recommender):
+    suitable, _ = recommender.rank_foods(['diabetes', 'hypertension'], page_size=1000)
+    near_misses, total = recommender.rank_foods(['diabetes', 'hypertension'], page_size=20, near_misses=True)
+    assert total > len(near_misses) == 20
+    assert not set(suitable.index) & set(near_misses.index)
+    assert near_misses['Misses'].str.len().gt(0).all()
+    assert near_misses['Misses'].str.contains(r'\((?:Diabetes|Hypertension): [<>]').all()
+
+
+def test_rank_foods_pages_and_calorie_range(recommender):
+    first, total = recommender.rank_foods('arthritis', page=1, page_size=5)
+    second, _ = recommender.rank_foods('arthritis', page=2, page_size=5)
+    assert len(first) == len(second) == 5 and not set(first.index) & set(second.index)
+    low, low_total = recommender.rank_foods('arthritis', page_size=1000, calorie_range=(0, 100))
+    assert low_total < total and low['Calories'].le(100).all()
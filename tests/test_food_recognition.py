@@ -0,0 +1,42 @@
+import torch
+
+from food_recognition import FoodRecognizer
+
+
+def recognizer(labels, food_mapping):
+    """A recognizer with only what label matching needs, without loading a model"""
+    recognizer = FoodRecognizer.__new__(FoodRecognizer)
+    recognizer.preset_images = {}
+    recognizer.labels = labels
+    recognizer.food_mapping = food_mapping
+    recognizer.all_food_names = []
+    recognizer.reverse_mapping = {}
+    return recognizer
+
+
+def outputs(hot, size):
+    logits = torch.full((size,), -10.0)
+    logits[hot] = 10.0
+    return logits
+
+
+def test_match_outputs_collects_messages_instead_of_showing_them():
+    labels = ['pizza', 'plate', 'dog'] + [f'thing {i}' for i in range(10)]
+    model = recognizer(labels, {'Pizza': ['pizza']})
+
+    messages = []
+    assert model._match_outputs(outputs(0, len(labels)), messages=messages)[0] == 'Pizza'
+    assert messages == [('info', 'Recognized as Pizza (confidence: 1.00)')]
+
+    messages = []
+    assert model._match_outputs(outputs(2, len(labels)), messages=messages) == (None, 0.0)
+    assert [level for level, _ in messages] == ['warning']
+
+
+def test_recognize_food_collects_errors():
+    model = recognizer([], {})
+    model.model = object()
+    model._infer = lambda images: 1 / 0
+    messages = []
+    assert model.recognize_food(None, messages) is None
+    assert messages == [('error', 'Error extracting features: division by zero')]
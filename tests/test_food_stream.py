@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from food_stream import FoodStreamRecognizer, difference_hash, hamming_distance
+
+
+def frame(pattern, food='dal', confidence=0.9):
+    """A noise frame; the same pattern gives the same picture. The stub recognizer reads the food from info"""
+    pixels = np.random.default_rng(pattern).integers(0, 256, (48, 64, 3), dtype=np.uint8)
+    image = Image.fromarray(pixels)
+    image.info.update(food=food, confidence=confidence)
+    return image
+
+
+class StubRecognizer:
+    def __init__(self):
+        self.batches = []
+
+    def recognize_batch(self, images):
+        self.batches.append(len(images))
+        return [(image.info['food'], image.info['confidence']) for image in images]
+
+    def get_nutrition_info(self, food_name):
+        return {'name': food_name, 'calories': 100.0}
+
+
+def run(frames, **options):
+    recognizer = StubRecognizer()
+    stream = FoodStreamRecognizer(recognizer, max_batch_delay=1e9, **options)
+    events = list(stream.process((index, index / 30, image) for index, image in enumerate(frames)))
+    return stream, recognizer, events
+
+
+def test_difference_hash_tells_similar_frames_from_different_ones():
+    image = frame(1)
+    brighter = Image.fromarray(np.clip(np.asarray(image, dtype=np.int16) + 10, 0, 255).astype(np.uint8))
+    assert difference_hash(image) == difference_hash(frame(1))
+    assert hamming_distance(difference_hash(image), difference_hash(brighter)) <= 6
+    assert hamming_distance(difference_hash(image), difference_hash(frame(2))) > 6
+    assert difference_hash(image) < 2 ** 64
+
+
+def test_duplicate_frames_skip_inference():
+    stream, recognizer, events = run([frame(1)] * 10)
+    assert stream.stats == {'frames': 10, 'skipped': 9, 'analysed': 1, 'batches': 1}
+    assert recognizer.batches == [1]
+    assert [(event['food'], event['previous_food'], event['frame_index']) for event in events] == [('dal', None, 0)]
+    assert events[0]['nutrition'] == {'name': 'dal', 'calories': 100.0}
+
+
+def test_frames_are_batched():
+    stream, recognizer, _ = run([frame(pattern) for pattern in range(10)], batch_size=4)
+    assert recognizer.batches == [4, 4, 2]
+    assert stream.stats['batches'] == 3
+
+
+def test_stale_partial_batches_are_flushed():
+    recognizer = StubRecognizer()
+    stream = FoodStreamRecognizer(recognizer, batch_size=100, max_batch_delay=0.5)
+    frames = [(index, index * 0.2, frame(index)) for index in range(6)]
+    list(stream.process(frames))
+    # A batch goes once its oldest frame is 0.5 s old
+    assert recognizer.batches == [4, 2]
+
+
+def test_vote_smooths_out_single_misreadings():
+    foods = ['dal', 'dal', 'paneer', 'dal', 'paneer', 'paneer', 'paneer']
+    _, _, events = run([frame(pattern, food, 0.9 if food == 'dal' else 0.5) for pattern, food in enumerate(foods)],
+                       smoothing_window=3)
+    assert [(event['food'], event['previous_food']) for event in events] == [('dal', None), ('paneer', 'dal')]
+    # paneer wins at frame 4 with 2 x 0.5 against 0.9 for dal, averaged over the window
+    assert events[1]['frame_index'] == 4
+    assert events[1]['confidence'] == pytest.approx(1.0 / 3)
+
+
+def test_smoothing_window_counts_analysed_frames_only():
+    # Duplicates of the dal frame must not fill the window and outvote the paneer frame
+    _, _, events = run([frame(1, 'dal', 0.5)] * 5 + [frame(2, 'paneer', 0.9)], smoothing_window=3)
+    assert [event['food'] for event in events] == ['dal', 'paneer']
@@ -0,0 +1,22 @@
+import pytest
+
+from healthy_alternatives import HealthyAlternatives
+
+
+@pytest.fixture(scope='module')
+def alternatives():
+    return HealthyAlternatives()
+
+
+@pytest.mark.parametrize('food_item, key', [
+    ('Samosa', 'samosa'),
+    ('  vegetable samosa ', 'samosa'),
+    ('Masala Dosa', 'dosa'),
+    ('cheese pizza (thin crust)', 'pizza'),
+    # Curated names inside other words are different dishes
+    ('Dosakaya pachadi', None),
+    ('Pakoras', None),
+    ('Pizzazz salad', None),
+])
+def test_curated_key_matches_whole_words(alternatives, food_item, key):
+    assert alternatives._curated_key(food_item) == key
@@ -0,0 +1,88 @@
+import csv
+import json
+
+import pytest
+from PIL import Image
+
+from image_batch import ImageBatchAnalyzer, ReportWriter, iter_images, resume_output
+
+
+class FakeRecognizer:
+    """Recognizes red images as samosa and anything else as nothing"""
+
+    def recognize_batch(self, images):
+        return [('samosa', 0.9) if image.getpixel((0, 0))[0] > 128 else (None, 0.1) for image in images]
+
+    def get_nutrition_info(self, food_name):
+        return {'name': food_name, 'calories': 260, 'protein': 4, 'fat': 17, 'carbs': 24}
+
+
+@pytest.fixture
+def photos(tmp_path):
+    folder = tmp_path / 'photos'
+    folder.mkdir()
+    for i in range(5):
+        Image.new('RGB', (32, 32), (255 if i % 2 == 0 else 0, 0, 0)).save(folder / f"{i}.png")
+    (folder / '5.jpg').write_bytes(b'not an image')
+    return folder
+
+
+def run(photos, path, output_format, done=frozenset(), header=True, stop_after=None):
+    analyzer = ImageBatchAnalyzer(FakeRecognizer(), batch_size=2, decode_workers=2)
+    items = ((image_id, source) for image_id, source in iter_images(str(photos)) if image_id not in done)
+    with open(path, 'a', newline='', encoding='utf-8') as f:
+        writer = ReportWriter(f, output_format, header=header)
+        for count, report in enumerate(analyzer.analyze(items), 1):
+            writer.write(report)
+            if count == stop_after:
+                break
+    return analyzer.stats
+
+
+def test_analyze_reports_every_image(photos, tmp_path):
+    path = tmp_path / 'out.jsonl'
+    stats = run(photos, path, 'jsonl')
+    reports = {report['image']: report for report in map(json.loads, path.read_text().splitlines())}
+
+    assert list(reports) == ['0.png', '1.png', '2.png', '3.png', '4.png', '5.jpg']
+    assert reports['0.png']['food'] == 'samosa' and reports['0.png']['nutrition']['calories'] == 260.0
+    assert reports['1.png']['food'] is None
+    assert 'error' in reports['5.jpg']
+    assert stats == {'images': 6, 'failed': 1, 'unrecognized': 2, 'batches': 3}
+
+
+@pytest.mark.parametrize('output_format', ['jsonl', 'csv'])
+def test_resume_after_crash_mid_write(photos, tmp_path, output_format):
+    path = tmp_path / f"out.{output_format}"
+    run(photos, path, output_format, stop_after=3)
+    # Crash halfway through writing the last report
+    content = path.read_bytes()
+    path.write_bytes(content[:len(content) - 10])
+
+    done = resume_output(str(path), output_format)
+    assert done == {'0.png', '1.png'}
+    run(photos, path, output_format, done=done, header=False)
+
+    if output_format == 'jsonl':
+        images = [json.loads(line)['image'] for line in path.read_text().splitlines()]
+    else:
+        rows = list(csv.reader(path.open(newline='')))
+        assert rows[0] == ReportWriter.CSV_COLUMNS
+        assert all(len(row) == len(ReportWriter.CSV_COLUMNS) for row in rows)
+        images = [row[0] for row in rows[1:]]
+    assert images == ['0.png', '1.png', '2.png', '3.png', '4.png', '5.jpg']
+
+
+def test_resume_retries_failed_images_once(photos, tmp_path):
+    path = tmp_path / 'out.jsonl'
+    run(photos, path, 'jsonl')
+    (photos / '5.jpg').unlink()
+    Image.new('RGB', (32, 32)).save(photos / '5.jpg')
+
+    done = resume_output(str(path), 'jsonl')
+    assert '5.jpg' not in done
+    run(photos, path, 'jsonl', done=done)
+
+    reports = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [report['image'] for report in reports].count('5.jpg') == 1
+    assert not any('error' in report for report in reports)
@@ -0,0 +1,55 @@
+import glob
+import os
+
+import numpy as np
+import pytest
+import torch
+from PIL import Image
+from torchvision import transforms
+
+from image_preprocessing import IMAGENET_MEAN, IMAGENET_STD, ImagePreprocessor
+
+PRESETS = sorted(glob.glob(os.path.join(os.path.dirname(__file__), '..', 'app', 'preset_images', '*.*g')))
+# One uint8 level after normalization, for the channel with the smallest std
+LEVEL = 1 / 255 / min(IMAGENET_STD)
+
+reference = transforms.Compose([
+    transforms.Resize(256), transforms.CenterCrop(224), transforms.ToTensor(),
+    transforms.Normalize(IMAGENET_MEAN, IMAGENET_STD)
+])
+
+
+@pytest.fixture(scope='module')
+def preprocess():
+    return ImagePreprocessor()
+
+
+@pytest.mark.parametrize('path', PRESETS, ids=os.path.basename)
+def test_photos_match_torchvision_within_one_level(preprocess, path):
+    image = Image.open(path).convert('RGB')
+    difference = (reference(image) - preprocess([image])[0]).abs()
+    assert float(difference.max()) <= LEVEL + 1e-6
+    assert float(difference.mean()) < 1e-4
+
+
+def test_large_noise_stays_within_four_levels(preprocess):
+    image = Image.fromarray(np.random.default_rng(0).integers(0, 256, (3000, 4000, 3), dtype=np.uint8))
+    assert float((reference(image) - preprocess([image])[0]).abs().max()) <= 4 * LEVEL + 1e-6
+
+
+def test_non_rgb_images_are_converted(preprocess):
+    images = [Image.new('RGBA', (300, 200), (10, 20, 30, 128)), Image.new('L', (200, 300), 77)]
+    batch = preprocess(images)
+    assert batch.shape == (2, 3, 224, 224)
+    assert torch.allclose(batch[1], reference(images[1].convert('RGB')), atol=LEVEL)
+
+
+def test_batches_reuse_the_thread_buffer_and_fill_out(preprocess):
+    images = [Image.new('RGB', (256, 256), (i * 40, 0, 0)) for i in range(3)]
+    first = preprocess(images)
+    second = preprocess(images[:2])
+    assert first.data_ptr() == second.data_ptr()
+
+    out = torch.empty((4, 3, 224, 224))
+    assert preprocess(images, out=out).data_ptr() == out.data_ptr()
+    assert torch.equal(out[:3], preprocess(images))
@@ -0,0 +1,65 @@
+import pytest
+
+from ingredient_search import IngredientIndex, normalize_term
+
+CATEGORIES = {
+    'vegetables': ['palak', 'lauki', 'gajar'],
+    'grains': ['ragi', 'brown rice'],
+    'proteins': ['moong dal', 'paneer'],
+}
+DISHES = ['Dal  Makhani', 'Palak Paneer', 'Gajar Halwa']
+SYNONYMS = {'palak': ['spinach', 'पालक'], 'lauki': ['bottle gourd'], 'baingan': ['brinjal']}
+
+
+@pytest.fixture(scope='module')
+def index():
+    return IngredientIndex(CATEGORIES, DISHES, SYNONYMS)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('  Palak,   PANEER ', 'palak paneer'),
+    ('Café', 'cafe'),
+    ('पालक', 'पालक'),
+    ('लौकी', 'लौकी'),
+])
+def test_normalize_term(text, expected):
+    assert normalize_term(text) == expected
+
+
+def test_complete_ranks_ingredients_then_synonyms_then_dishes(index):
+    assert index.complete('pa') == [('palak', 'palak'), ('paneer', 'paneer'), ('Palak Paneer', 'Palak Paneer')]
+    # One completion per canonical name, with the best-ranked name that matched
+    assert index.complete('b') == [('baingan', 'baingan'), ('brown rice', 'brown rice'), ('lauki', 'bottle gourd')]
+
+
+def test_complete_matches_later_words(index):
+    # "dal" starts the second word of "moong dal", ranked ahead of the dish it starts
+    assert [canonical for canonical, _ in index.complete('dal')][:2] == ['moong dal', 'Dal Makhani']
+
+
+def test_complete_reports_the_synonym_that_matched(index):
+    assert index.complete('spin') == [('palak', 'spinach')]
+    assert index.complete('Bottle') == [('lauki', 'bottle gourd')]
+
+
+def test_complete_respects_k_and_unknown_prefixes(index):
+    assert len(index.complete('g', k=1)) == 1
+    assert index.complete('zzz') == []
+
+
+@pytest.mark.parametrize('term, expected', [
+    ('Spinach', 'palak'),
+    ('पालक', 'palak'),
+    ('palak', 'palak'),
+    ('spinnach', 'palak'),
+    ('dal makhani', 'Dal Makhani'),
+    ('quinoa', None),
+])
+def test_canonical(index, term, expected):
+    assert index.canonical(term) == expected
+
+
+def test_normalize_maps_dedupes_and_keeps_unknowns(index):
+    ingredients, changed = index.normalize('Spinach, palak,  quinoa  flakes , , Brinjal')
+    assert ingredients == ['palak', 'quinoa flakes', 'baingan']
+    assert changed == {'Spinach': 'palak', 'Brinjal': 'baingan'}
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from json_stream import JsonStreamParser, parse_json_object
+
+RECIPE = {
+    'name': 'Palak {paneer}',
+    'ingredients': ['200 g palak', '100 g paneer', 'salt "to taste"'],
+    'instructions': ['Blanch the palak.', 'Add paneer.\nServe.'],
+    'servings': 2,
+    'notes': {'spice': 'mild', 'tags': ['vegetarian', 'gluten-free']}
+}
+
+
+def feed(text, chunk_size):
+    parser = JsonStreamParser()
+    for start in range(0, len(text), chunk_size):
+        parser.feed(text[start:start + chunk_size])
+    return parser
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 7, 1000])
+def test_complete_object_in_prose_and_fences(chunk_size):
+    text = "Here is your recipe:\n```json\n" + json.dumps(RECIPE, indent=2) + "\n```\nEnjoy {it}!"
+    parser = feed(text, chunk_size)
+    assert parser.complete
+    assert parser.value() == RECIPE
+    assert parser.document == json.dumps(RECIPE, indent=2)
+
+
+def test_every_truncation_gives_valid_json_with_a_prefix_of_the_fields():
+    text = json.dumps(RECIPE)
+    for end in range(1, len(text)):
+        parser = feed(text[:end], 5)
+        value = parser.value()
+        assert isinstance(value, dict)
+        # Fields arrive in order, and only the last one can be cut short
+        keys = list(value)
+        assert keys == list(RECIPE)[:len(keys)]
+        for key in keys[:-1]:
+            assert value[key] == RECIPE[key]
+
+
+@pytest.mark.parametrize('text, expected', [
+    # A cut-short string value of an object is kept and closed
+    ('{"name": "Palak pan', {'name': 'Palak pan'}),
+    # A cut-short array item is dropped
+    ('{"steps": ["Boil", "Fr', {'steps': ['Boil']}),
+    # A cut-short number is dropped, as it may be wrong
+    ('{"name": "Dal", "servings": 1', {'name': 'Dal'}),
+    # A cut-short key is dropped
+    ('{"name": "Dal", "serv', {'name': 'Dal'}),
+    ('{"name": "Dal", "servings"', {'name': 'Dal'}),
+    ('{"name": "Dal", "servings": ', {'name': 'Dal'}),
+    # Escapes cut in half are dropped rather than left dangling
+    ('{"name": "Say \\', {'name': 'Say '}),
+    ('{"name": "Caf\\u00', {'name': 'Caf'}),
+    ('{"name": "Caf\\u00e9", "x": [1, {"y": [2', {'name': 'Café', 'x': [1, {'y': []}]}),
+])
+def test_truncation_cases(text, expected):
+    parser = feed(text, 4)
+    assert not parser.complete
+    assert json.loads(parser.repaired()) == expected
+    assert parser.value() == expected
+
+
+def test_trailing_commas_are_tolerated():
+    assert parse_json_object('{"a": [1, 2,], "b": {"c": 3,},}') == {'a': [1, 2], 'b': {'c': 3}}
+
+
+def test_text_after_the_object_is_ignored():
+    parser = JsonStreamParser()
+    parser.feed('{"a": 1}')
+    parser.feed(' and {"b": 2}')
+    assert parser.value() == {'a': 1}
+
+
+@pytest.mark.parametrize('text', ['', 'Sorry, I cannot help with that.', '[1, 2, 3]'])
+def test_no_object_raises_value_error(text):
+    with pytest.raises(ValueError):
+        parse_json_object(text)
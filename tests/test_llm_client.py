@@ -0,0 +1,154 @@
+import time
+from types import SimpleNamespace
+
+import openai
+import pytest
+
+from llm_client import CircuitBreaker, CircuitOpenError, LLMClient, RequestLimiter
+
+
+def status_error(status_code, error=openai.APIStatusError):
+    response = SimpleNamespace(status_code=status_code, headers={}, request=None)
+    return error(f"HTTP {status_code}", response=response, body=None)
+
+
+class FakeCompletions:
+    """Answers create() with the queued results in order, raising the exceptions among them"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def make_client(completions, breaker, **kwargs):
+    client = LLMClient(api_key='test', base_url='http://127.0.0.1:9/v1', backoff_base=0, breaker=breaker, **kwargs)
+    client._client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return client
+
+
+def completion():
+    return SimpleNamespace(usage=SimpleNamespace(prompt_tokens=3, completion_tokens=5))
+
+
+def test_breaker_opens_after_threshold_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.state == 'closed' and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+
+
+def test_breaker_success_resets_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == 'closed'
+
+
+def test_breaker_lets_one_trial_through_after_timeout():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    assert not breaker.allow()
+    time.sleep(0.02)
+    assert breaker.allow()
+    assert breaker.state == 'half-open'
+    # Only the one trial until it settles
+    assert not breaker.allow()
+
+
+def test_breaker_failed_trial_reopens():
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=0)
+    for _ in range(5):
+        breaker.record_failure()
+    assert breaker.allow() and breaker.state == 'half-open'
+    breaker.record_failure()
+    assert breaker.state == 'open'
+
+
+@pytest.mark.parametrize('error', [
+    status_error(400, openai.BadRequestError),
+    status_error(401, openai.AuthenticationError),
+    status_error(404, openai.NotFoundError),
+])
+def test_client_error_during_trial_closes_breaker(error):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    completions = FakeCompletions(status_error(500), error, completion())
+    client = make_client(completions, breaker, max_retries=0)
+
+    with pytest.raises(openai.APIStatusError):
+        client.chat(model='m', messages=[])
+    assert breaker.state == 'open'
+
+    # The trial reaches a provider that answers, but rejects the request
+    with pytest.raises(type(error)):
+        client.chat(model='m', messages=[])
+    assert breaker.state == 'closed'
+
+    assert client.chat(model='m', messages=[]) is not None
+    assert completions.calls == 3
+
+
+def test_unexpected_error_during_trial_reopens_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    completions = FakeCompletions(status_error(503), ValueError("bad reply"), completion())
+    client = make_client(completions, breaker, max_retries=0)
+
+    with pytest.raises(openai.APIStatusError):
+        client.chat(model='m', messages=[])
+    with pytest.raises(ValueError):
+        client.chat(model='m', messages=[])
+    assert breaker.state == 'open'
+
+    # Not stuck half-open: the next trial goes ahead and recovers
+    assert client.chat(model='m', messages=[]) is not None
+    assert breaker.state == 'closed'
+
+
+def test_open_breaker_fails_fast_and_frees_limiter_slot():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    limiter = RequestLimiter(max_concurrent=1)
+    completions = FakeCompletions()
+    client = make_client(completions, breaker, limiter=limiter)
+
+    with pytest.raises(CircuitOpenError):
+        client.chat(model='m', messages=[])
+    assert completions.calls == 0
+    assert limiter.active == 0
+    assert client.metrics.summary()['rejected'] == 1
+
+
+def test_limiter_timeout_does_not_start_a_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    limiter = RequestLimiter(max_concurrent=1)
+    limiter.acquire(1)
+    client = make_client(FakeCompletions(completion()), breaker, limiter=limiter)
+
+    with pytest.raises(TimeoutError):
+        client.chat(model='m', messages=[], timeout=0.01)
+    assert breaker.state == 'open'
+
+    limiter.release(1)
+    assert client.chat(model='m', messages=[]) is not None
+    assert breaker.state == 'closed'
+
+
+def test_retryable_errors_are_retried():
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=60)
+    completions = FakeCompletions(status_error(502), status_error(503), completion())
+    client = make_client(completions, breaker, max_retries=3)
+
+    assert client.chat(model='m', messages=[]) is not None
+    assert completions.calls == 3
+    assert breaker.state == 'closed'
+    assert client.metrics.summary()['retries'] == 2
@@ -0,0 +1,52 @@
+import time
+
+import pytest
+import torch
+
+from model_server import ModelServerPool
+
+
+class SleepyModel(torch.nn.Module):
+    """Sleeps for as many seconds as the first input value, then returns zeros"""
+
+    def __init__(self):
+        super().__init__()
+        self.scale = torch.nn.Parameter(torch.zeros(1))
+
+    def forward(self, x):
+        time.sleep(float(x[0, 0, 0, 0]))
+        return torch.zeros(len(x), 4) * self.scale
+
+
+def sleep_for(seconds):
+    def preprocess(images, out):
+        out[:len(images)].fill_(seconds)
+    return preprocess
+
+
+@pytest.fixture
+def pool():
+    pool = ModelServerPool(SleepyModel(), SleepyModel, num_workers=1, threads_per_worker=1,
+                           max_batch=2, image_size=2, num_outputs=4, start_method='fork', timeout=0.3)
+    yield pool
+    pool.close()
+
+
+def test_predict_returns_outputs(pool):
+    assert pool.predict([None, None, None], sleep_for(0)).shape == (3, 4)
+
+
+def test_timed_out_slots_are_reclaimed(pool):
+    # One worker, two slots: both time out and are abandoned
+    for _ in range(pool.num_slots):
+        with pytest.raises(TimeoutError):
+            pool.predict([None], sleep_for(0.5))
+
+    # The worker is still busy, so this times out rather than hanging
+    with pytest.raises(TimeoutError):
+        pool.predict([None], sleep_for(0))
+
+    # Once the late results arrive, the slots are handed out again
+    time.sleep(1.0)
+    assert pool.predict([None], sleep_for(0)).shape == (1, 4)
+    assert pool._free_slots.qsize() == pool.num_slots
@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+from recipe_batch import generate_recipes, read_requests, resume_output
+
+
+def record(request_id, **fields):
+    return json.dumps({'id': request_id, 'ingredients': ['palak'], 'cuisine': 'Indian', **fields}) + '\n'
+
+
+class FakeGenerator:
+    cache = None
+
+    def request_recipe(self, ingredients, cuisine):
+        if 'stone' in ingredients:
+            raise RuntimeError("Not food")
+        return {'name': f"{cuisine} {' '.join(ingredients)}", 'ingredients': ingredients}
+
+
+def test_read_requests_defaults(tmp_path):
+    path = tmp_path / 'requests.jsonl'
+    path.write_text('{"ingredients": "palak, paneer ,"}\n\n{"id": "x", "ingredients": ["aloo"], "cuisine": "Thai"}\n')
+    assert list(read_requests(str(path))) == [
+        {'id': '1', 'ingredients': ['palak', 'paneer'], 'cuisine': 'Indian'},
+        {'id': 'x', 'ingredients': ['aloo'], 'cuisine': 'Thai'},
+    ]
+
+
+def test_read_requests_turns_bad_lines_into_errors(tmp_path):
+    path = tmp_path / 'requests.jsonl'
+    path.write_text('{bad json\n[1, 2]\n{"id": "c", "ingredients": ["chicken", 5]}\n'
+                    '{"ingredients": ["aloo"], "cuisine": 5}\n{"ingredients": ["aloo"]}\n')
+    requests = list(read_requests(str(path)))
+    assert [request['id'] for request in requests] == ['1', '2', 'c', '4', '5']
+    assert 'line 1 is not valid JSON' in requests[0]['error']
+    assert requests[1]['error'] == 'line 2 is not a JSON object'
+    assert 'ingredients' in requests[2]['error']
+    assert 'cuisine 5' in requests[3]['error']
+    assert 'error' not in requests[4]
+
+    async def collect():
+        return [result async for result in generate_recipes(FakeGenerator(), requests, concurrency=2)]
+
+    results = {result['id']: result for result in asyncio.run(collect())}
+    assert [request_id for request_id, result in sorted(results.items()) if 'error' not in result] == ['5']
+
+
+def test_resume_output_missing_file(tmp_path):
+    assert resume_output(str(tmp_path / 'missing.jsonl')) == set()
+
+
+def test_resume_output_keeps_complete_recipes_only(tmp_path):
+    path = tmp_path / 'out.jsonl'
+    path.write_text(
+        record('a', recipe={'name': 'Palak'})
+        + record('b', error='Timed out')
+        + record('c', recipe={'name': 'Half', 'incomplete': True})
+        + record('d', recipe={'name': 'Dal'})
+        + record('e', recipe={'name': 'Cut short'})[:30]
+    )
+
+    assert resume_output(str(path)) == {'a', 'd'}
+    assert [json.loads(line)['id'] for line in path.read_text().splitlines()] == ['a', 'd']
+    assert not (tmp_path / 'out.jsonl.tmp').exists()
+
+
+def test_resumed_run_appends_clean_lines(tmp_path):
+    path = tmp_path / 'out.jsonl'
+    path.write_text(record('a', recipe={'name': 'Palak'}) + record('b', error='Timed out')
+                    + record('c', recipe={'name': 'Cut short'})[:25])
+    done = resume_output(str(path))
+
+    with open(path, 'a', encoding='utf-8') as output:
+        output.write(record('b', recipe={'name': 'Retried'}))
+
+    results = [json.loads(line) for line in path.read_text().splitlines()]
+    assert done == {'a'}
+    assert [(result['id'], 'error' in result) for result in results] == [('a', False), ('b', False)]
+
+
+def test_generate_recipes_reports_errors_per_request():
+    requests = [{'id': str(i), 'ingredients': ingredients, 'cuisine': 'Indian'}
+                for i, ingredients in enumerate([['palak'], ['stone'], [], ['aloo', 'matar']])]
+
+    async def collect():
+        return [result async for result in generate_recipes(FakeGenerator(), requests, concurrency=2)]
+
+    results = {result['id']: result for result in asyncio.run(collect())}
+    assert results['0']['recipe']['name'] == 'Indian palak'
+    assert results['1']['error'] == 'Not food'
+    assert results['2']['error'] == 'No ingredients'
+    assert 'cached' not in results['3']
@@ -0,0 +1,44 @@
+import pytest
+
+from recipe_cache import RecipeCache, warm_up
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return RecipeCache(str(tmp_path / 'recipes.sqlite3'))
+
+
+class FakeGenerator:
+    """Caches recipes like RecipeGenerator, except for ingredients it 'fails' on"""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.calls = []
+
+    def cache_key(self, ingredients, cuisine):
+        return RecipeCache.make_key(ingredients, cuisine, 'model', 1, 0.7)
+
+    def generate_recipe(self, ingredients, cuisine, surprise=False):
+        self.calls.append(ingredients)
+        recipe = {'name': ' '.join(ingredients)}
+        # A failed or cut-short call falls back to a built-in recipe, which is not cached
+        if 'stone' not in ingredients:
+            self.cache.put(self.cache_key(ingredients, cuisine), recipe, ingredients, cuisine)
+        return recipe
+
+
+def test_make_key_ignores_order_case_and_spacing():
+    assert RecipeCache.make_key(['Palak', ' paneer'], 'Indian', 'm', 1, 0.71) == \
+        RecipeCache.make_key(['paneer ', 'palak', 'PALAK'], 'indian ', 'm', 1, 0.7)
+    assert RecipeCache.make_key(['palak'], 'Indian', 'm', 1, 0.7) != RecipeCache.make_key(['palak'], 'Thai', 'm', 1, 0.7)
+
+
+def test_warm_up_counts_only_cached_recipes(cache):
+    generator = FakeGenerator(cache)
+    generator.generate_recipe(['dal'], 'Indian')
+    combinations = [(['dal'], 'Indian'), (['palak'], 'Indian'), (['stone'], 'Indian')]
+
+    assert warm_up(generator, combinations) == 1
+    assert generator.calls == [['dal'], ['palak'], ['stone']]
+    assert cache.stats()['entries'] == 2
+
@@ -0,0 +1,138 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import openai
+import pytest
+
+import recipe_generator
+from recipe_generator import _coalesce
+
+
+class Interrupted(BaseException):
+    """Stands in for a Streamlit rerun or KeyboardInterrupt in the leading request"""
+
+
+def start_leader(key, call):
+    """Run _coalesce for key on a thread, returning it once the request is in flight"""
+    started = threading.Event()
+    errors = []
+
+    def leader():
+        try:
+            _coalesce(key, lambda: (started.set(), call())[1])
+        except BaseException as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=leader)
+    thread.start()
+    started.wait(5)
+    return thread, errors
+
+
+def test_identical_requests_share_one_call():
+    release = threading.Event()
+    calls = []
+    thread, _ = start_leader('shared', lambda: (calls.append(1), release.wait(5), {'name': 'Dal'})[2])
+
+    results = []
+    follower = threading.Thread(target=lambda: results.append(_coalesce('shared', lambda: calls.append(2))))
+    follower.start()
+    time.sleep(0.05)
+    release.set()
+    thread.join(5)
+    follower.join(5)
+
+    assert results == [{'name': 'Dal'}]
+    assert calls == [1]
+    assert 'shared' not in recipe_generator._in_flight_calls
+
+
+def test_leader_error_reaches_followers():
+    release = threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise ValueError("No recipe")
+
+    thread, _ = start_leader('error', fail)
+    threading.Timer(0.05, release.set).start()
+    with pytest.raises(ValueError, match="No recipe"):
+        _coalesce('error', lambda: pytest.fail("Should have waited for the leader"), timeout=5)
+    thread.join(5)
+
+
+def test_interrupted_leader_releases_followers():
+    release = threading.Event()
+
+    def interrupted():
+        release.wait(5)
+        raise Interrupted()
+
+    thread, errors = start_leader('interrupted', interrupted)
+    threading.Timer(0.05, release.set).start()
+    with pytest.raises(RuntimeError, match="interrupted"):
+        _coalesce('interrupted', lambda: pytest.fail("Should have waited for the leader"), timeout=5)
+    thread.join(5)
+
+    assert isinstance(errors[0], Interrupted)
+    assert 'interrupted' not in recipe_generator._in_flight_calls
+    # The next request runs afresh
+    assert _coalesce('interrupted', lambda: {'name': 'Retry'}) == {'name': 'Retry'}
+
+
+def test_follower_gives_up_after_timeout():
+    release = threading.Event()
+    thread, _ = start_leader('slow', lambda: release.wait(5) and {'name': 'Slow'})
+    try:
+        with pytest.raises(TimeoutError):
+            _coalesce('slow', lambda: None, timeout=0.05)
+    finally:
+        release.set()
+        thread.join(5)
+
+
+def test_followers_get_their_own_copy():
+    release = threading.Event()
+    leader_results = []
+
+    def leader():
+        result = _coalesce('copies', lambda: (release.wait(5), {'name': 'Dal', 'ingredients': ['moong']})[1])
+        result['ingredients'].append('changed by the leader')
+        leader_results.append(result)
+
+    thread = threading.Thread(target=leader)
+    thread.start()
+    time.sleep(0.05)
+    followers = []
+    threads = [threading.Thread(target=lambda: followers.append(_coalesce('copies', lambda: None, timeout=5)))
+               for _ in range(2)]
+    for follower in threads:
+        follower.start()
+    time.sleep(0.05)
+    release.set()
+    for other in [thread, *threads]:
+        other.join(5)
+
+    followers[0]['name'] = 'Changed'
+    assert followers[1] == {'name': 'Dal', 'ingredients': ['moong']}
+    assert followers[0] is not followers[1]
+    assert leader_results[0]['ingredients'] == ['moong', 'changed by the leader']
+
+
+def test_json_mode_fallback_is_per_call():
+    generator = recipe_generator.RecipeGenerator.__new__(recipe_generator.RecipeGenerator)
+    generator.model, generator.temperature, generator.max_tokens, generator.json_mode = 'm', 0.7, 500, True
+    calls = []
+
+    def call(**options):
+        calls.append('response_format' in options)
+        if 'response_format' in options:
+            response = SimpleNamespace(status_code=400, headers={}, request=None)
+            raise openai.BadRequestError("No JSON mode", response=response, body=None)
+        return 'ok'
+
+    assert generator._request(call, []) == 'ok'
+    assert generator._request(call, []) == 'ok'
+    assert calls == [True, False, True, False]
+    assert generator.json_mode
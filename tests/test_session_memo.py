@@ -0,0 +1,66 @@
+import pickle
+
+from session_memo import SessionMemo
+
+
+def size(value):
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def test_evicts_least_recently_used_over_max_entries():
+    memo = SessionMemo(max_entries=2)
+    memo.put('a', 1)
+    memo.put('b', 2)
+    assert memo.get('a') == 1
+    memo.put('c', 3)
+    assert 'b' not in memo
+    assert memo.get('a') == 1 and memo.get('c') == 3
+    assert memo.stats() == {'entries': 2, 'bytes': size(1) + size(3), 'hits': 3, 'misses': 0}
+
+
+def test_evicts_until_under_max_bytes():
+    value = b'x' * 1000
+    memo = SessionMemo(max_bytes=3 * size(value), max_entries=100)
+    for key in 'abc':
+        memo.put(key, value)
+    memo.get('a')
+    memo.put('d', b'y' * 1500)
+    # Both b and c go to make room; a was used more recently
+    assert list(memo._entries) == ['a', 'd']
+    assert memo.bytes == size(value) + size(b'y' * 1500) <= memo.max_bytes
+
+
+def test_oversized_result_is_returned_but_not_kept():
+    memo = SessionMemo(max_bytes=100)
+    memo.put('small', 1)
+    assert memo.get_or_compute('big', lambda: b'x' * 200) == b'x' * 200
+    assert 'big' not in memo and 'small' in memo
+    assert memo.bytes == size(1)
+
+
+def test_replacing_a_key_updates_its_size():
+    memo = SessionMemo()
+    memo.put('a', b'x' * 500)
+    memo.put('a', b'x')
+    assert len(memo) == 1
+    assert memo.bytes == size(b'x')
+
+
+def test_get_or_compute_computes_once():
+    memo = SessionMemo()
+    calls = []
+    for _ in range(3):
+        assert memo.get_or_compute('k', lambda: calls.append(1) or 'result') == 'result'
+    assert len(calls) == 1
+    assert (memo.hits, memo.misses) == (2, 1)
+    memo.clear()
+    assert len(memo) == 0 and memo.bytes == 0
+
+
+def test_none_results_are_stored():
+    memo = SessionMemo()
+    calls = []
+    for _ in range(3):
+        assert memo.get_or_compute('failed', lambda: calls.append(1)) is None
+    assert len(calls) == 1
+    assert 'failed' in memo